@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Measures how much concurrent password generation delays an asyncio event loop, by running a ticker coroutine
+that asks to wake up every millisecond and recording how late it wakes up (p50, p99 and worst case), while a number
+of coroutines generate passwords as fast as they can: first by calling the synchronous API directly from the
+coroutines (one password at a time, and in batches), and then through the async API (one password at a time, and
+through the async batch iterator).
+
+Usage:
+    python benchmarks/bench_async.py [seconds] [coroutines]
+"""
+
+import asyncio
+import sys
+import time
+
+from passwdgen.aio import aiter_passwords, aload_word_list, agenerate_chars, agenerate_words
+from passwdgen.generator import chars, words, words_batch
+from passwdgen.constants import *
+
+# how often the ticker coroutine asks to wake up, in seconds
+TICK_INTERVAL = 0.001
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(time.perf_counter() - start - TICK_INTERVAL)
+
+
+async def sync_words(word_list, counter, stop):
+    while not stop.is_set():
+        words(word_list)
+        chars(PC_SPECIAL, length=16)
+        counter[0] += 2
+        await asyncio.sleep(0)
+
+
+async def sync_batches(word_list, counter, stop):
+    while not stop.is_set():
+        counter[0] += len(words_batch(DEFAULT_ASYNC_BATCH_SIZE, word_list))
+        await asyncio.sleep(0)
+
+
+async def async_words(word_list, counter, stop):
+    while not stop.is_set():
+        await agenerate_words(word_list)
+        await agenerate_chars(PC_SPECIAL, length=16)
+        counter[0] += 2
+
+
+async def async_batches(word_list, counter, stop):
+    while not stop.is_set():
+        async for _ in aiter_passwords(10000, dict_set=word_list):
+            counter[0] += 1
+            if stop.is_set():
+                break
+
+
+async def run_scenario(worker, word_list, seconds, coroutines):
+    lags, counter, stop = [], [0], asyncio.Event()
+    tasks = [asyncio.ensure_future(ticker(lags, stop))]
+    tasks += [asyncio.ensure_future(worker(word_list, counter, stop)) for _ in range(coroutines)]
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return lags, counter[0] / (time.perf_counter() - start)
+
+
+async def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    coroutines = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    word_list = await aload_word_list()
+
+    print("Event loop lag under password generation load (%d coroutines, %.1fs each)" % (coroutines, seconds))
+    print("-----------------------------------------------------------------------")
+    for name, worker in [
+        ("words/chars", sync_words),
+        ("words_batch", sync_batches),
+        ("agenerate_words/chars", async_words),
+        ("aiter_passwords", async_batches),
+    ]:
+        lags, throughput = await run_scenario(worker, word_list, seconds, coroutines)
+        print(
+            "%-22s: p50 %7.0fus, p99 %7.0fus, max %7.0fus, %9.0f passwords/s"
+            % (
+                name,
+                1e6 * percentile(lags, 50),
+                1e6 * percentile(lags, 99),
+                1e6 * max(lags),
+                throughput,
+            )
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
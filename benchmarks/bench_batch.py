@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Compares the number of passwords per second generated by calling chars()/words() in a loop against the
+batch APIs chars_batch()/words_batch().
+
+Usage:
+    python benchmarks/bench_batch.py [count]
+"""
+
+import sys
+import time
+
+from passwdgen.constants import PC_SPECIAL
+from passwdgen.generator import chars, chars_batch, words, words_batch
+from passwdgen.utils import load_word_list
+
+
+def rate(fn, count):
+    start = time.perf_counter()
+    fn(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    word_list = load_word_list()
+
+    print("Passwords per second")
+    print("--------------------")
+    print(
+        "chars() loop                      : %12.0f"
+        % rate(lambda n: [chars(PC_SPECIAL) for _ in range(n)], count)
+    )
+    print(
+        "chars_batch()                     : %12.0f"
+        % rate(lambda n: chars_batch(n, PC_SPECIAL), count)
+    )
+    print(
+        "words() loop                      : %12.0f"
+        % rate(lambda n: [words(word_list) for _ in range(n)], count)
+    )
+    print(
+        "words_batch()                     : %12.0f"
+        % rate(lambda n: words_batch(n, word_list), count)
+    )
+    print(
+        "words(starting_letters) loop      : %12.0f"
+        % rate(
+            lambda n: [words(word_list, starting_letters="pass") for _ in range(n)],
+            count,
+        )
+    )
+    print(
+        "words_batch(starting_letters)     : %12.0f"
+        % rate(lambda n: words_batch(n, word_list, starting_letters="pass"), count)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Compares the throughput of clean_word_list() against the original implementation, which cleaned each word
+character by character and kept every unique word in memory.
+
+A synthetic corpus is built from the built-in word list, with words in random case, with possessives, trailing
+punctuation and surrounding whitespace.
+
+Usage:
+    python benchmarks/bench_clean.py [repeats] [jobs]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from string import ascii_lowercase
+
+from passwdgen.utils import clean_word_list, load_word_list
+
+
+def original_clean_word_list(input_path, output_path, encoding=None, min_word_len=3):
+    word_list = set()
+    words_read = 0
+    with open(input_path, "rt", encoding=encoding) as input_file:
+        for line in input_file:
+            word = line.strip().lower()
+            if len(word) > 0:
+                words_read += 1
+                if word.endswith("'s"):
+                    word = word[:-2]
+                stripped_word = ""
+                for c in word:
+                    if c in ascii_lowercase:
+                        stripped_word += c
+                if stripped_word and len(stripped_word) >= min_word_len:
+                    word_list.add(stripped_word)
+    with open(output_path, "wt", encoding=encoding) as output_file:
+        for word in sorted(list(word_list)):
+            output_file.write("%s\n" % word)
+    return {"words_read": words_read, "words_written": len(word_list)}
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    words = list(load_word_list())
+    rnd = random.Random(1)
+    variants = [
+        lambda w: w,
+        lambda w: w.capitalize(),
+        lambda w: w.upper(),
+        lambda w: w + "'s",
+        lambda w: "  " + w + ".",
+    ]
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        input_path = os.path.join(temp_dir, "corpus.txt")
+        with open(input_path, "wt", encoding="utf-8") as f:
+            for _ in range(repeats):
+                f.write("".join(rnd.choice(variants)(w) + "\n" for w in words))
+        size = os.path.getsize(input_path) / 1048576.0
+        print("Cleaning a %.1fMB corpus" % size)
+        print("------------------------")
+
+        start = time.perf_counter()
+        original_clean_word_list(input_path, os.path.join(temp_dir, "a.txt"), "utf-8")
+        elapsed = time.perf_counter() - start
+        print("original          : %7.2f MB/s" % (size / elapsed))
+
+        for j in sorted(set([1, jobs])):
+            result = clean_word_list(
+                input_path, os.path.join(temp_dir, "b.txt"), "utf-8", jobs=j
+            )
+            print("streaming, %2d job%s: %7.2f MB/s" % (j, " " if j == 1 else "s", result["throughput_mb_per_second"]))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
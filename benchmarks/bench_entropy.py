@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Compares the throughput of calculate_entropy() against the original implementation, which tested the set of
+a password's characters against every charset in turn and built the number of word permutations as a big
+integer before taking its log.
+
+Usage:
+    python benchmarks/bench_entropy.py [count]
+"""
+
+import math
+import sys
+import time
+
+from passwdgen.constants import PASSWORD_CHARSETS, PC_ALPHA_LOWER_SEP, PC_DICT, PC_SPECIAL, separators
+from passwdgen.generator import chars_batch, words_batch
+from passwdgen.utils import calculate_entropy, load_word_list, permutations
+
+
+def original_calculate_entropy(password, dict_set=None):
+    password_letters = set(password)
+    password_len = len(password)
+    entropy = dict()
+    for charset_name, charset in PASSWORD_CHARSETS.items():
+        if password_letters.issubset(charset):
+            entropy[charset_name] = math.log(1.0 * len(charset), 2.0) * password_len
+    if dict_set is not None:
+        if password_letters.issubset(PASSWORD_CHARSETS[PC_ALPHA_LOWER_SEP]):
+            sep = None
+            for c in password_letters:
+                if c in separators:
+                    sep = c
+                    break
+            words = password.split(sep) if sep is not None else [password]
+            if len(words) == len(set(words)):
+                all_words_found = True
+                for word in words:
+                    if word not in dict_set:
+                        all_words_found = False
+                if all_words_found:
+                    entropy[PC_DICT] = math.log(permutations(len(dict_set), len(words)), 2.0)
+    return entropy
+
+
+def rate(fn, passwords, dict_set):
+    start = time.perf_counter()
+    for pw in passwords:
+        fn(pw, dict_set)
+    return len(passwords) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    word_list = load_word_list()
+    word_passwords = words_batch(count, word_list, word_count=5)
+    samples = [
+        ("chars (special, 16)", chars_batch(count, PC_SPECIAL, length=16), word_list),
+        ("words (WordList, 5)", word_passwords, word_list),
+        ("words (set, 5)", word_passwords, set(word_list)),
+    ]
+
+    print("Passwords scored per second (%d passwords)" % count)
+    print("-------------------------------------------")
+    for name, passwords, dict_set in samples:
+        before = rate(original_calculate_entropy, passwords, dict_set)
+        after = rate(calculate_entropy, passwords, dict_set)
+        print("%-20s: %10.0f -> %10.0f (%.1fx)" % (name, before, after, after / before))
+
+
+if __name__ == "__main__":
+    main()
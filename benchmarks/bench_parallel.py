@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Shows how the throughput of chars_parallel()/words_parallel() scales with the number of processes used.
+
+Usage:
+    python benchmarks/bench_parallel.py [count] [max_jobs]
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+from passwdgen.constants import PC_SPECIAL
+from passwdgen.parallel import chars_parallel, words_parallel
+from passwdgen.utils import load_word_list
+
+
+def rate(passwords, count):
+    start = time.perf_counter()
+    # consume the passwords without keeping them around
+    deque(passwords, maxlen=0)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    word_list = load_word_list()
+
+    print("Passwords per second (%d passwords, %d CPUs)" % (count, os.cpu_count() or 1))
+    print("--------------------------------------------------")
+    print("jobs  chars (special, 16)   words (dict, 5)   speedup")
+    baseline = None
+    jobs = 1
+    while jobs <= max_jobs:
+        chars_rate = rate(
+            chars_parallel(count, PC_SPECIAL, length=16, jobs=jobs, ordered=False),
+            count,
+        )
+        words_rate = rate(
+            words_parallel(count, word_list, word_count=5, jobs=jobs, ordered=False),
+            count,
+        )
+        if baseline is None:
+            baseline = (chars_rate, words_rate)
+        print(
+            "%4d  %17.0f  %16.0f   %.2fx / %.2fx"
+            % (
+                jobs,
+                chars_rate,
+                words_rate,
+                chars_rate / baseline[0],
+                words_rate / baseline[1],
+            )
+        )
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Compares the throughput of drawing random integers with one os.urandom() call per draw (the approach
+passwdgen used originally) against drawing them from the buffered entropy pool.
+
+Usage:
+    python benchmarks/bench_rng.py [draws]
+"""
+
+import os
+import struct
+import sys
+import time
+
+from passwdgen.generator import chars
+from passwdgen.constants import PC_SPECIAL
+from passwdgen.rng import EntropyPool
+from passwdgen.utils import secure_random
+
+
+def unbuffered_secure_random(a):
+    (random_val,) = struct.unpack("Q", os.urandom(8))
+    return random_val % a
+
+
+def rate(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    pool = EntropyPool()
+
+    print("Draws per second (%d draws)" % draws)
+    print("---------------------------")
+    print("os.urandom(8) per draw  : %12.0f" % rate(lambda: unbuffered_secure_random(94), draws))
+    print("EntropyPool.uint64()    : %12.0f" % rate(pool.uint64, draws))
+    print("secure_random() (pooled): %12.0f" % rate(lambda: secure_random(94), draws))
+    print("chars() per second      : %12.0f" % rate(lambda: chars(PC_SPECIAL), draws // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Measures how many random bytes are pulled from the entropy pool per generated character (or word), compared to
+the 8 bytes per draw that the original 64-bit modulo approach consumed.
+
+Usage:
+    python benchmarks/bench_sampler.py [count]
+"""
+
+import math
+import sys
+
+from passwdgen.constants import PASSWORD_CHARSETS
+from passwdgen.generator import chars, chars_batch, words, words_batch
+from passwdgen.rng import get_entropy_pool
+from passwdgen.utils import load_word_list
+
+
+def bytes_per_unit(fn, units):
+    pool = get_entropy_pool()
+    before = pool.bytes_consumed
+    fn()
+    return float(pool.bytes_consumed - before) / units
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    length = 12
+    word_list = load_word_list()
+
+    print("Random bytes consumed per character (original: 8.000)")
+    print("-----------------------------------------------------")
+    print("%-22s %6s %8s %8s %8s" % ("charset", "size", "minimum", "chars()", "batch"))
+    for charset_id, charset in PASSWORD_CHARSETS.items():
+        minimum = math.log(len(charset), 2.0) / 8.0
+        single = bytes_per_unit(
+            lambda: [chars(charset_id, length=length) for _ in range(count // 10)],
+            (count // 10) * length,
+        )
+        batch = bytes_per_unit(
+            lambda: chars_batch(count, charset_id, length=length), count * length
+        )
+        print("%-22s %6d %8.3f %8.3f %8.3f" % (charset_id, len(charset), minimum, single, batch))
+
+    print("\nRandom bytes consumed per word (original: 8.000)")
+    print("------------------------------------------------")
+    print("minimum       : %.3f" % (math.log(len(word_list), 2.0) / 8.0))
+    print(
+        "words()       : %.3f"
+        % bytes_per_unit(lambda: [words(word_list) for _ in range(count // 10)], (count // 10) * 4)
+    )
+    print(
+        "words_batch() : %.3f" % bytes_per_unit(lambda: words_batch(count, word_list), count * 4)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Load-tests the password server: measures the latency of one request at a time, and the throughput of
+pipelined requests from several concurrent clients, compared to running `passwdgen generate` once per password.
+
+Usage:
+    python benchmarks/bench_server.py [requests] [clients]
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from passwdgen.server import PasswordClient
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def wait_for_server(socket_path, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            PasswordClient(socket_path).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    temp_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(temp_dir, "passwdgen.sock")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "passwdgen", "serve", "--socket", socket_path],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(socket_path)
+        print("Password server load test (%d requests)" % requests)
+        print("---------------------------------------")
+
+        for name, request in [("words", {}), ("chars", {"charset": "special", "length": 16})]:
+            with PasswordClient(socket_path) as client:
+                latencies = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    client.generate(**request)
+                    latencies.append(time.perf_counter() - start)
+            print(
+                "%s, one at a time     : p50 %.0fus, p99 %.0fus"
+                % (name, 1e6 * percentile(latencies, 50), 1e6 * percentile(latencies, 99))
+            )
+
+        per_client = requests // clients
+
+        def pipelined_client():
+            with PasswordClient(socket_path) as client:
+                for i in range(0, per_client, 1000):
+                    client.request_many([{}] * min(1000, per_client - i))
+
+        threads = [threading.Thread(target=pipelined_client) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        print("words, pipelined, %d clients: %.0f requests/s" % (clients, per_client * clients / elapsed))
+
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run(
+                [sys.executable, "-m", "passwdgen", "generate"],
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+        print("`passwdgen generate` process  : %.0fus per password" % (1e6 * (time.perf_counter() - start) / runs))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
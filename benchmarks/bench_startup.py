@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Measures how long the command line takes to import what it needs for each command (using the interpreter's
+-X importtime option), and checks that against a budget for each command, as well as checking that no command
+imports modules it has no need for (e.g. multiprocessing or asyncio). Exits with a non-zero status if any
+command is over its budget, so that this can be run as part of CI to catch startup time regressions.
+
+Import times are compared to those of a bare interpreter, so that only the imports attributable to passwdgen
+are counted. Each command is run several times, and the fastest run is used.
+
+Usage:
+    python benchmarks/bench_startup.py [runs] [budget_scale]
+
+On slower machines, budget_scale (default 1.0) can be used to scale all of the budgets up.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# modules that only a handful of commands need, and which are expensive to import
+HEAVY_MODULES = [
+    "asyncio",
+    "concurrent.futures",
+    "multiprocessing",
+    "numpy",
+    "pyperclip",
+]
+
+# (name, arguments, stdin, import time budget in milliseconds, modules that must not be imported)
+COMMANDS = [
+    ("version", ["version"], None, 25.0, HEAVY_MODULES + ["passwdgen.utils", "passwdgen.wordlist"]),
+    ("generate (chars)", ["generate", "-t", "alpha-numeric"], None, 45.0, HEAVY_MODULES + ["importlib.resources"]),
+    ("generate (words)", ["generate"], None, 60.0, HEAVY_MODULES),
+    (
+        "generate (batch)",
+        ["generate", "-t", "alpha-numeric", "-n", "100", "--entropy", "-f", "csv"],
+        None,
+        50.0,
+        HEAVY_MODULES + ["importlib.resources"],
+    ),
+    ("info", ["info"], "correct-horse-battery-staple\n", 60.0, HEAVY_MODULES),
+    ("rng", ["rng", "-s", "1000", "-b", "python"], None, 45.0, HEAVY_MODULES),
+    ("client", ["client", "-S", os.devnull], None, 50.0, HEAVY_MODULES),
+]
+
+RUN_COMMAND_LINE = "from passwdgen.cmdline import main; main()"
+
+
+def import_times(code, args, stdin, env):
+    """Runs the given code with -X importtime, and returns a dictionary mapping each of the modules it imported
+    to its cumulative import time (in microseconds), along with the list of top-level imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code] + args,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError("Command failed: %s\n%s" % (" ".join(args), result.stderr))
+    times = dict()
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            # the header line
+            continue
+        times[name.strip()] = int(cumulative)
+        # nested imports are indented by two spaces per level
+        if not name[1:].startswith(" "):
+            top_level.append(name.strip())
+    return times, top_level
+
+
+def passwdgen_import_time(args, stdin, env, baseline):
+    """Returns the time (in milliseconds) spent importing the modules a command needs over and above those a bare
+    interpreter imports, along with the set of all modules the command imported."""
+    times, top_level = import_times(RUN_COMMAND_LINE, args, stdin, env)
+    total = sum(times[name] for name in top_level if name not in baseline)
+    return total / 1000.0, set(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget_scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    cache_dir = tempfile.mkdtemp()
+    env = dict(os.environ, PASSWDGEN_CACHE_DIR=cache_dir)
+    failures = []
+    try:
+        baseline = set(import_times("pass", [], None, env)[0])
+        # populate the compiled word list cache, so that the word-based commands are measured as they usually run
+        import_times(RUN_COMMAND_LINE, ["generate"], None, env)
+
+        print("Import time per command (fastest of %d runs)" % runs)
+        print("--------------------------------------------")
+        for name, args, stdin, budget, forbidden in COMMANDS:
+            budget *= budget_scale
+            measurements = [passwdgen_import_time(args, stdin, env, baseline) for _ in range(runs)]
+            elapsed = min(ms for ms, _ in measurements)
+            imported = set.union(*[modules for _, modules in measurements])
+            unwanted = sorted(module for module in forbidden if module in imported)
+
+            problems = []
+            if elapsed > budget:
+                problems.append("OVER BUDGET")
+            if unwanted:
+                problems.append("imports %s" % ", ".join(unwanted))
+            if problems:
+                failures.append(name)
+            status = "; ".join(problems) or "ok"
+            print("%-18s: %7.2f ms (budget %6.2f ms) %s" % (name, elapsed, budget, status))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if failures:
+        print("\nStartup time regressions in: %s" % ", ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Compares the time taken to load the default word list by parsing the text file line by line (as passwdgen
+did originally) against cold (compile and cache) and warm (memory-map the cached copy) loads of compiled word
+lists.
+
+Usage:
+    python benchmarks/bench_word_list.py [iterations]
+"""
+
+import importlib.resources
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from passwdgen.constants import DEFAULT_WORD_LIST, WORD_LIST_CACHE_DIR_ENV
+from passwdgen.utils import load_word_list
+
+
+def load_text_word_list(filename):
+    words = set()
+    with open(filename, "rt") as input_file:
+        for line in input_file:
+            word = line.strip()
+            if len(word) > 0:
+                words.add(word)
+    return words
+
+
+def timed(fn, iterations, before=None):
+    total = 0.0
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return 1000.0 * total / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    filename = importlib.resources.files("passwdgen").joinpath(DEFAULT_WORD_LIST)
+    cache_dir = tempfile.mkdtemp()
+    os.environ[WORD_LIST_CACHE_DIR_ENV] = cache_dir
+
+    def clear_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        print("Word list load times (ms, mean of %d)" % iterations)
+        print("-------------------------------------")
+        print("Text, line by line into a set : %8.3f" % timed(lambda: load_text_word_list(filename), iterations))
+        print("Compiled, cold (build + cache) : %8.3f" % timed(load_word_list, iterations, before=clear_cache))
+        load_word_list()
+        print("Compiled, warm (mmap)          : %8.3f" % timed(load_word_list, iterations))
+    finally:
+        clear_cache()
+
+
+if __name__ == "__main__":
+    main()
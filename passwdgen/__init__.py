@@ -2,5 +2,57 @@
 
 __version__ = "0.4.0"
 from .constants import *
-from .generator import *
-from .utils import *
+from . import constants as _constants
+
+# the public names of each submodule, which are only imported once one of their names is first accessed, so that
+# importing passwdgen (or running a command that doesn't need them) doesn't pay for every submodule's imports
+_lazy_exports = {
+    "generator": ["chars", "words", "chars_batch", "words_batch", "passphrase_entropy"],
+    "parallel": ["chars_parallel", "words_parallel"],
+    "audit": ["AuditStats", "audit_password", "audit_stream"],
+    "utils": [
+        "clean_word_list",
+        "clear_loaded_word_lists",
+        "compile_word_list",
+        "permutations",
+        "load_word_list",
+        "secure_random",
+        "secure_random_quality",
+        "rng_test_battery",
+        "calculate_entropy",
+    ],
+    "rng": ["EntropyPool", "get_entropy_pool", "sampling_unit"],
+    "wordlist": ["WordList", "as_word_list", "is_compiled_word_list", "word_list_cache_dir"],
+    "instrument": ["MetricsRecorder", "add_metrics_sink", "remove_metrics_sink", "recording"],
+    "policy": ["PasswordPolicy"],
+    "planner": ["PasswordPlan", "plan_password"],
+    "aio": ["aload_word_list", "agenerate_chars", "agenerate_words", "aiter_passwords"],
+    "ledger": ["Ledger"],
+    "blocklist": ["Blocklist", "compile_blocklist"],
+    "strength": ["estimate_strength"],
+    "registry": ["WordListRegistry", "get_word_list", "register_word_list", "word_list_names"],
+}
+
+_lazy_modules = dict(
+    (name, module) for module, names in _lazy_exports.items() for name in names
+)
+
+__all__ = list(_constants.__all__) + list(_lazy_modules)
+
+
+def __getattr__(name):
+    import importlib
+
+    if name in _lazy_exports:
+        # a submodule that hasn't been imported yet
+        return importlib.import_module("." + name, __name__)
+    module = _lazy_modules.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_modules))
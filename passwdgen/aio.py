@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from collections import deque
+from functools import partial
+import os
+import threading
+import time
+import weakref
+
+from .generator import chars_batch, words_batch
+from .utils import load_word_list
+from .wordlist import WordList, as_word_list
+from .constants import *
+
+
+__all__ = [
+    "aload_word_list",
+    "agenerate_chars",
+    "agenerate_words",
+    "aiter_passwords",
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# the word lists being loaded through aload_word_list(), as concurrent.futures.Futures, so that all of the
+# coroutines (and event loops) asking for the same word list at the same time share a single load. Each load is
+# forgotten as soon as it completes: loaded word lists are kept (and checked for changes, and evicted) by
+# load_word_list()'s own cache
+_word_list_loads = dict()
+_word_list_loads_lock = threading.Lock()
+
+# the semaphore bounding the number of jobs submitted to the executor from each event loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_ASYNC_WORKERS, thread_name_prefix="passwdgen-aio"
+            )
+        return _executor
+
+
+async def _run(func, *args, **kwargs):
+    """Runs the given function in the executor, waiting for a free slot first if ASYNC_MAX_PENDING_JOBS jobs from
+    this event loop are already queued or running."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(ASYNC_MAX_PENDING_JOBS)
+    async with semaphore:
+        return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+
+def _generate_in_slices(generate, count):
+    """Generates count passwords by calling generate() with a slice of ASYNC_SLICE_SIZE passwords at a time,
+    yielding the interpreter lock in between. Otherwise, a worker thread that keeps generating passwords only gives
+    the lock up to the event loop's thread once every switch interval (5ms by default)."""
+    passwords = []
+    while count > 0:
+        size = min(count, ASYNC_SLICE_SIZE)
+        passwords.extend(generate(size))
+        count -= size
+        if count > 0:
+            time.sleep(0)
+    return passwords
+
+
+async def aload_word_list(filename=None, resource=None, encoding=None):
+    """Loads a word list (see utils.load_word_list()) without blocking the event loop. Concurrent calls for the
+    same word list wait for the same load, and later calls are answered from load_word_list()'s cache of loaded
+    word lists, so changes to the word list's file are picked up in the same way.
+
+    Args:
+        filename: The path to the word list file. Defaults to the built-in word list.
+        resource: The name of a word list resource within the passwdgen package.
+        encoding: The encoding of the word list file.
+
+    Returns:
+        A WordList.
+    """
+    if filename is not None:
+        key = (os.path.abspath(filename), None, encoding)
+    else:
+        key = (None, resource or DEFAULT_WORD_LIST, encoding)
+    with _word_list_loads_lock:
+        future = _word_list_loads.get(key)
+        submitted = future is None
+        if submitted:
+            future = _word_list_loads[key] = _get_executor().submit(load_word_list, filename, resource, encoding)
+    if submitted:
+        # outside of the lock, since the callback is run straight away if the load has already completed
+        future.add_done_callback(partial(_forget_word_list_load, key))
+    return await asyncio.wrap_future(future)
+
+
+def _forget_word_list_load(key, future):
+    with _word_list_loads_lock:
+        if _word_list_loads.get(key) is future:
+            del _word_list_loads[key]
+
+
+async def agenerate_chars(charset=None, length=None, min_entropy=None):
+    """Generates a character-based password without blocking the event loop. See generator.chars() for details on
+    the parameters.
+
+    Returns:
+        A string containing the generated password.
+    """
+    return (await _run(chars_batch, 1, charset, length, min_entropy))[0]
+
+
+async def agenerate_words(
+    dict_set=None,
+    separator=None,
+    word_count=None,
+    min_entropy=None,
+    starting_letters=None,
+):
+    """Generates a word-based password without blocking the event loop. See generator.words() for details on the
+    parameters. If no dictionary is given, the built-in word list is loaded through aload_word_list().
+
+    Returns:
+        A string containing the generated password.
+    """
+    if dict_set is None:
+        dict_set = await aload_word_list()
+    return (
+        await _run(
+            words_batch,
+            1,
+            dict_set,
+            separator=separator,
+            word_count=word_count,
+            min_entropy=min_entropy,
+            starting_letters=starting_letters,
+        )
+    )[0]
+
+
+async def aiter_passwords(
+    count,
+    charset=None,
+    dict_set=None,
+    separator=None,
+    length=None,
+    min_entropy=None,
+    starting_letters=None,
+    batch_size=None,
+    prefetch=None,
+):
+    """Generates many passwords without blocking the event loop, as an asynchronous iterator. Passwords are
+    generated in batches in the executor, at most a few batches ahead of the consumer, so that a slow consumer
+    holds up generation rather than letting passwords pile up in memory.
+
+    Args:
+        count: The number of passwords to generate.
+        charset: The character set from which to generate passwords (see constants.PASSWORD_CHARSETS), or PC_DICT
+            (the default) for word-based passwords.
+        dict_set: The word list/dictionary from which to generate word-based passwords. Defaults to the built-in
+            word list, loaded through aload_word_list().
+        separator: The separator to use between words.
+        length: The number of characters or words in each password.
+        min_entropy: The desired minimum entropy of each password.
+        starting_letters: The desired starting letters (or prefixes) of the words of each word-based password.
+        batch_size: The number of passwords generated by each job in the executor (default:
+            constants.DEFAULT_ASYNC_BATCH_SIZE). Smaller batches hold the interpreter lock for shorter periods at a
+            time, at some cost to throughput.
+        prefetch: The maximum number of batches generated ahead of the consumer (default:
+            constants.DEFAULT_ASYNC_PREFETCH).
+
+    Yields:
+        The generated passwords.
+    """
+    if batch_size is None:
+        batch_size = DEFAULT_ASYNC_BATCH_SIZE
+    if prefetch is None:
+        prefetch = DEFAULT_ASYNC_PREFETCH
+    if batch_size < 1 or prefetch < 1:
+        raise ValueError("Batch size and prefetch must be at least 1")
+
+    if charset is None or charset == PC_DICT:
+        if dict_set is None:
+            dict_set = await aload_word_list()
+        elif not isinstance(dict_set, WordList):
+            # convert the dictionary once, rather than once per batch
+            dict_set = await _run(as_word_list, dict_set)
+        generate = partial(
+            words_batch,
+            dict_set=dict_set,
+            separator=separator,
+            word_count=length,
+            min_entropy=min_entropy,
+            starting_letters=starting_letters,
+        )
+    else:
+        generate = partial(chars_batch, charset=charset, length=length, min_entropy=min_entropy)
+
+    pending = deque()
+    try:
+        remaining = count
+        while remaining > 0 or pending:
+            # keep up to prefetch batches in flight, but no more: new batches are only started as the consumer
+            # catches up
+            while remaining > 0 and len(pending) < prefetch:
+                size = min(batch_size, remaining)
+                pending.append(asyncio.ensure_future(_run(_generate_in_slices, generate, size)))
+                remaining -= size
+            for password in await pending.popleft():
+                yield password
+    finally:
+        for task in pending:
+            task.cancel()
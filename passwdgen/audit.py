@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+
+from .parallel import _map_parallel, _shared_word_list, _worker_word_list
+from .utils import calculate_entropy
+from .wordlist import WordList, as_word_list
+from .constants import *
+
+
+__all__ = ["AuditStats", "audit_password", "audit_stream"]
+
+# word lists shared with this (worker) process, as sets of words for fast membership tests, by path
+_worker_word_sets = dict()
+
+
+def audit_password(password, dict_set=None):
+    """Works out the entropy of a password from the perspective of the best-informed attacker, i.e. based on the
+    smallest of the charsets (or the dictionary) from which the password could have been drawn.
+
+    Args:
+        password: The password to audit.
+        dict_set: The set of words in our dictionary/word list (optional).
+
+    Returns:
+        A (charset, entropy) tuple, where charset is the ID of the charset (or PC_DICT) giving the lowest entropy.
+        If the password contains characters that are in none of the known charsets, both are None.
+    """
+    entropy = calculate_entropy(password, dict_set=dict_set)
+    if not entropy:
+        return None, None
+    charset = min(entropy, key=entropy.get)
+    return charset, entropy[charset]
+
+
+class AuditStats(object):
+    """Aggregate statistics over a stream of audited passwords. Only counts and totals are kept, so memory use
+    does not depend on the number of passwords audited."""
+
+    def __init__(self):
+        self.count = 0
+        # the number of passwords containing characters in none of the known charsets
+        self.unclassified = 0
+        self.total_length = 0
+        self.total_entropy = 0.0
+        self.min_entropy = None
+        self.max_entropy = None
+        # the number of passwords in each AUDIT_HISTOGRAM_BIN_BITS wide bin of entropy, by the bin's lower bound
+        self.histogram = Counter()
+        # the number of passwords for which each charset (or PC_DICT) gives the lowest entropy
+        self.charsets = Counter()
+
+    def add(self, length, charset, entropy):
+        """Adds the results of auditing a single password (see audit_password()) to the statistics."""
+        self.count += 1
+        self.total_length += length
+        if charset is None:
+            self.unclassified += 1
+            return
+        self.charsets[charset] += 1
+        self.total_entropy += entropy
+        if self.min_entropy is None or entropy < self.min_entropy:
+            self.min_entropy = entropy
+        if self.max_entropy is None or entropy > self.max_entropy:
+            self.max_entropy = entropy
+        self.histogram[int(entropy // AUDIT_HISTOGRAM_BIN_BITS) * AUDIT_HISTOGRAM_BIN_BITS] += 1
+
+    def merge(self, other):
+        """Adds the statistics of another stream of audited passwords to these ones."""
+        self.count += other.count
+        self.unclassified += other.unclassified
+        self.total_length += other.total_length
+        self.total_entropy += other.total_entropy
+        for attr, pick in [("min_entropy", min), ("max_entropy", max)]:
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        self.histogram.update(other.histogram)
+        self.charsets.update(other.charsets)
+
+    @property
+    def mean_length(self):
+        return self.total_length / self.count if self.count else None
+
+    @property
+    def mean_entropy(self):
+        classified = self.count - self.unclassified
+        return self.total_entropy / classified if classified else None
+
+    def as_dict(self):
+        """Returns these statistics as a JSON-serialisable dictionary."""
+        return {
+            "count": self.count,
+            "unclassified": self.unclassified,
+            "mean_length": self.mean_length,
+            "min_entropy": self.min_entropy,
+            "mean_entropy": self.mean_entropy,
+            "max_entropy": self.max_entropy,
+            "histogram_bin_bits": AUDIT_HISTOGRAM_BIN_BITS,
+            "histogram": dict(sorted(self.histogram.items())),
+            "charsets": dict(self.charsets.most_common()),
+        }
+
+
+def _audit_chunk(passwords, dict_set, output_format):
+    """Audits the given passwords, returning their formatted records and the statistics over them."""
+    stats = AuditStats()
+    records = []
+    for password in passwords:
+        charset, entropy = audit_password(password, dict_set)
+        stats.add(len(password), charset, entropy)
+        records.append((password, len(password), charset, entropy))
+
+    if output_format == OUTPUT_FORMAT_JSONL:
+        # cheaper than serialising a dictionary per record, and produces the same output
+        text = "".join(
+            '{"password": %s, "length": %d, "charset": %s, "entropy": %s}\n'
+            % (json.dumps(pw), length, json.dumps(charset), json.dumps(entropy))
+            for pw, length, charset, entropy in records
+        )
+    elif output_format == OUTPUT_FORMAT_CSV:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerows(
+            (pw, length, charset or "", "" if entropy is None else "%.6f" % entropy)
+            for pw, length, charset, entropy in records
+        )
+        text = out.getvalue()
+    else:
+        text = "".join(
+            "%s\t%d\t%s\t%s\n"
+            % (pw, length, charset or "-", "-" if entropy is None else "%.6f" % entropy)
+            for pw, length, charset, entropy in records
+        )
+    return text, stats
+
+
+def _audit_task(word_list_path, word_list_size, output_format, passwords):
+    dict_set = None
+    if word_list_path is not None:
+        dict_set = _worker_word_sets.get(word_list_path)
+        if dict_set is None:
+            dict_set = frozenset(_worker_word_list(word_list_path, word_list_size))
+            _worker_word_sets[word_list_path] = dict_set
+    return _audit_chunk(passwords, dict_set, output_format)
+
+
+def _chunks(iterable, size):
+    iterable = iter(iterable)
+    while True:
+        chunk = list(islice(iterable, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def audit_stream(passwords, out, output_format=None, dict_set=None, jobs=1, chunk_size=None):
+    """Audits a stream of passwords, writing the length, weakest charset and entropy of each of them (see
+    audit_password()) to the given output stream, in the same order as the passwords. Passwords are audited in
+    chunks, so memory use does not depend on the number of passwords.
+
+    Args:
+        passwords: An iterable of passwords (e.g. the lines of a file, without their line endings).
+        out: The text stream to which to write the results.
+        output_format: One of constants.OUTPUT_FORMATS (default: OUTPUT_FORMAT_JSONL).
+        dict_set: The set of words in our dictionary/word list (optional).
+        jobs: The number of processes across which to spread the work.
+        chunk_size: The number of passwords to audit at a time (see constants.DEFAULT_AUDIT_CHUNK_SIZE).
+
+    Returns:
+        An AuditStats object containing aggregate statistics over all of the passwords.
+    """
+    if output_format is None:
+        output_format = OUTPUT_FORMAT_JSONL
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError("Unrecognised output format: %s" % output_format)
+    if jobs < 1:
+        raise ValueError("Number of jobs must be at least 1")
+    if chunk_size is None:
+        chunk_size = DEFAULT_AUDIT_CHUNK_SIZE
+
+    if output_format == OUTPUT_FORMAT_CSV:
+        out.write("password,length,charset,entropy\n")
+    stats = AuditStats()
+    chunks = _chunks(passwords, chunk_size)
+
+    if jobs == 1:
+        # membership tests on a set are much faster than binary searches through a WordList
+        if isinstance(dict_set, WordList):
+            dict_set = frozenset(dict_set)
+        for chunk in chunks:
+            text, chunk_stats = _audit_chunk(chunk, dict_set, output_format)
+            out.write(text)
+            stats.merge(chunk_stats)
+        return stats
+
+    if dict_set is None:
+        results = _map_parallel(_audit_task, (None, 0, output_format), chunks, jobs)
+        for text, chunk_stats in results:
+            out.write(text)
+            stats.merge(chunk_stats)
+        return stats
+
+    word_list = as_word_list(dict_set)
+    with _shared_word_list(word_list) as path:
+        results = _map_parallel(
+            _audit_task, (path, len(word_list), output_format), chunks, jobs
+        )
+        for text, chunk_stats in results:
+            out.write(text)
+            stats.merge(chunk_stats)
+    return stats
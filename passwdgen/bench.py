@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+from .blocklist import Blocklist, compile_blocklist
+from .generator import chars, chars_batch, select_random_words, words, words_batch
+from .planner import plan_password
+from .policy import PasswordPolicy
+from .rng import get_entropy_pool
+from .strength import _Automaton, estimate_strength
+from .utils import (
+    calculate_entropy,
+    clean_word_list,
+    clear_loaded_word_lists,
+    load_word_list,
+    secure_random,
+)
+from .wordlist import WordList
+from .constants import *
+from . import __version__
+
+
+__all__ = ["run_benchmarks", "compare_results"]
+
+# version of the format of the benchmark results, bumped whenever benchmarks are renamed or change what they measure
+BENCH_RESULTS_VERSION = 1
+
+# the starting letters used by the starting letter benchmarks, which every fixture word list must cover
+_BENCH_STARTING_LETTERS = "pass"
+
+
+def _fixture_words(size):
+    """Generates a fixed word list of the given size. The words are pseudo-random (so that they have the same
+    distribution of first letters and lengths as any other word list would), but are the same on every run, so
+    that results are comparable across runs and machines."""
+    rng = random.Random(size)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.update(
+            "".join(rng.choices(letters, k=rng.randint(3, 12)))
+            for _ in range(size - len(words))
+        )
+    return sorted(words)
+
+
+def _write_fixture(path, words, noisy=False):
+    """Writes the given words to a plain text word list. Noisy fixtures have some of their words capitalised and
+    decorated with punctuation, digits and possessive suffixes, as raw word lists typically are."""
+    with open(path, "wt", encoding="utf-8", newline="\n") as f:
+        if not noisy:
+            f.write("".join(word + "\n" for word in words))
+            return
+        rng = random.Random(len(words))
+        decorations = ["%s", "%s's", "%s!", "  %s", "%s123", "%s-%s"]
+        for word in words:
+            decoration = rng.choice(decorations)
+            f.write(
+                (decoration % ((word.capitalize(),) * decoration.count("%s"))) + "\n"
+            )
+
+
+@contextmanager
+def _fixtures(sizes):
+    """Writes out the word list fixtures of the given sizes (as plain text, noisy plain text and compiled word
+    lists) to a temporary directory, which is also used as the word list cache for the duration of the context.
+
+    Yields:
+        A dictionary mapping each size to a dictionary of fixture paths and the fixture's WordList.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="passwdgen-bench-")
+    old_cache_dir = os.environ.get(WORD_LIST_CACHE_DIR_ENV)
+    os.environ[WORD_LIST_CACHE_DIR_ENV] = os.path.join(temp_dir, "cache")
+    fixtures = dict()
+    try:
+        for size in sizes:
+            words = _fixture_words(size)
+            text_path = os.path.join(temp_dir, "words-%d.txt" % size)
+            noisy_path = os.path.join(temp_dir, "noisy-%d.txt" % size)
+            compiled_path = os.path.join(temp_dir, "words-%d.pwl" % size)
+            _write_fixture(text_path, words)
+            _write_fixture(noisy_path, words, noisy=True)
+            word_list = WordList.from_words(words)
+            word_list.save(compiled_path)
+            blocklist_path = compile_blocklist(text_path)["output_path"]
+            fixtures[size] = {
+                "text": text_path,
+                "noisy": noisy_path,
+                "compiled": compiled_path,
+                "output": os.path.join(temp_dir, "clean-%d.txt" % size),
+                "word_list": WordList.load(compiled_path),
+                "blocklist": Blocklist(blocklist_path),
+                "password": DEFAULT_WORD_SEPARATOR.join(words[:: max(1, size // 4)][:4]),
+            }
+        yield fixtures
+    finally:
+        for fixture in fixtures.values():
+            fixture["blocklist"].close()
+        if old_cache_dir is None:
+            del os.environ[WORD_LIST_CACHE_DIR_ENV]
+        else:
+            os.environ[WORD_LIST_CACHE_DIR_ENV] = old_cache_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _case_name(function, **params):
+    return "%s[%s]" % (
+        function,
+        ",".join("%s=%s" % (key, params[key]) for key in sorted(params)),
+    )
+
+
+# the limits on each character class of the password policies benchmarked, from lenient to strict
+_BENCH_POLICIES = [
+    ("lenient", {CC_LOWER: 1, CC_UPPER: 1, CC_DIGITS: 1}),
+    ("strict", {CC_LOWER: 1, CC_UPPER: 2, CC_DIGITS: 3, CC_SPECIAL: 3}),
+]
+
+
+def _rejection_policy_chars(policy):
+    """Generates a password that complies with the given policy the way callers did before PasswordPolicy existed:
+    by drawing passwords uniformly from the policy's alphabet until one complies."""
+    pool = get_entropy_pool()
+    alphabet = policy.alphabet
+    while True:
+        password = "".join(alphabet[i] for i in pool.randbelow_many(len(alphabet), policy.length))
+        if policy.check(password):
+            return password
+
+
+def _load_from_disk(path):
+    """Loads the given word list, bypassing the word lists kept in memory by load_word_list()."""
+    clear_loaded_word_lists(path)
+    return load_word_list(path)
+
+
+def _benchmark_cases(fixtures):
+    """Yields a (name, unit, units per call, function) tuple for each benchmark, where the function runs one
+    iteration of the benchmark."""
+    for n in [2, 94, 2**32]:
+        yield _case_name("secure_random", n=n), "calls", 1, lambda n=n: secure_random(n)
+
+    for charset in [PC_NUMERIC, PC_ALPHA_NUMERIC, PC_SPECIAL]:
+        for length in [8, 16, 64]:
+            yield (
+                _case_name("chars", charset=charset, length=length),
+                "passwords",
+                1,
+                lambda charset=charset, length=length: chars(charset, length=length),
+            )
+    for min_entropy in [64, 128, 256]:
+        yield (
+            _case_name("chars", charset=PC_SPECIAL, min_entropy=min_entropy),
+            "passwords",
+            1,
+            lambda min_entropy=min_entropy: chars(PC_SPECIAL, min_entropy=min_entropy),
+        )
+    for count in [10, 1000, 100000]:
+        yield (
+            _case_name("chars_batch", charset=PC_SPECIAL, count=count),
+            "passwords",
+            count,
+            lambda count=count: chars_batch(count, PC_SPECIAL),
+        )
+
+    for policy_name, minimums in _BENCH_POLICIES:
+        policy = PasswordPolicy(length=12, minimums=minimums, exclude_ambiguous=True)
+        yield (
+            _case_name("policy_chars", policy=policy_name, method="constructive"),
+            "passwords",
+            1,
+            policy.generate,
+        )
+        yield (
+            _case_name("policy_chars", policy=policy_name, method="rejection"),
+            "passwords",
+            1,
+            lambda policy=policy: _rejection_policy_chars(policy),
+        )
+
+    for size, fixture in sorted(fixtures.items()):
+        word_list = fixture["word_list"]
+        for word_count in [4, 8]:
+            yield (
+                _case_name("words", words=size, word_count=word_count),
+                "passwords",
+                1,
+                lambda word_list=word_list, word_count=word_count: words(
+                    word_list, word_count=word_count
+                ),
+            )
+        yield (
+            _case_name("words", words=size, min_entropy=128),
+            "passwords",
+            1,
+            lambda word_list=word_list: words(word_list, min_entropy=128),
+        )
+        yield (
+            _case_name("words", words=size, starting_letters=_BENCH_STARTING_LETTERS),
+            "passwords",
+            1,
+            lambda word_list=word_list: words(
+                word_list, starting_letters=_BENCH_STARTING_LETTERS
+            ),
+        )
+        for count in [10, 1000, 100000]:
+            yield (
+                _case_name("words_batch", words=size, count=count),
+                "passwords",
+                count,
+                lambda word_list=word_list, count=count: words_batch(count, word_list),
+            )
+        # the passwords generated are (almost) never in the blocklist, so these measure the cost of checking them
+        blocklist = fixture["blocklist"]
+        yield (
+            _case_name("words_batch", words=size, count=1000, blocklist=size),
+            "passwords",
+            1000,
+            lambda word_list=word_list, blocklist=blocklist: words_batch(
+                1000, word_list, blocklist=blocklist
+            ),
+        )
+        yield (
+            _case_name("chars_batch", charset=PC_SPECIAL, count=1000, blocklist=size),
+            "passwords",
+            1000,
+            lambda blocklist=blocklist: chars_batch(1000, PC_SPECIAL, blocklist=blocklist),
+        )
+        yield (
+            _case_name("blocklist_contains", entries=size),
+            "calls",
+            1,
+            lambda blocklist=blocklist, password=fixture["password"]: password in blocklist,
+        )
+        yield (
+            _case_name("compile_blocklist", words=size),
+            "words",
+            size,
+            lambda fixture=fixture: compile_blocklist(fixture["text"], fixture["output"]),
+        )
+        plan = plan_password(
+            128,
+            objective=PLAN_OBJECTIVE_MEMORABLE,
+            word_list=word_list,
+            minimums={PC_NUMERIC: 2, PLAN_SOURCE_SYMBOLS: 1},
+        )
+        for count in [10, 1000, 100000]:
+            yield (
+                _case_name("plan_batch", words=size, count=count),
+                "passwords",
+                count,
+                lambda plan=plan, count=count: plan.generate_batch(count),
+            )
+        yield (
+            _case_name("select_random_words", words=size, count=4),
+            "calls",
+            1,
+            lambda word_list=word_list: select_random_words(word_list, 4),
+        )
+        yield (
+            _case_name(
+                "select_random_words",
+                words=size,
+                count=4,
+                starting_letters=_BENCH_STARTING_LETTERS,
+            ),
+            "calls",
+            1,
+            lambda word_list=word_list: select_random_words(
+                word_list, 4, starting_letters=_BENCH_STARTING_LETTERS
+            ),
+        )
+        yield (
+            _case_name("calculate_entropy", words=size, password="words"),
+            "passwords",
+            1,
+            lambda word_list=word_list, password=fixture["password"]: calculate_entropy(
+                password, dict_set=word_list
+            ),
+        )
+        yield (
+            _case_name("estimate_strength", words=size),
+            "passwords",
+            1,
+            lambda word_list=word_list, password=fixture["password"]: estimate_strength(
+                password, dict_set=word_list
+            ),
+        )
+        yield (
+            _case_name("strength_automaton", words=size),
+            "words",
+            size,
+            lambda word_list=word_list: _Automaton(word_list, STRENGTH_MIN_MATCH_LENGTH),
+        )
+
+        yield (
+            _case_name("load_word_list", words=size, source="text"),
+            "words",
+            size,
+            lambda path=fixture["text"]: load_word_list(path, use_cache=False),
+        )
+        yield (
+            _case_name("load_word_list", words=size, source="cached"),
+            "words",
+            size,
+            lambda path=fixture["text"]: _load_from_disk(path),
+        )
+        yield (
+            _case_name("load_word_list", words=size, source="compiled"),
+            # memory-mapping a compiled word list takes the same time regardless of its size
+            "loads",
+            1,
+            lambda path=fixture["compiled"]: _load_from_disk(path),
+        )
+        yield (
+            _case_name("load_word_list", words=size, source="memory"),
+            "loads",
+            1,
+            lambda path=fixture["text"]: load_word_list(path),
+        )
+        yield (
+            _case_name("clean_word_list", words=size),
+            "words",
+            size,
+            lambda fixture=fixture: clean_word_list(
+                fixture["noisy"], fixture["output"], encoding="utf-8"
+            ),
+        )
+
+    for length in [12, 64]:
+        password = chars(PC_SPECIAL, length=length)
+        yield (
+            _case_name("calculate_entropy", password="chars", length=length),
+            "passwords",
+            1,
+            lambda password=password: calculate_entropy(password),
+        )
+
+
+def _time_benchmark(function, min_time):
+    """Works out how many iterations of the given function take at least min_time seconds, and returns the time
+    taken per iteration by the fastest of BENCH_REPEATS timing runs of that many iterations."""
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        # aim for a little over min_time, without overshooting by much on the next attempt
+        number = max(number + 1, int(number * 1.2 * min_time / max(elapsed, 1e-9)))
+    timings = [elapsed] + timer.repeat(BENCH_REPEATS - 1, number)
+    return min(timings) / number
+
+
+def run_benchmarks(quick=False, pattern=None, min_time=None, progress=None):
+    """Runs the benchmark suite, which measures the throughput of each of passwdgen's hot paths (password
+    generation, entropy calculation, word list loading and cleaning, and random number generation) across a range
+    of parameters. Word lists are generated as fixed, offline fixtures of several sizes, so that results are
+    comparable from one run (and release) to the next.
+
+    Args:
+        quick: If True, only the smaller word list fixtures (see constants.BENCH_QUICK_WORD_LIST_SIZES) are used.
+        pattern: If specified, only the benchmarks whose names contain this string are run.
+        min_time: The minimum duration (in seconds) of each timing run (default: constants.DEFAULT_BENCH_MIN_TIME).
+        progress: An optional function to call with the name and result of each benchmark as it completes.
+
+    Returns:
+        A JSON-serialisable dictionary containing information about the environment in which the benchmarks
+        were run, and the results of each benchmark by name.
+    """
+    if min_time is None:
+        min_time = DEFAULT_BENCH_MIN_TIME
+    sizes = BENCH_QUICK_WORD_LIST_SIZES if quick else BENCH_WORD_LIST_SIZES
+    if pattern is not None:
+        # don't bother generating fixtures that none of the selected benchmarks use
+        sizes = [size for size in sizes if ("words=%d" % size) in pattern] or sizes
+
+    start_time = time.time()
+    results = dict()
+    with _fixtures(sizes) as fixtures:
+        for name, unit, units_per_call, function in _benchmark_cases(fixtures):
+            if pattern is not None and pattern not in name:
+                continue
+            seconds_per_call = _time_benchmark(function, min_time)
+            result = {
+                "unit": unit,
+                "per_second": units_per_call / seconds_per_call,
+                "seconds_per_call": seconds_per_call,
+            }
+            results[name] = result
+            if progress is not None:
+                progress(name, result)
+
+    return {
+        "version": BENCH_RESULTS_VERSION,
+        "passwdgen": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "byteorder": sys.byteorder,
+        "quick": quick,
+        "time": time.time() - start_time,
+        "results": results,
+    }
+
+
+def compare_results(results, baseline, threshold=None):
+    """Compares the given benchmark results against a baseline (e.g. the results of a previous release, as
+    returned by run_benchmarks()). Only the benchmarks present in both are compared.
+
+    Args:
+        results: The benchmark results to check.
+        baseline: The benchmark results to compare against.
+        threshold: The fraction by which a benchmark's throughput may fall below that of the baseline before it
+            is considered a regression (default: constants.DEFAULT_BENCH_THRESHOLD).
+
+    Returns:
+        A list of dictionaries, one for each benchmark compared (sorted by name), containing its name, its
+        throughput in the baseline and in the given results, the relative change in throughput (which is
+        negative where the throughput has dropped), and whether or not that change counts as a regression.
+    """
+    if threshold is None:
+        threshold = DEFAULT_BENCH_THRESHOLD
+    if threshold < 0:
+        raise ValueError("Regression threshold cannot be negative")
+    if baseline.get("version") != results.get("version"):
+        raise ValueError(
+            "Baseline was produced by an incompatible version of the benchmark suite"
+        )
+
+    comparisons = []
+    for name in sorted(set(results["results"]) & set(baseline["results"])):
+        expected = baseline["results"][name]["per_second"]
+        actual = results["results"][name]["per_second"]
+        change = actual / expected - 1.0
+        comparisons.append(
+            {
+                "name": name,
+                "baseline": expected,
+                "per_second": actual,
+                "change": change,
+                "regression": change < -threshold,
+            }
+        )
+    return comparisons
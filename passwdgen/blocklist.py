@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+from itertools import islice
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from .bloom import BloomFilter
+from .utils import _import_numpy
+from .constants import *
+
+
+__all__ = ["Blocklist", "compile_blocklist"]
+
+# blocklist files start with this magic string (the last two bytes are the format version)
+BLOCKLIST_MAGIC = b"PWDGBL02"
+
+# magic, number of entries, Bloom filter bits and hashes, flags
+_header = struct.Struct("<8sQQQQ")
+
+# flag set in the header of blocklists whose entries were lowercased, so that they match regardless of case
+_FLAG_IGNORE_CASE = 1
+
+
+def _entry_digest(entry):
+    """Hashes a blocklist entry (UTF-8 encoded bytes)."""
+    return hashlib.blake2b(entry, digest_size=16).digest()
+
+
+def _iter_lines(f, read_size):
+    """Yields lists of the lines (as bytes, without line endings) in the given binary file, a chunk at a time."""
+    tail = b""
+    while True:
+        chunk = f.read(read_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield lines
+    if tail:
+        yield [tail]
+
+
+def compile_blocklist(input_path, output_path=None, false_positive_rate=None, ignore_case=False, encoding=None):
+    """Compiles a (potentially very large) newline-delimited list of banned or breached passwords into a blocklist
+    file: a Bloom filter of the hashes of the passwords, which can be memory-mapped and checked in microseconds
+    (see Blocklist). The input is streamed through twice (once to count its lines, and once to hash them), so
+    memory use does not depend on its size.
+
+    Args:
+        input_path: The path to the input file, one password per line.
+        output_path: Where to write the blocklist (default: the input path with constants.BLOCKLIST_EXTENSION
+            appended).
+        false_positive_rate: The rate at which the blocklist reports passwords that aren't in the list as being
+            in it (default: constants.DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE).
+        ignore_case: If True, passwords match the blocklist regardless of their case.
+        encoding: The encoding of the input file (default: UTF-8).
+
+    Returns:
+        A dictionary containing statistics about the compile operation.
+    """
+    start_time = time.time()
+    if output_path is None:
+        output_path = input_path + BLOCKLIST_EXTENSION
+    if false_positive_rate is None:
+        false_positive_rate = DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("The false positive rate must be between 0 and 1")
+    decode = ignore_case or (encoding is not None and encoding.replace("_", "-").lower() not in ("utf-8", "utf8"))
+    if encoding is None:
+        encoding = "utf-8"
+
+    # the number of lines (an upper bound on the number of entries) determines the size of the filter
+    capacity = 0
+    with open(input_path, "rb") as f:
+        for lines in _iter_lines(f, BLOCKLIST_READ_SIZE):
+            capacity += len(lines)
+    bits, hashes = BloomFilter.size_for(capacity, false_positive_rate)
+    size = _header.size + (bits + 7) // 8
+
+    numpy = _import_numpy()
+    entries = 0
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+    try:
+        os.ftruncate(fd, size)
+        mapped = mmap.mmap(fd, size)
+        try:
+            view = memoryview(mapped)[_header.size :]
+            bloom = BloomFilter(view, bits, hashes)
+            with open(input_path, "rb") as f:
+                for lines in _iter_lines(f, BLOCKLIST_READ_SIZE):
+                    if decode:
+                        lines = [
+                            line.decode(encoding, "surrogateescape") for line in lines
+                        ]
+                        lines = [
+                            (line.lower() if ignore_case else line).encode("utf-8", "surrogateescape")
+                            for line in lines
+                        ]
+                    digests = b"".join(
+                        _entry_digest(line.rstrip(b"\r")) for line in lines if line.rstrip(b"\r")
+                    )
+                    bloom.add_many(digests, numpy)
+                    entries += len(digests) // 16
+            view.release()
+            _header.pack_into(
+                mapped, 0, BLOCKLIST_MAGIC, entries, bits, hashes, _FLAG_IGNORE_CASE if ignore_case else 0
+            )
+            mapped.flush()
+        finally:
+            mapped.close()
+        os.close(fd)
+        fd = None
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        os.unlink(tmp_path)
+        raise
+
+    return {
+        "time": time.time() - start_time,
+        "entries": entries,
+        "output_path": output_path,
+        "size": size,
+    }
+
+
+class Blocklist(object):
+    """A compiled list of banned or breached passwords (see compile_blocklist()), memory-mapped so that opening it
+    costs next to nothing, however large it is. Checking a password costs one hash and a few memory reads.
+
+    Since a blocklist is a Bloom filter, it never misses a password that is in the list, but reports a small
+    fraction of other passwords (see false_positive_rate) as being in it too.
+    """
+
+    def __init__(self, path):
+        """Opens the given blocklist file.
+
+        Args:
+            path: The path to a blocklist compiled by compile_blocklist().
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _header.size:
+            self._map.close()
+            raise ValueError("Not a valid blocklist: %s" % path)
+        magic, self.entries, bits, hashes, flags = _header.unpack_from(self._map, 0)
+        if magic[:6] == BLOCKLIST_MAGIC[:6] and magic < BLOCKLIST_MAGIC:
+            self._map.close()
+            raise ValueError("Blocklist compiled by an older version of passwdgen (compile it again): %s" % path)
+        if magic != BLOCKLIST_MAGIC or len(self._map) != _header.size + (bits + 7) // 8:
+            self._map.close()
+            raise ValueError("Not a valid blocklist: %s" % path)
+        self.ignore_case = bool(flags & _FLAG_IGNORE_CASE)
+        self._view = memoryview(self._map)[_header.size :]
+        self.filter = BloomFilter(self._view, bits, hashes)
+        self._numpy = _import_numpy()
+
+    @property
+    def false_positive_rate(self):
+        """The rate at which passwords that aren't in the list are reported as being in it."""
+        bloom = self.filter
+        return (1.0 - math.exp(-bloom.hashes * self.entries / bloom.bits)) ** bloom.hashes
+
+    def __len__(self):
+        return self.entries
+
+    def _digest(self, password):
+        if self.ignore_case:
+            password = password.lower()
+        return _entry_digest(password.encode("utf-8", "surrogateescape"))
+
+    def __contains__(self, password):
+        return self._digest(password) in self.filter
+
+    def contains_many(self, passwords):
+        """Checks whether each of the given passwords is in the blocklist. Checking many passwords at once is
+        faster than checking them one at a time if NumPy is installed.
+
+        Args:
+            passwords: A list of passwords.
+
+        Returns:
+            A list of booleans, one per password.
+        """
+        if self.ignore_case:
+            passwords = [password.lower() for password in passwords]
+        # hashing each password is most of the cost of checking a batch, so it's kept to a single comprehension
+        blake2b = hashlib.blake2b
+        digests = b"".join(
+            [blake2b(password.encode("utf-8", "surrogateescape"), digest_size=16).digest() for password in passwords]
+        )
+        return self.filter.contains_many(digests, self._numpy)
+
+    def draw(self, generate, max_attempts=None):
+        """Generates a password that isn't in the blocklist.
+
+        Args:
+            generate: A function that generates a (random) password.
+            max_attempts: The maximum number of passwords to generate before giving up (default:
+                constants.BLOCKLIST_MAX_ATTEMPTS).
+
+        Returns:
+            The generated password.
+        """
+        if max_attempts is None:
+            max_attempts = BLOCKLIST_MAX_ATTEMPTS
+        for _ in range(max_attempts):
+            password = generate()
+            if password not in self:
+                return password
+        raise ValueError(
+            "Could not generate a password that isn't in the blocklist in %d attempts" % max_attempts
+        )
+
+    def screen(self, passwords, generate, max_attempts=None):
+        """Replaces any of the given passwords that are in the blocklist with newly generated ones. See draw().
+
+        Args:
+            passwords: An iterable of passwords.
+            generate: A function that generates a replacement (random) password.
+            max_attempts: The maximum number of replacements to generate for each password before giving up.
+
+        Yields:
+            The passwords that aren't in the blocklist, and the replacements of those that are.
+        """
+        passwords = iter(passwords)
+        while True:
+            batch = list(islice(passwords, BLOCKLIST_SCREEN_BATCH_SIZE))
+            if not batch:
+                break
+            for i, blocked in enumerate(self.contains_many(batch)):
+                if blocked:
+                    batch[i] = self.draw(generate, max_attempts)
+            yield from batch
+
+    def close(self):
+        if self._map is not None:
+            self._view.release()
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return "Blocklist(%r)" % self.path
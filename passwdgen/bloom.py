@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+
+__all__ = ["BloomFilter"]
+
+
+class BloomFilter(object):
+    """A Bloom filter over a writable buffer (e.g. a bytearray, or a slice of a memory-mapped file), for items that
+    are already uniformly distributed hashes (e.g. keyed BLAKE2 digests) of at least 16 bytes. The bit positions of
+    each item are derived from its hash by double hashing, so no further hashing is needed: the first position comes
+    from bytes 8 to 16 (so that it is independent of the first 8 bytes, which the caller may use, e.g. as a hash
+    table index), and the step between positions from bytes 0 to 8. Both are 64-bit, so every bit of even a very
+    large filter (more than 2 ** 32 bits) can be reached.
+
+    A Bloom filter answers "definitely not present" or "possibly present": it never reports a false negative, and
+    reports false positives at a rate that depends on how full it is (see size_for()).
+    """
+
+    def __init__(self, buffer, bits, hashes):
+        """Constructor.
+
+        Args:
+            buffer: A writable buffer of at least ceil(bits / 8) bytes holding the filter's bits (initially zero).
+            bits: The number of bits in the filter.
+            hashes: The number of bits set for each item.
+        """
+        if bits < 1 or hashes < 1:
+            raise ValueError("A Bloom filter needs at least one bit and one hash")
+        self.buffer = buffer
+        self.bits = bits
+        self.hashes = hashes
+
+    @staticmethod
+    def size_for(capacity, false_positive_rate):
+        """Works out the optimal number of bits and hashes for a Bloom filter holding the given number of items
+        with the given false positive rate.
+
+        Returns:
+            A (bits, hashes) tuple.
+        """
+        bits = int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        hashes = max(1, int(round(bits / max(1, capacity) * math.log(2))))
+        return max(8, bits), hashes
+
+    def _positions(self, digest):
+        # an odd step visits every position when the number of bits is a power of two
+        h1 = int.from_bytes(digest[8:16], "little")
+        h2 = int.from_bytes(digest[0:8], "little") | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def _positions_many(self, digests, numpy):
+        """Yields the positions of many hashes at once, as one array of positions (one per hash) for each of the
+        filter's hashes. The positions are the same as those of _positions(), but worked out incrementally
+        (modulo the number of bits), so that they don't overflow 64 bits."""
+        words = numpy.frombuffer(digests, dtype="<u8").reshape(-1, 2)
+        bits = numpy.uint64(self.bits)
+        positions = words[:, 1] % bits
+        step = (words[:, 0] | numpy.uint64(1)) % bits
+        for i in range(self.hashes):
+            if i > 0:
+                positions = (positions + step) % bits
+            yield positions
+
+    def add(self, digest):
+        """Adds the given hash to the filter."""
+        buffer = self.buffer
+        for position in self._positions(digest):
+            buffer[position >> 3] |= 1 << (position & 7)
+
+    def add_many(self, digests, numpy=None):
+        """Adds many hashes to the filter at once.
+
+        Args:
+            digests: A bytes-like object containing the hashes, 16 bytes each.
+            numpy: The numpy module, if it is to be used to set the bits of all of the hashes at once.
+        """
+        if numpy is None:
+            for i in range(0, len(digests), 16):
+                self.add(digests[i : i + 16])
+            return
+        buffer = numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        for positions in self._positions_many(digests, numpy):
+            numpy.bitwise_or.at(
+                buffer, positions >> numpy.uint64(3), (1 << (positions & numpy.uint64(7))).astype(numpy.uint8)
+            )
+
+    def contains_many(self, digests, numpy=None):
+        """Checks whether each of many hashes is (possibly) in the filter at once.
+
+        Args:
+            digests: A bytes-like object containing the hashes, 16 bytes each.
+            numpy: The numpy module, if it is to be used to check all of the hashes at once.
+
+        Returns:
+            A list of booleans, one per hash.
+        """
+        if numpy is None:
+            return [digests[i : i + 16] in self for i in range(0, len(digests), 16)]
+        buffer = numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        found = numpy.ones(len(digests) // 16, dtype=bool)
+        for positions in self._positions_many(digests, numpy):
+            found &= ((buffer[positions >> numpy.uint64(3)] >> (positions & numpy.uint64(7))) & 1).astype(bool)
+        return found.tolist()
+
+    def __contains__(self, digest):
+        # most absent items are ruled out by their first position or two, so positions are worked out one at a time
+        h1 = int.from_bytes(digest[8:16], "little")
+        h2 = int.from_bytes(digest[0:8], "little") | 1
+        buffer, bits = self.buffer, self.bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not buffer[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -1,18 +1,19 @@
 # -*- coding: utf-8 -*-
 
 import sys
-from getpass import getpass
 import argparse
-import pyperclip
 
-from .generator import *
-from .utils import *
+# everything else is imported by the commands that need it, so that each command only pays for the modules it
+# actually uses at startup
 from .constants import *
 from . import __version__
 
 
-def show_password_entropy(passwd, word_list):
-    """Displays the password entropy calculation results."""
+def show_password_entropy(passwd, word_list, exact_entropy=None):
+    """Displays the password entropy calculation results. The exact entropy of a password constrained by a policy
+    or by its starting letters (see PasswordPolicy and passphrase_entropy()) is shown alongside, if given."""
+    from .utils import calculate_entropy
+
     entropy = calculate_entropy(passwd, dict_set=word_list)
     print("\nPassword length: %d characters" % len(passwd))
     print("\nEntropy")
@@ -27,31 +28,214 @@ def show_password_entropy(passwd, word_list):
                 else "not in character set"
             )
         )
+    if exact_entropy is not None:
+        print(
+            ("{:<%d}" % LONGEST_CHARSET_NAME_LEN).format("Exact")
+            + " : %.6f (given the constraints on the password)" % exact_entropy
+        )
     print("")
 
 
-def main():
-    """Main routine for handling command line functionality for passwdgen."""
+def show_password_strength(passwd, word_list):
+    """Displays the pattern-aware strength estimate of a password (see estimate_strength()), pattern by pattern."""
+    from .strength import estimate_strength
 
-    parser = argparse.ArgumentParser(
-        description="A password generation utility (v%s)." % __version__
-    )
-    subparsers = parser.add_subparsers(help="The command to execute.", dest="command")
+    estimate = estimate_strength(passwd, dict_set=word_list)
+    print("Patterns")
+    print("--------")
+    width = max([len(match["token"]) for match in estimate["sequence"]] + [len("Total")])
+    for match in estimate["sequence"]:
+        detail = match["pattern"]
+        if "word" in match:
+            detail += " (%s)" % match["word"]
+        print(("{:<%d}" % width).format(match["token"]) + " : %s, %.6f" % (detail, match["entropy"]))
+    print(("{:<%d}" % width).format("Total") + " : %.6f" % estimate["entropy"])
+    print("")
 
-    parser_info = subparsers.add_parser(
-        "info",
-        help=(
-            "Compute information about a password. If passwdgen has input piped into it via stdin, that "
-            + "will be interpreted as the password."
-        ),
-    )
-    parser_info.add_argument(
+
+def show_blocklist_match(passwd, blocklist):
+    """Displays whether or not the given password is in the given blocklist."""
+    if passwd in blocklist:
+        print(
+            "Blocklisted: yes (or, with a probability of %.2g, a false positive)" % blocklist.false_positive_rate
+        )
+    else:
+        print("Blocklisted: no")
+    print("")
+
+
+def parse_starting_letters(value):
+    """Parses the value of the --starting-letters option: either a string of starting letters (one per word), or a
+    comma-separated list of prefixes (one per word)."""
+    if "," not in value:
+        return value
+    return value.split(",")
+
+
+def parse_plan_sources(value):
+    """Parses the value of the --sources option: a comma-separated list of source or source=minimum entries.
+
+    Returns:
+        A (sources, minimums) tuple.
+    """
+    sources, minimums = [], dict()
+    for entry in value.split(","):
+        source, _, minimum = entry.strip().partition("=")
+        if not source:
+            continue
+        sources.append(source)
+        if minimum:
+            try:
+                minimums[source] = int(minimum)
+            except ValueError:
+                raise ValueError("Invalid password component source: %s" % entry)
+    return sources, minimums
+
+
+def write_passwords(passwords, output_format, out, entropy_of=None):
+    """Writes the given passwords to the given output stream, in batches, in the specified format.
+
+    Args:
+        passwords: An iterable of passwords (typically a lazy batch generator).
+        output_format: One of constants.OUTPUT_FORMATS.
+        out: The text stream to which to write the passwords.
+        entropy_of: An optional function that returns the entropy of a given password (or None if it cannot be
+            computed). If supplied, password length and entropy columns are included in the output.
+    """
+    from itertools import islice
+    import csv
+    import json
+
+    passwords = iter(passwords)
+    csv_writer = None
+    if output_format == OUTPUT_FORMAT_CSV:
+        csv_writer = csv.writer(out, lineterminator="\n")
+        csv_writer.writerow(
+            ["password", "length", "entropy"] if entropy_of else ["password"]
+        )
+
+    while True:
+        batch = list(islice(passwords, DEFAULT_OUTPUT_BATCH_SIZE))
+        if not batch:
+            break
+
+        if entropy_of is None:
+            if output_format == OUTPUT_FORMAT_PLAIN:
+                out.write("\n".join(batch) + "\n")
+            elif output_format == OUTPUT_FORMAT_JSONL:
+                out.write(
+                    "".join(json.dumps({"password": pw}) + "\n" for pw in batch)
+                )
+            else:
+                csv_writer.writerows([pw] for pw in batch)
+            continue
+
+        records = [(pw, len(pw), entropy_of(pw)) for pw in batch]
+        if output_format == OUTPUT_FORMAT_PLAIN:
+            out.write(
+                "".join(
+                    "%s\t%d\t%s\n"
+                    % (pw, length, "-" if entropy is None else "%.6f" % entropy)
+                    for pw, length, entropy in records
+                )
+            )
+        elif output_format == OUTPUT_FORMAT_JSONL:
+            out.write(
+                "".join(
+                    json.dumps({"password": pw, "length": length, "entropy": entropy})
+                    + "\n"
+                    for pw, length, entropy in records
+                )
+            )
+        else:
+            csv_writer.writerows(
+                (pw, length, "" if entropy is None else "%.6f" % entropy)
+                for pw, length, entropy in records
+            )
+
+
+def read_passwords(stream):
+    """Reads newline-delimited passwords from the given text stream, one at a time, skipping blank lines."""
+    for line in stream:
+        password = line.rstrip("\r\n")
+        if password:
+            yield password
+
+
+def load_dictionary(dictionary, encoding=None):
+    """Loads the word list given by the -d/--dictionary option: either the path to a word list file, or the name
+    (or "+"-joined names) of word lists in the registry (see registry.WordListRegistry).
+
+    Args:
+        dictionary: The path or name(s) of the word list, or None for the built-in word list.
+        encoding: The encoding of the word list.
+
+    Returns:
+        A WordList.
+    """
+    import os
+    from .utils import load_word_list
+
+    if dictionary is None or os.path.exists(dictionary) or os.sep in dictionary:
+        return load_word_list(filename=dictionary, encoding=encoding)
+    from .registry import get_word_list
+
+    return get_word_list(dictionary, encoding=encoding)
+
+
+def show_audit_stats(stats, out):
+    """Displays the aggregate statistics from auditing a batch of passwords."""
+    out.write("\nPasswords audited : %d\n" % stats.count)
+    if stats.count == 0:
+        return
+    out.write("Mean length       : %.2f characters\n" % stats.mean_length)
+    if stats.unclassified:
+        out.write(
+            "Unclassified      : %d (containing characters in none of the character sets)\n"
+            % stats.unclassified
+        )
+    if stats.mean_entropy is not None:
+        out.write(
+            "Entropy           : min %.2f, mean %.2f, max %.2f bits\n"
+            % (stats.min_entropy, stats.mean_entropy, stats.max_entropy)
+        )
+
+    out.write("\nEntropy histogram\n")
+    out.write("-----------------\n")
+    for lower, count in sorted(stats.histogram.items()):
+        out.write(
+            "%4d - %-4d bits : %d (%.2f%%)\n"
+            % (lower, lower + AUDIT_HISTOGRAM_BIN_BITS, count, 100.0 * count / stats.count)
+        )
+
+    out.write("\nWeakest character set\n")
+    out.write("---------------------\n")
+    for charset, charset_name in list(PASSWORD_CHARSET_NAMES):
+        if charset in stats.charsets:
+            count = stats.charsets[charset]
+            out.write(
+                ("{:<%d}" % LONGEST_CHARSET_NAME_LEN).format(charset_name)
+                + " : %d (%.2f%%)\n" % (count, 100.0 * count / stats.count)
+            )
+
+
+def _add_dictionary_arguments(parser):
+    parser.add_argument(
         "-d",
         "--dictionary",
         default=None,
-        help="Path to the dictionary file to use. This must be a plain text file with one word per line.",
+        help=(
+            "Path to the dictionary file to use (a plain text file with one word per line, or a compiled word "
+            + "list), or the name of a word list in the registry (see \"wordlist list\"). Join several names "
+            + "with \"%s\" to use their union (e.g. \"de%sfr\")."
+            % (WORD_LIST_UNION_SEPARATOR, WORD_LIST_UNION_SEPARATOR)
+        ),
     )
-    parser_info.add_argument(
+    _add_encoding_argument(parser)
+
+
+def _add_encoding_argument(parser):
+    parser.add_argument(
         "-e",
         "--encoding",
         default=None,
@@ -61,7 +245,54 @@ def main():
         ),
     )
 
-    parser_generate = subparsers.add_parser("generate", help="Generate password(s).")
+
+def _add_info_arguments(parser_info):
+    _add_dictionary_arguments(parser_info)
+    parser_info.add_argument(
+        "-b",
+        "--batch",
+        action="store_true",
+        help=(
+            "Audit many newline-delimited passwords at once, writing the length, weakest character set and "
+            + "entropy of each of them to stdout, and aggregate statistics to stderr."
+        ),
+    )
+    parser_info.add_argument(
+        "--blocklist",
+        default=None,
+        help="A blocklist of banned or breached passwords (see the blocklist compile command) to check the "
+        + "password against.",
+    )
+    parser_info.add_argument(
+        "-f",
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=OUTPUT_FORMAT_JSONL,
+        help="The output format to use when auditing passwords in batch mode (default=%s)."
+        % OUTPUT_FORMAT_JSONL,
+    )
+    parser_info.add_argument(
+        "-i",
+        "--input",
+        default=None,
+        help="The file from which to read passwords in batch mode (default=stdin).",
+    )
+    parser_info.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes across which to spread the work in batch mode (default=1).",
+    )
+
+
+def _add_generate_arguments(parser_generate):
+    parser_generate.add_argument(
+        "--blocklist",
+        default=None,
+        help="A blocklist of banned or breached passwords (see the blocklist compile command). Passwords in the "
+        + "blocklist are redrawn.",
+    )
     parser_generate.add_argument(
         "-c",
         "--clipboard",
@@ -71,20 +302,30 @@ def main():
             + "writing the password to stdout"
         ),
     )
+    _add_dictionary_arguments(parser_generate)
     parser_generate.add_argument(
-        "-d",
-        "--dictionary",
-        default=None,
-        help="Path to the dictionary file to use. This must be a plain text file with one word per line.",
+        "--entropy",
+        action="store_true",
+        help="Include the length and entropy of each generated password in the output.",
     )
     parser_generate.add_argument(
-        "-e",
-        "--encoding",
+        "--exclude",
         default=None,
-        help=(
-            "The encoding to use when read/writing input/output files. "
-            + "(See https://docs.python.org/2/library/codecs.html#standard-encodings)"
-        ),
+        help="Characters that may not appear in the generated password (implies --policy).",
+    )
+    parser_generate.add_argument(
+        "--exclude-ambiguous",
+        action="store_true",
+        help="Exclude easily confused characters (%s) from the generated password (implies --policy)."
+        % AMBIGUOUS_CHARS,
+    )
+    parser_generate.add_argument(
+        "-f",
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=OUTPUT_FORMAT_PLAIN,
+        help="The output format to use when writing passwords to stdout (default=%s)."
+        % OUTPUT_FORMAT_PLAIN,
     )
     parser_generate.add_argument(
         "-i",
@@ -92,6 +333,13 @@ def main():
         action="store_true",
         help="Additionally display information about the generated password, including password entropy.",
     )
+    parser_generate.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes across which to split the generation of many passwords (default=1).",
+    )
     parser_generate.add_argument(
         "-l",
         "--length",
@@ -103,6 +351,13 @@ def main():
         )
         % (DEFAULT_CHAR_PASSWORD_LENGTH, DEFAULT_WORD_PASSWORD_WORDS),
     )
+    parser_generate.add_argument(
+        "--ledger",
+        default=None,
+        help="The directory of a ledger of issued passwords (created if necessary). Passwords that the ledger "
+        + "has already issued are redrawn, and the generated passwords are recorded in it, so that no password is "
+        + "ever issued twice.",
+    )
     parser_generate.add_argument(
         "-m",
         "--min-entropy",
@@ -110,6 +365,29 @@ def main():
         type=int,
         help="The minimum entropy of the required password (optional). If length is specified, this will be ignored.",
     )
+    parser_generate.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=1,
+        help="The number of passwords to generate (default=1). Passwords are streamed to stdout.",
+    )
+    parser_generate.add_argument(
+        "--plan",
+        choices=PLAN_OBJECTIVES,
+        default=None,
+        help="Generate passwords that mix words and characters from several sources (see --sources) to meet "
+        + "--min-entropy, choosing the mix that gives the shortest password, the fewest words or the fewest "
+        + "components to remember. The --charset option is ignored.",
+    )
+    parser_generate.add_argument(
+        "--policy",
+        default=None,
+        help="Generate a character-based password that meets the given limits on each character class (%s), as "
+        % ", ".join(CHARACTER_CLASS_IDS)
+        + 'a comma-separated list of class=min or class=min-max entries (e.g. "digits=2,special=1-3"). '
+        + "The --charset option is ignored.",
+    )
     parser_generate.add_argument(
         "-s",
         "--separator",
@@ -120,10 +398,27 @@ def main():
         )
         % SEP_DASH,
     )
+    parser_generate.add_argument(
+        "--sources",
+        default=",".join(DEFAULT_PLAN_SOURCES),
+        help="The sources from which --plan may draw, as a comma-separated list of charset IDs, %s (words from "
+        % PC_DICT
+        + "the dictionary), %s (special characters) and %s (random separators), each optionally with a minimum "
+        % (PLAN_SOURCE_SYMBOLS, PLAN_SOURCE_SEPARATORS)
+        + '(e.g. "dict,numeric=2,symbols=1"; default=%s).' % ",".join(DEFAULT_PLAN_SOURCES),
+    )
     parser_generate.add_argument(
         "--starting-letters",
         default=None,
-        help=("The letters to use as initials for the generated words."),
+        type=parse_starting_letters,
+        help="The letters to use as initials for the generated words, or a comma-separated list of prefixes "
+        + '(one per word, e.g. "pa,ss,wo,rd").',
+    )
+    parser_generate.add_argument(
+        "--unordered",
+        action="store_true",
+        help="When generating passwords across several processes (see --jobs), write them out in whichever order "
+        + "they are generated, which is slightly faster.",
     )
     parser_generate.add_argument(
         "-t",
@@ -137,10 +432,8 @@ def main():
         % PC_DICT,
     )
 
-    parser_rng = subparsers.add_parser(
-        "rng",
-        help="Test the quality of the operating system's random number generator.",
-    )
+
+def _add_rng_arguments(parser_rng):
     parser_rng.add_argument(
         "-s",
         "--sample-size",
@@ -148,12 +441,40 @@ def main():
         default=1000000,
         help="Define the sample size to test with (default = 1,000,000).",
     )
+    parser_rng.add_argument(
+        "-b",
+        "--backend",
+        choices=RNG_BACKENDS,
+        default=None,
+        help="How to process the random samples (default = numpy if it is installed, otherwise python).",
+    )
+    parser_rng.add_argument(
+        "--battery",
+        action="store_true",
+        help="Run the full battery of statistical tests (chi-square, monobit, runs, serial correlation and "
+        + "entropy) over a stream of random bytes instead, and print a JSON report.",
+    )
+    parser_rng.add_argument(
+        "--bytes",
+        type=int,
+        default=DEFAULT_RNG_BATTERY_BYTES,
+        help="How many random bytes to test when running the test battery (default = %d)."
+        % DEFAULT_RNG_BATTERY_BYTES,
+    )
+    parser_rng.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="How many processes to split the test battery across (default = 1).",
+    )
 
-    subparsers.add_parser("version", help="Display the version of passwdgen and exit.")
 
-    parser_wordlist = subparsers.add_parser(
-        "wordlist", help="Utilities relating to word list manipulation."
-    )
+def _add_version_arguments(parser_version):
+    pass
+
+
+def _add_wordlist_arguments(parser_wordlist):
     subparsers_wordlist = parser_wordlist.add_subparsers(dest="wordlist_subcommand")
 
     parser_wordlist_clean = subparsers_wordlist.add_parser(
@@ -166,22 +487,370 @@ def main():
     parser_wordlist_clean.add_argument(
         "output_file", help="The output file into which to write the cleaned word list."
     )
+    _add_encoding_argument(parser_wordlist_clean)
     parser_wordlist_clean.add_argument(
-        "-e",
-        "--encoding",
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes across which to spread the cleaning of the word list (default=1).",
+    )
+
+    parser_wordlist_compile = subparsers_wordlist.add_parser(
+        "compile",
+        help=(
+            "Compiles a word list into a binary format that can be memory-mapped, so that it loads without any "
+            + "parsing. Compiled word lists can be used wherever a dictionary file is accepted."
+        ),
+    )
+    parser_wordlist_compile.add_argument(
+        "input_file", help="The input text file, one word per line, to be compiled."
+    )
+    parser_wordlist_compile.add_argument(
+        "output_file",
+        nargs="?",
         default=None,
         help=(
-            "The encoding to use when read/writing input/output files. "
-            + "(See https://docs.python.org/2/library/codecs.html#standard-encodings)"
+            "The output file into which to write the compiled word list. If not specified, the compiled word "
+            + "list is written to passwdgen's cache, from where it is picked up automatically whenever the "
+            + "input file is used as a dictionary."
+        ),
+    )
+    _add_encoding_argument(parser_wordlist_compile)
+
+    subparsers_wordlist.add_parser(
+        "list",
+        help=(
+            "Lists the names of the word lists in the registry (bundled ones, and those in the directories listed "
+            + "in the %s environment variable), which can be used wherever a dictionary file is accepted."
+            % WORD_LIST_PATH_ENV
+        ),
+    )
+
+
+def _add_blocklist_arguments(parser_blocklist):
+    subparsers_blocklist = parser_blocklist.add_subparsers(dest="blocklist_subcommand")
+
+    parser_blocklist_compile = subparsers_blocklist.add_parser(
+        "compile",
+        help=(
+            "Compiles a list of banned or breached passwords, one per line, into a compact blocklist (a Bloom "
+            + "filter) that can be memory-mapped and checked in microseconds, however long the list is."
+        ),
+    )
+    parser_blocklist_compile.add_argument(
+        "input_file", help="The input text file, one password per line, to be compiled."
+    )
+    parser_blocklist_compile.add_argument(
+        "output_file",
+        nargs="?",
+        default=None,
+        help="The output file into which to write the blocklist (default=the input file name followed by %s)."
+        % BLOCKLIST_EXTENSION,
+    )
+    _add_encoding_argument(parser_blocklist_compile)
+    parser_blocklist_compile.add_argument(
+        "--false-positive-rate",
+        type=float,
+        default=DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE,
+        help="The rate at which passwords that aren't in the list are reported as being in it (default=%g)."
+        % DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE,
+    )
+    parser_blocklist_compile.add_argument(
+        "--ignore-case",
+        action="store_true",
+        help="Match passwords against the blocklist regardless of their case.",
+    )
+
+
+def _add_server_socket_arguments(parser):
+    parser.add_argument(
+        "-S",
+        "--socket",
+        default=None,
+        help=(
+            "The path of the server's Unix domain socket (default=$%s, or passwdgen.sock in "
+            + "$XDG_RUNTIME_DIR, or in a private passwdgen-<uid> directory within the temporary directory)."
+        )
+        % SERVER_SOCKET_ENV,
+    )
+    parser.add_argument(
+        "--host",
+        default=None,
+        help="The host of the server's TCP socket, if --port is given (default=127.0.0.1).",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=None,
+        help="Use a TCP socket on the given port instead of a Unix domain socket.",
+    )
+
+
+def _add_serve_arguments(parser_serve):
+    _add_server_socket_arguments(parser_serve)
+    _add_dictionary_arguments(parser_serve)
+
+
+def _add_client_arguments(parser_client):
+    _add_server_socket_arguments(parser_client)
+    parser_client.add_argument(
+        "-l",
+        "--length",
+        type=int,
+        default=None,
+        help="The number of characters or words to generate (see the generate command).",
+    )
+    parser_client.add_argument(
+        "-m",
+        "--min-entropy",
+        default=None,
+        type=int,
+        help="The minimum entropy of the required password (optional). If length is specified, this will be ignored.",
+    )
+    parser_client.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=1,
+        help="The number of passwords to generate (default=1).",
+    )
+    parser_client.add_argument(
+        "-s",
+        "--separator",
+        choices=PASSWORD_SEPARATOR_IDS,
+        default=SEP_DASH,
+        help="The separator to use when generating passwords from dictionaries (default=%s)." % SEP_DASH,
+    )
+    parser_client.add_argument(
+        "--starting-letters",
+        default=None,
+        type=parse_starting_letters,
+        help="The letters to use as initials for the generated words, or a comma-separated list of prefixes "
+        + '(one per word, e.g. "pa,ss,wo,rd").',
+    )
+    parser_client.add_argument(
+        "-t",
+        "--charset",
+        choices=PASSWORD_CHARSET_IDS,
+        default=PC_DICT,
+        help='Which character set/approach to use when generating the password (default="%s").' % PC_DICT,
+    )
+
+
+def _add_bench_arguments(parser_bench):
+    parser_bench.add_argument(
+        "-b",
+        "--baseline",
+        default=None,
+        help=(
+            "A JSON file of previous benchmark results (see --output) to compare against. Exits with a non-zero "
+            + "status if any benchmark has regressed."
+        ),
+    )
+    parser_bench.add_argument(
+        "-k",
+        "--filter",
+        default=None,
+        help='Only run the benchmarks whose names contain this string (e.g. "chars" or "words=1000]").',
+    )
+    parser_bench.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_BENCH_MIN_TIME,
+        help="The minimum duration of each timing run, in seconds (default=%s)." % DEFAULT_BENCH_MIN_TIME,
+    )
+    parser_bench.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="Write the results as JSON to this file, e.g. to be used as a baseline later on.",
+    )
+    parser_bench.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only use the smaller word list fixtures (of up to %d words)." % max(BENCH_QUICK_WORD_LIST_SIZES),
+    )
+    parser_bench.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DEFAULT_BENCH_THRESHOLD,
+        help=(
+            "The fraction by which a benchmark's throughput may fall below the baseline before it counts as a "
+            + "regression (default=%s)."
+        )
+        % DEFAULT_BENCH_THRESHOLD,
+    )
+
+
+# each command's name, help text and the function that adds its arguments to its parser, in the order in which
+# they're listed in the command line help
+_COMMANDS = [
+    (
+        "info",
+        (
+            "Compute information about a password. If passwdgen has input piped into it via stdin, that "
+            + "will be interpreted as the password."
+        ),
+        _add_info_arguments,
+    ),
+    ("generate", "Generate password(s).", _add_generate_arguments),
+    (
+        "rng",
+        "Test the quality of the operating system's random number generator.",
+        _add_rng_arguments,
+    ),
+    ("version", "Display the version of passwdgen and exit.", _add_version_arguments),
+    (
+        "wordlist",
+        "Utilities relating to word list manipulation.",
+        _add_wordlist_arguments,
+    ),
+    (
+        "blocklist",
+        "Utilities relating to blocklists of banned or breached passwords.",
+        _add_blocklist_arguments,
+    ),
+    (
+        "serve",
+        (
+            "Run a long-lived password server, which keeps its word list loaded and answers JSON requests on a "
+            + "Unix domain socket (or a local TCP port). See the client command."
+        ),
+        _add_serve_arguments,
+    ),
+    (
+        "client",
+        "Request passwords from a running password server (see the serve command).",
+        _add_client_arguments,
+    ),
+    (
+        "bench",
+        "Benchmark password generation, entropy calculation, word list handling and random number generation.",
+        _add_bench_arguments,
+    ),
+]
+
+
+def build_parser(argv=None):
+    """Builds the command line argument parser. Every command is listed, but only the arguments of the command
+    selected by the given arguments are added to the parser, since building the whole tree of arguments for
+    every command takes a noticeable amount of time relative to running the quicker commands.
+
+    Args:
+        argv: The command line arguments (excluding the program name) that are to be parsed. If not specified,
+            the arguments of all of the commands are added.
+
+    Returns:
+        An argparse.ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(
+        description="A password generation utility (v%s)." % __version__
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Print a breakdown of where the command spent its time (loading word lists, drawing random numbers, "
+            + "assembling passwords, etc.) to stderr once it completes."
         ),
     )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        metavar="FILE",
+        help="Run the command under cProfile, and write the profile to this file (for use with pstats).",
+    )
+    subparsers = parser.add_subparsers(help="The command to execute.", dest="command")
+
+    # the command is the first positional argument that isn't the value of one of the top-level options
+    command = None
+    if argv is not None:
+        command = ""
+        args = iter(argv)
+        for arg in args:
+            if arg == "--profile-output":
+                next(args, None)
+            elif not arg.startswith("-"):
+                command = arg
+                break
+
+    for name, help_text, add_arguments in _COMMANDS:
+        subparser = subparsers.add_parser(name, help=help_text)
+        if command is None or command == name:
+            add_arguments(subparser)
+    return parser
+
+
+def main(argv=None):
+    """Main routine for handling command line functionality for passwdgen."""
+    if argv is None:
+        argv = sys.argv[1:]
+    args = build_parser(argv).parse_args(argv)
 
-    args = parser.parse_args()
+    if args.profile_output is not None:
+        import cProfile
 
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run_command, args)
+        finally:
+            profiler.dump_stats(args.profile_output)
+    elif args.profile:
+        from .instrument import recording
+
+        with recording() as recorder:
+            try:
+                run_command(args)
+            finally:
+                sys.stdout.flush()
+                recorder.report(sys.stderr)
+    else:
+        run_command(args)
+
+
+def run_command(args):
+    """Runs the command selected by the given parsed command line arguments."""
     if args.command == "version":
         print("passwdgen v%s" % __version__)
 
+    elif args.command == "info" and args.batch:
+        import io
+        from .audit import audit_stream
+
+        if args.blocklist is not None:
+            print("Error: The --blocklist option cannot be used with --batch")
+            return
+        try:
+            word_list = load_dictionary(args.dictionary, encoding=args.encoding)
+        except ValueError as e:
+            print("Error: %s" % e)
+            return
+        if args.input is None or args.input == "-":
+            stream = io.TextIOWrapper(
+                sys.stdin.buffer, encoding=args.encoding, errors="replace"
+            )
+        else:
+            stream = open(args.input, "rt", encoding=args.encoding, errors="replace")
+        try:
+            with stream:
+                stats = audit_stream(
+                    read_passwords(stream),
+                    sys.stdout,
+                    args.format,
+                    dict_set=word_list,
+                    jobs=args.jobs,
+                )
+        except ValueError as e:
+            print("Error: %s" % e)
+            return
+        show_audit_stats(stats, sys.stderr)
+
     elif args.command == "info":
+        from getpass import getpass
+
         if sys.stdin.isatty():
             passwd = getpass("Please enter the password to check: ")
         else:
@@ -191,15 +860,45 @@ def main():
             if passwd.endswith("\n"):
                 passwd = passwd[:-1]
 
-        word_list = load_word_list(filename=args.dictionary, encoding=args.encoding)
+        try:
+            word_list = load_dictionary(args.dictionary, encoding=args.encoding)
+        except ValueError as e:
+            print("Error: %s" % e)
+            return
         show_password_entropy(passwd, word_list)
+        show_password_strength(passwd, word_list)
+        if args.blocklist is not None:
+            from .blocklist import Blocklist
+
+            try:
+                with Blocklist(args.blocklist) as blocklist:
+                    show_blocklist_match(passwd, blocklist)
+            except (OSError, ValueError) as e:
+                print("Error: %s" % e)
+
+    elif args.command == "rng" and args.battery:
+        import json
+        from .utils import rng_test_battery
+
+        try:
+            report = rng_test_battery(args.bytes, jobs=args.jobs, backend=args.backend)
+        except ValueError as e:
+            print("Error: %s" % e)
+            return
+        print(json.dumps(report, indent=2))
 
     elif args.command == "rng":
+        from .utils import secure_random_quality
+
         print(
             "Testing OS RNG. Attempting to generate %d samples between 0 and 100 (inclusive). Please wait..."
             % args.sample_size
         )
-        result = secure_random_quality(args.sample_size)
+        try:
+            result = secure_random_quality(args.sample_size, backend=args.backend)
+        except ValueError as e:
+            print("Error: %s" % e)
+            return
         print("\nStatistics")
         print("----------")
         print(
@@ -213,43 +912,311 @@ def main():
         print("Time taken         : %.3f seconds\n" % result["time"])
 
     elif args.command == "generate":
+        from .generator import _screen_all, chars, passphrase_entropy, words
+        from .parallel import chars_parallel, words_parallel
+        from .utils import calculate_entropy
+
+        ledger = blocklist = None
         try:
-            word_list = load_word_list(filename=args.dictionary, encoding=args.encoding)
+            # the word list is only needed for dictionary-based passwords, or to show their entropy in full
+            use_policy = args.policy is not None or args.exclude or args.exclude_ambiguous
+            word_list = None
+            if ((args.charset == PC_DICT or args.plan is not None) and not use_policy) or args.info:
+                word_list = load_dictionary(args.dictionary, encoding=args.encoding)
+
+            if args.count < 1:
+                raise ValueError("Password count must be at least 1")
+
+            streaming = (
+                args.count > 1 or args.format != OUTPUT_FORMAT_PLAIN or args.entropy
+            )
+            if streaming and (args.clipboard or args.info):
+                raise ValueError(
+                    "The --clipboard and --info options can only be used when generating a single, plain "
+                    + "password (use --entropy instead of --info)"
+                )
+
+            # the entropy of a password constrained by a policy or by its starting letters is lower than that of one
+            # drawn from the whole character set or dictionary
+            exact_entropy = None
+            policy = plan = None
+            if use_policy:
+                from .policy import PasswordPolicy
+
+                policy = PasswordPolicy.from_spec(
+                    args.policy or "",
+                    length=args.length,
+                    exclude=args.exclude,
+                    exclude_ambiguous=args.exclude_ambiguous,
+                    min_entropy=args.min_entropy,
+                )
+                exact_entropy = policy.entropy
+                if args.plan is not None:
+                    raise ValueError("The --plan and --policy options cannot be used together")
+            elif args.plan is not None:
+                from .planner import plan_password
+
+                if args.min_entropy is None:
+                    raise ValueError("The --plan option requires --min-entropy")
+                sources, minimums = parse_plan_sources(args.sources)
+                plan = plan_password(
+                    args.min_entropy,
+                    sources=sources,
+                    objective=args.plan,
+                    word_list=word_list,
+                    separator=PASSWORD_SEPARATORS[args.separator],
+                    minimums=minimums,
+                )
+                exact_entropy = plan.entropy
+            elif args.charset == PC_DICT and args.starting_letters is not None:
+                exact_entropy = passphrase_entropy(
+                    word_list,
+                    word_count=args.length,
+                    min_entropy=args.min_entropy,
+                    starting_letters=args.starting_letters,
+                )
 
+            if policy is not None:
+                passwords = (policy.generate() for _ in range(args.count))
+                redraw = policy.generate
+            elif plan is not None:
+                passwords = plan.generate_batch(args.count, lazy=True)
+                redraw = plan.generate
             # dictionary-based password generation
-            if args.charset == PC_DICT:
+            elif args.charset == PC_DICT:
+
+                def redraw():
+                    return words(
+                        word_list,
+                        PASSWORD_SEPARATORS[args.separator],
+                        word_count=args.length,
+                        min_entropy=args.min_entropy,
+                        starting_letters=args.starting_letters,
+                    )
+
                 # load our dictionary
-                passwd = words(
+                passwords = words_parallel(
+                    args.count,
                     word_list,
                     separator=PASSWORD_SEPARATORS[args.separator],
                     word_count=args.length,
                     min_entropy=args.min_entropy,
                     starting_letters=args.starting_letters,
+                    jobs=args.jobs,
+                    ordered=not args.unordered,
                 )
             else:
-                passwd = chars(
-                    args.charset, length=args.length, min_entropy=args.min_entropy
+
+                def redraw():
+                    return chars(args.charset, length=args.length, min_entropy=args.min_entropy)
+
+                passwords = chars_parallel(
+                    args.count,
+                    args.charset,
+                    length=args.length,
+                    min_entropy=args.min_entropy,
+                    jobs=args.jobs,
+                    ordered=not args.unordered,
                 )
 
+            if args.blocklist is not None:
+                from .blocklist import Blocklist
+
+                try:
+                    blocklist = Blocklist(args.blocklist)
+                except OSError as e:
+                    raise ValueError("Could not open blocklist: %s" % e)
+            if args.ledger is not None:
+                from .ledger import Ledger
+
+                ledger = Ledger(args.ledger)
+            passwords = _screen_all(passwords, redraw, blocklist, ledger)
+
+            if streaming:
+                entropy_of = None
+                if args.entropy:
+
+                    def entropy_of(pw):
+                        if exact_entropy is not None:
+                            return exact_entropy
+                        return calculate_entropy(pw, dict_set=word_list).get(
+                            args.charset
+                        )
+
+                write_passwords(passwords, args.format, sys.stdout, entropy_of=entropy_of)
+                return
+
+            passwd = next(passwords)
             if args.clipboard:
+                import pyperclip
+
                 pyperclip.copy(passwd)
                 print("Password copied to clipboard.")
             else:
                 print(passwd)
 
             if args.info:
-                show_password_entropy(passwd, word_list)
+                show_password_entropy(passwd, word_list, exact_entropy=exact_entropy)
+
+        except ValueError as e:
+            print("Error: %s" % e)
+        finally:
+            for resource in [ledger, blocklist]:
+                if resource is not None:
+                    resource.close()
+
+    elif args.command == "serve":
+        from .server import PasswordServer
+
+        try:
+            word_list = load_dictionary(args.dictionary, encoding=args.encoding)
+            server = PasswordServer(word_list)
+
+            def ready(listener):
+                print(
+                    "Listening on %s (press Ctrl+C to stop)"
+                    % ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+                )
+                sys.stdout.flush()
 
+            server.serve(socket_path=args.socket, host=args.host, port=args.port, ready=ready)
+        except (ValueError, OSError) as e:
+            print("Error: %s" % e)
+
+    elif args.command == "client":
+        from .server import PasswordClient
+
+        request = {
+            "charset": args.charset,
+            "length": args.length,
+            "min_entropy": args.min_entropy,
+            "count": args.count,
+            "separator": args.separator,
+            "starting_letters": args.starting_letters,
+        }
+        try:
+            with PasswordClient(socket_path=args.socket, host=args.host, port=args.port) as client:
+                passwords = client.generate(
+                    **dict((k, v) for k, v in request.items() if v is not None)
+                )
+        except OSError as e:
+            print("Error: Could not connect to the password server (%s)" % e)
+            return
         except ValueError as e:
             print("Error: %s" % e)
+            return
+        sys.stdout.write("".join(pw + "\n" for pw in passwords))
 
     elif args.command == "wordlist":
         if args.wordlist_subcommand == "clean":
+            from .utils import clean_word_list
+
             print("Attempting to clean word list: %s" % args.input_file)
-            result = clean_word_list(
+            try:
+                result = clean_word_list(
+                    args.input_file,
+                    args.output_file,
+                    encoding=args.encoding,
+                    jobs=args.jobs,
+                )
+            except ValueError as e:
+                print("Error: %s" % e)
+                return
+            print(
+                "Cleaned file in %.3f seconds (%.2f MB/s). Read %d words, wrote %d."
+                % (
+                    result["time"],
+                    result["throughput_mb_per_second"] or 0.0,
+                    result["words_read"],
+                    result["words_written"],
+                )
+            )
+
+        elif args.wordlist_subcommand == "compile":
+            from .utils import compile_word_list
+
+            result = compile_word_list(
                 args.input_file, args.output_file, encoding=args.encoding
             )
             print(
-                "Cleaned file in %.3f seconds. Read %d words, wrote %d."
-                % (result["time"], result["words_read"], result["words_written"])
+                "Compiled %d words into %s in %.3f seconds."
+                % (result["words_written"], result["output_path"], result["time"])
+            )
+
+        elif args.wordlist_subcommand == "list":
+            from .registry import WordListRegistry
+
+            registry = WordListRegistry()
+            names = registry.names()
+            longest = max([len(name) for name in names] + [0])
+            for name in names:
+                print(("{:<%d}" % longest).format(name) + " : %s" % registry.path(name))
+
+    elif args.command == "blocklist":
+        if args.blocklist_subcommand == "compile":
+            from .blocklist import compile_blocklist
+
+            try:
+                result = compile_blocklist(
+                    args.input_file,
+                    args.output_file,
+                    false_positive_rate=args.false_positive_rate,
+                    ignore_case=args.ignore_case,
+                    encoding=args.encoding,
+                )
+            except (OSError, ValueError) as e:
+                print("Error: %s" % e)
+                return
+            print(
+                "Compiled %d passwords into %s (%.1f MB) in %.3f seconds."
+                % (
+                    result["entries"],
+                    result["output_path"],
+                    result["size"] / 1e6,
+                    result["time"],
+                )
+            )
+
+    elif args.command == "bench":
+        import json
+        from .bench import compare_results, run_benchmarks
+
+        baseline = None
+        try:
+            if args.baseline is not None:
+                with open(args.baseline, "rt") as f:
+                    baseline = json.load(f)
+
+            def progress(name, result):
+                print("%-72s : %14.1f %s/s" % (name, result["per_second"], result["unit"]))
+                sys.stdout.flush()
+
+            results = run_benchmarks(
+                quick=args.quick, pattern=args.filter, min_time=args.min_time, progress=progress
+            )
+            if args.output is not None:
+                with open(args.output, "wt") as f:
+                    json.dump(results, f, indent=2, sort_keys=True)
+            comparisons = compare_results(results, baseline, args.threshold) if baseline else []
+        except (ValueError, OSError) as e:
+            print("Error: %s" % e)
+            return
+
+        regressions = [comparison for comparison in comparisons if comparison["regression"]]
+        if comparisons:
+            print(
+                "\nCompared %d benchmarks against %s: %d regressed by more than %.0f%%"
+                % (len(comparisons), args.baseline, len(regressions), 100.0 * args.threshold)
+            )
+        for comparison in regressions:
+            print(
+                "%-72s : %14.1f -> %.1f (%+.1f%%)"
+                % (
+                    comparison["name"],
+                    comparison["baseline"],
+                    comparison["per_second"],
+                    100.0 * comparison["change"],
+                )
             )
+        if regressions:
+            sys.exit(1)
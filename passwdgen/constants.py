@@ -33,6 +33,95 @@ __all__ = [
     "DEFAULT_MIN_WORD_LEN",
     "MIN_DICT_SIZE",
     "DEFAULT_WORD_SEPARATOR",
+    "DEFAULT_ENTROPY_POOL_BLOCK_SIZE",
+    "DEFAULT_BATCH_RANDOM_VALUES",
+    "OUTPUT_FORMAT_PLAIN",
+    "OUTPUT_FORMAT_JSONL",
+    "OUTPUT_FORMAT_CSV",
+    "OUTPUT_FORMATS",
+    "DEFAULT_OUTPUT_BATCH_SIZE",
+    "WORD_LIST_CACHE_DIR_ENV",
+    "RNG_BACKEND_NUMPY",
+    "RNG_BACKEND_PYTHON",
+    "RNG_BACKENDS",
+    "DEFAULT_RNG_TEST_CHUNK_SIZE",
+    "DEFAULT_RNG_BATTERY_BYTES",
+    "RNG_BATTERY_SIGNIFICANCE",
+    "DEFAULT_PARALLEL_CHUNK_SIZE",
+    "PARALLEL_CHUNKS_PER_JOB",
+    "DEFAULT_AUDIT_CHUNK_SIZE",
+    "AUDIT_HISTOGRAM_BIN_BITS",
+    "DEFAULT_CLEAN_CHUNK_SIZE",
+    "DEFAULT_CLEAN_RUN_WORDS",
+    "CLEAN_MERGE_FAN_IN",
+    "SERVER_SOCKET_ENV",
+    "SERVER_MAX_PASSWORDS_PER_REQUEST",
+    "SERVER_MAX_REQUEST_SIZE",
+    "SERVER_READ_SIZE",
+    "SERVER_MAX_PASSWORD_LENGTH",
+    "SERVER_MAX_MIN_ENTROPY",
+    "SERVER_MAX_REQUEST_OUTPUT",
+    "SERVER_EXECUTOR_MIN_SIZE",
+    "BENCH_WORD_LIST_SIZES",
+    "BENCH_QUICK_WORD_LIST_SIZES",
+    "DEFAULT_BENCH_MIN_TIME",
+    "BENCH_REPEATS",
+    "DEFAULT_BENCH_THRESHOLD",
+    "LOADED_WORD_LISTS_MAX_BYTES",
+    "LOADED_WORD_LIST_STAT_INTERVAL",
+    "WORD_LIST_MEMO_PREFIX_LENGTH",
+    "CC_LOWER",
+    "CC_UPPER",
+    "CC_DIGITS",
+    "CC_SPECIAL",
+    "CHARACTER_CLASSES",
+    "CHARACTER_CLASS_IDS",
+    "AMBIGUOUS_CHARS",
+    "PLAN_SOURCE_SYMBOLS",
+    "PLAN_SOURCE_SEPARATORS",
+    "DEFAULT_PLAN_SOURCES",
+    "PLAN_OBJECTIVE_LENGTH",
+    "PLAN_OBJECTIVE_WORDS",
+    "PLAN_OBJECTIVE_MEMORABLE",
+    "PLAN_OBJECTIVES",
+    "PLAN_CACHE_SIZE",
+    "DEFAULT_ASYNC_WORKERS",
+    "ASYNC_MAX_PENDING_JOBS",
+    "DEFAULT_ASYNC_BATCH_SIZE",
+    "DEFAULT_ASYNC_PREFETCH",
+    "ASYNC_SLICE_SIZE",
+    "LEDGER_KEY_SIZE",
+    "LEDGER_INITIAL_CAPACITY",
+    "LEDGER_MAX_LOAD",
+    "LEDGER_BLOOM_FALSE_POSITIVE_RATE",
+    "LEDGER_MAX_ATTEMPTS",
+    "BLOCKLIST_EXTENSION",
+    "DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE",
+    "BLOCKLIST_READ_SIZE",
+    "BLOCKLIST_MAX_ATTEMPTS",
+    "BLOCKLIST_SCREEN_BATCH_SIZE",
+    "STRENGTH_PATTERN_DICTIONARY",
+    "STRENGTH_PATTERN_L33T",
+    "STRENGTH_PATTERN_KEYBOARD",
+    "STRENGTH_PATTERN_REPEAT",
+    "STRENGTH_PATTERN_SEQUENCE",
+    "STRENGTH_PATTERN_DATE",
+    "STRENGTH_PATTERN_BRUTEFORCE",
+    "STRENGTH_PATTERNS",
+    "STRENGTH_MIN_MATCH_LENGTH",
+    "STRENGTH_MAX_L33T_VARIANTS",
+    "L33T_SUBSTITUTIONS",
+    "DATE_MIN_YEAR",
+    "DATE_MAX_YEAR",
+    "UNICODE_NORMALIZATION_FORMS",
+    "WORD_LIST_NORMALIZATION",
+    "WORD_LIST_ENCODING",
+    "WORD_LIST_PATH_ENV",
+    "WORD_LIST_DATA_DIR",
+    "WORD_LIST_EXTENSIONS",
+    "WORD_LIST_NAME_SUFFIX",
+    "WORD_LIST_UNION_SEPARATOR",
+    "DEFAULT_WORD_LIST_NAME",
 ]
 
 PC_ALPHA_LOWER = "alpha-lower"
@@ -117,6 +206,12 @@ PASSWORD_CHARSET_NAMES = (
 PASSWORD_CHARSET_IDS = [_id for _id, _ in PASSWORD_CHARSET_NAMES]
 LONGEST_CHARSET_NAME_LEN = max([len(name) for _, name in list(PASSWORD_CHARSET_NAMES)])
 
+OUTPUT_FORMAT_PLAIN = "plain"
+OUTPUT_FORMAT_JSONL = "jsonl"
+OUTPUT_FORMAT_CSV = "csv"
+
+OUTPUT_FORMATS = [OUTPUT_FORMAT_PLAIN, OUTPUT_FORMAT_JSONL, OUTPUT_FORMAT_CSV]
+
 DEFAULT_CHARSET = PC_SPECIAL
 DEFAULT_WORD_LIST = "data/default-word-list.txt"
 DEFAULT_CHAR_PASSWORD_LENGTH = 12
@@ -126,3 +221,265 @@ DEFAULT_MIN_WORD_LEN = 3
 
 # minimum number of words in a dictionary
 MIN_DICT_SIZE = 100
+
+# number of bytes read from the OS at a time to refill the entropy pool
+DEFAULT_ENTROPY_POOL_BLOCK_SIZE = 16384
+
+# maximum number of random values drawn at once when generating passwords in batches
+DEFAULT_BATCH_RANDOM_VALUES = 65536
+
+# number of output records to accumulate before writing them out in one go
+DEFAULT_OUTPUT_BATCH_SIZE = 4096
+
+# environment variable that can be used to override where compiled word lists are cached
+WORD_LIST_CACHE_DIR_ENV = "PASSWDGEN_CACHE_DIR"
+
+# backends available for testing the quality of the OS random number generator
+RNG_BACKEND_NUMPY = "numpy"
+RNG_BACKEND_PYTHON = "python"
+
+RNG_BACKENDS = [RNG_BACKEND_NUMPY, RNG_BACKEND_PYTHON]
+
+# number of random bytes (or, for secure_random_quality(), samples) processed at a time when testing the quality of
+# the OS random number generator
+DEFAULT_RNG_TEST_CHUNK_SIZE = 1 << 20
+
+# number of random bytes to test by default in the RNG test battery
+DEFAULT_RNG_BATTERY_BYTES = 64 << 20
+
+# significance level below which a test in the RNG test battery is considered to have failed
+RNG_BATTERY_SIGNIFICANCE = 0.01
+
+# number of passwords generated by each task when generating passwords across several processes
+DEFAULT_PARALLEL_CHUNK_SIZE = 65536
+
+# maximum number of tasks per process that may be in flight (or finished, but not yet consumed) at once when
+# generating passwords across several processes
+PARALLEL_CHUNKS_PER_JOB = 2
+
+# number of passwords audited at a time (and by each task, when auditing across several processes)
+DEFAULT_AUDIT_CHUNK_SIZE = 16384
+
+# width (in bits of entropy) of each bin of the entropy histogram produced when auditing passwords
+AUDIT_HISTOGRAM_BIN_BITS = 10
+
+# number of characters of a word list read (and cleaned, possibly in another process) at a time when cleaning it
+DEFAULT_CLEAN_CHUNK_SIZE = 1 << 22
+
+# maximum number of cleaned words held in memory when cleaning a word list, before they are sorted and spilled to
+# disk as a sorted run
+DEFAULT_CLEAN_RUN_WORDS = 1 << 20
+
+# maximum number of sorted runs merged at once when cleaning a word list
+CLEAN_MERGE_FAN_IN = 64
+
+# environment variable that can be used to override the path of the Unix domain socket on which the password
+# server listens (and to which the client connects) by default
+SERVER_SOCKET_ENV = "PASSWDGEN_SOCKET"
+
+# maximum number of passwords that may be requested from the password server in a single request
+SERVER_MAX_PASSWORDS_PER_REQUEST = 65536
+
+# maximum size (in bytes) of a single request line sent to the password server
+SERVER_MAX_REQUEST_SIZE = 65536
+
+# number of bytes the password server reads from a connection at a time
+SERVER_READ_SIZE = 65536
+
+# maximum number of characters (or words) in each password generated by the password server
+SERVER_MAX_PASSWORD_LENGTH = 1024
+
+# maximum minimum entropy (in bits) that may be requested of the passwords generated by the password server
+SERVER_MAX_MIN_ENTROPY = 1024
+
+# maximum total number of characters (or words) in all of the passwords requested in a single request
+SERVER_MAX_REQUEST_OUTPUT = 1 << 22
+
+# requests for more than this many characters (or words) in total are answered on a worker thread, so that they
+# don't hold up the password server's other clients
+SERVER_EXECUTOR_MIN_SIZE = 1 << 14
+
+# sizes of the word list fixtures used by the benchmark suite (see passwdgen bench)
+BENCH_WORD_LIST_SIZES = [1000, 10000, 100000, 1000000]
+
+# sizes of the word list fixtures used by the benchmark suite when running in quick mode
+BENCH_QUICK_WORD_LIST_SIZES = [1000, 10000]
+
+# minimum amount of time (in seconds) for which each timing run of a benchmark lasts
+DEFAULT_BENCH_MIN_TIME = 0.1
+
+# number of timing runs of each benchmark, of which the fastest is reported
+BENCH_REPEATS = 3
+
+# fraction by which a benchmark's throughput may fall short of its baseline before it counts as a regression
+DEFAULT_BENCH_THRESHOLD = 0.2
+
+# maximum amount of memory (or mapped file space, in bytes) taken up by the word lists kept in memory by
+# load_word_list(), beyond which the least recently used ones are discarded
+LOADED_WORD_LISTS_MAX_BYTES = 64 << 20
+
+# minimum number of seconds between checks of whether the file from which a word list kept in memory by
+# load_word_list() was loaded has changed
+LOADED_WORD_LIST_STAT_INTERVAL = 1.0
+
+# the longest word prefixes whose ranges of indices are cached by WordList.prefix_range() (only prefixes that some
+# words begin with are cached, so that looking up arbitrary prefixes can't make the cache grow without bound)
+WORD_LIST_MEMO_PREFIX_LENGTH = 2
+
+# character classes from which password policies (see policy.PasswordPolicy) build passwords
+CC_LOWER = "lower"
+CC_UPPER = "upper"
+CC_DIGITS = "digits"
+CC_SPECIAL = "special"
+
+CHARACTER_CLASSES = {
+    CC_LOWER: string.ascii_lowercase,
+    CC_UPPER: string.ascii_uppercase,
+    CC_DIGITS: string.digits,
+    CC_SPECIAL: special_chars,
+}
+
+CHARACTER_CLASS_IDS = [CC_LOWER, CC_UPPER, CC_DIGITS, CC_SPECIAL]
+
+# characters that are easily mistaken for one another, which password policies can exclude
+AMBIGUOUS_CHARS = "0O1Il|'"
+
+# sources of password components available to the entropy planner (see planner.plan_password()), in addition to
+# the charsets in PASSWORD_CHARSETS and the word list (PC_DICT): special characters only, and randomly chosen
+# separators between components
+PLAN_SOURCE_SYMBOLS = "symbols"
+PLAN_SOURCE_SEPARATORS = "separators"
+
+DEFAULT_PLAN_SOURCES = [PC_DICT, PC_NUMERIC, PLAN_SOURCE_SYMBOLS]
+
+# what the entropy planner optimises for: the shortest password, the fewest words, or the fewest components to
+# remember
+PLAN_OBJECTIVE_LENGTH = "length"
+PLAN_OBJECTIVE_WORDS = "words"
+PLAN_OBJECTIVE_MEMORABLE = "memorable"
+
+PLAN_OBJECTIVES = [PLAN_OBJECTIVE_LENGTH, PLAN_OBJECTIVE_WORDS, PLAN_OBJECTIVE_MEMORABLE]
+
+# maximum number of password plans kept by the entropy planner
+PLAN_CACHE_SIZE = 256
+
+# number of threads in the executor to which the async API (see aio) hands word list loading and password generation
+DEFAULT_ASYNC_WORKERS = 2
+
+# maximum number of jobs the async API submits to its executor at once (per event loop), beyond which coroutines
+# wait their turn
+ASYNC_MAX_PENDING_JOBS = 64
+
+# number of passwords generated by each job of the async batch iterator
+DEFAULT_ASYNC_BATCH_SIZE = 256
+
+# number of batches the async batch iterator generates ahead of its consumer
+DEFAULT_ASYNC_PREFETCH = 2
+
+# number of passwords the async batch iterator generates at a time within a batch before briefly releasing the
+# interpreter lock, so that the event loop's thread doesn't have to wait for the lock's switch interval
+ASYNC_SLICE_SIZE = 64
+
+# size (in bytes) of the secret key with which an issued-password ledger hashes passwords
+LEDGER_KEY_SIZE = 32
+
+# number of hash table slots in a new issued-password ledger's index (a power of two)
+LEDGER_INITIAL_CAPACITY = 1 << 16
+
+# fraction of the ledger index's hash table slots in use, beyond which the table is doubled in size
+LEDGER_MAX_LOAD = 0.5
+
+# false positive rate of the Bloom filter in front of the ledger index's hash table, when the table is fully loaded
+LEDGER_BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+# maximum number of passwords drawn when looking for one that the ledger hasn't already issued
+LEDGER_MAX_ATTEMPTS = 1000
+
+# extension appended to the name of a list of banned passwords to name the blocklist compiled from it
+BLOCKLIST_EXTENSION = ".blocklist"
+
+# rate at which a compiled blocklist reports passwords that aren't in it as being in it
+DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE = 1e-4
+
+# number of bytes of the list of banned passwords read at a time when compiling a blocklist
+BLOCKLIST_READ_SIZE = 1 << 20
+
+# maximum number of passwords drawn when looking for one that isn't in a blocklist
+BLOCKLIST_MAX_ATTEMPTS = 1000
+
+# number of generated passwords checked against a blocklist at a time
+BLOCKLIST_SCREEN_BATCH_SIZE = 1024
+
+# the kinds of patterns found in passwords by the pattern-aware strength estimator
+STRENGTH_PATTERN_DICTIONARY = "dictionary"
+STRENGTH_PATTERN_L33T = "l33t"
+STRENGTH_PATTERN_KEYBOARD = "keyboard"
+STRENGTH_PATTERN_REPEAT = "repeat"
+STRENGTH_PATTERN_SEQUENCE = "sequence"
+STRENGTH_PATTERN_DATE = "date"
+STRENGTH_PATTERN_BRUTEFORCE = "bruteforce"
+
+STRENGTH_PATTERNS = [
+    STRENGTH_PATTERN_DICTIONARY,
+    STRENGTH_PATTERN_L33T,
+    STRENGTH_PATTERN_KEYBOARD,
+    STRENGTH_PATTERN_REPEAT,
+    STRENGTH_PATTERN_SEQUENCE,
+    STRENGTH_PATTERN_DATE,
+    STRENGTH_PATTERN_BRUTEFORCE,
+]
+
+# minimum length of the dictionary words, keyboard walks, repeats and sequences found by the strength estimator
+STRENGTH_MIN_MATCH_LENGTH = 3
+
+# maximum number of ways of undoing l33t substitutions tried by the strength estimator for each password
+STRENGTH_MAX_L33T_VARIANTS = 32
+
+# the characters commonly substituted for each letter in l33t speak
+L33T_SUBSTITUTIONS = {
+    "a": "4@",
+    "b": "8",
+    "c": "(<",
+    "e": "3",
+    "g": "69",
+    "i": "1!|",
+    "l": "1|7",
+    "o": "0",
+    "s": "$5",
+    "t": "+7",
+    "x": "%",
+    "z": "2",
+}
+
+# the range of years that the strength estimator considers when looking for dates in passwords
+DATE_MIN_YEAR = 1900
+DATE_MAX_YEAR = 2099
+
+# the Unicode normalization forms that can be applied to word lists as they are loaded
+UNICODE_NORMALIZATION_FORMS = ["NFC", "NFD", "NFKC", "NFKD"]
+
+# the normalization form applied to the words of the word lists in the registry (see registry.WordListRegistry)
+WORD_LIST_NORMALIZATION = "NFC"
+
+# the encoding of the plain text word lists in the registry, unless another one is specified
+WORD_LIST_ENCODING = "utf-8"
+
+# environment variable listing the directories (separated by os.pathsep) searched for named word lists
+WORD_LIST_PATH_ENV = "PASSWDGEN_WORD_LIST_PATH"
+
+# the directory, relative to the passwdgen package path, in which bundled word lists are installed
+WORD_LIST_DATA_DIR = "data"
+
+# the file extensions of named word lists, in order of preference where a directory contains more than one
+# version of the same list (compiled word lists load faster)
+WORD_LIST_EXTENSIONS = [".pwl", ".txt"]
+
+# stripped from the end of word list file names (after the extension) to give their registry names, so that
+# e.g. "de-word-list.txt" is named "de"
+WORD_LIST_NAME_SUFFIX = "-word-list"
+
+# joins the names of several word lists in the registry to refer to their union (e.g. "de+fr")
+WORD_LIST_UNION_SEPARATOR = "+"
+
+# the registry name of the built-in word list
+DEFAULT_WORD_LIST_NAME = "default"
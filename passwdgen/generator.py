@@ -1,15 +1,135 @@
 # -*- coding: utf-8 -*-
 
 import math
+from functools import lru_cache, partial
+from itertools import repeat
 
 from .utils import secure_random, load_word_list
+from .instrument import _sinks, span
+from .rng import get_entropy_pool
+from .wordlist import _require_word_list, as_word_list
 from .constants import *
 
 
-__all__ = ["chars", "words"]
+__all__ = ["chars", "words", "chars_batch", "words_batch", "passphrase_entropy"]
 
+# sorted character arrays for each charset, so that batch generation can index straight into them
+_charset_arrays = dict()
 
-def chars(charset=None, length=None, min_entropy=None):
+
+def _charset_array(charset):
+    if charset not in PASSWORD_CHARSETS:
+        raise ValueError("Unrecognised charset: %s" % charset)
+    if charset not in _charset_arrays:
+        _charset_arrays[charset] = tuple(sorted(PASSWORD_CHARSETS[charset]))
+    return _charset_arrays[charset]
+
+
+def _char_password_length(charset_size, length, min_entropy):
+    if length is None and min_entropy is None:
+        return DEFAULT_CHAR_PASSWORD_LENGTH
+    if length is not None:
+        return length
+    # work backwards from the entropy, rounding up on the number of characters
+    entropy_per_char = math.log(charset_size, 2.0)
+    return int(math.ceil(min_entropy / entropy_per_char))
+
+
+def _password_word_count(word_list_size, word_count, min_entropy, starting_letters):
+    if word_count is None and min_entropy is None:
+        return (
+            DEFAULT_WORD_PASSWORD_WORDS
+            if starting_letters is None
+            else len(starting_letters)
+        )
+    if word_count is not None:
+        return word_count
+    entropy_per_word = math.log(word_list_size, 2.0)
+    return int(math.ceil(min_entropy / entropy_per_word))
+
+
+def _starting_prefixes(starting_letters):
+    """Normalises the given starting letters into a list of lowercase prefixes, one per word. A string supplies
+    one starting letter per word, while any other sequence supplies a (possibly multi-character) prefix per word."""
+    if isinstance(starting_letters, str):
+        return list(starting_letters.lower())
+    prefixes = []
+    for prefix in starting_letters:
+        if not isinstance(prefix, str) or not prefix:
+            raise ValueError("Starting prefixes must be non-empty strings")
+        prefixes.append(prefix.lower())
+    return prefixes
+
+
+def _starting_letter_ranges(word_list, starting_letters):
+    """Looks up the range of indices in the given WordList occupied by the words beginning with each of the given
+    starting prefixes, making sure that all of them are represented."""
+    ranges = [word_list.prefix_range(prefix) for prefix in starting_letters]
+    # check that all of the required prefixes are represented
+    for prefix, (start, end) in zip(starting_letters, ranges):
+        if start == end:
+            raise ValueError(
+                'Dictionary does not contain any words beginning with "%s"' % prefix
+            )
+    return ranges
+
+
+def _check_starting_letters(starting_letters, word_count):
+    if len(starting_letters) < word_count:
+        raise ValueError(
+            (
+                "Please supply at least %d starting letters to meet the minimum word count "
+                + "requirement"
+            )
+            % word_count
+        )
+
+
+def _ranges_entropy(ranges):
+    """Returns the exact entropy (in bits) of a password whose words are drawn uniformly from the given ranges."""
+    return sum(math.log(end - start, 2.0) for start, end in ranges)
+
+
+def _min_entropy_ranges(letter_ranges, min_entropy):
+    """Returns the shortest leading run of the given per-word ranges whose exact entropy meets min_entropy."""
+    entropy = 0.0
+    for i, (start, end) in enumerate(letter_ranges):
+        entropy += math.log(end - start, 2.0)
+        if entropy >= min_entropy:
+            return letter_ranges[: i + 1]
+    raise ValueError(
+        "The given starting letters only allow for %.2f bits of entropy (%.2f required); please supply more "
+        "starting letters" % (entropy, min_entropy)
+    )
+
+
+def _screened(generate, blocklist, ledger):
+    """Generates a password that is neither in the given blocklist nor already issued by the given ledger (either
+    of which may be None), recording it in the ledger."""
+    if blocklist is not None:
+        generate = partial(blocklist.draw, generate)
+    return ledger.issue(generate) if ledger is not None else generate()
+
+
+def _screen_all(passwords, generate, blocklist, ledger):
+    """Replaces any of the given passwords that are in the given blocklist or that have already been issued by the
+    given ledger (either of which may be None) with newly generated ones (see _screened())."""
+    if blocklist is not None:
+        passwords = blocklist.screen(passwords, generate)
+        generate = partial(blocklist.draw, generate)
+    if ledger is not None:
+        passwords = ledger.issue_all(passwords, generate)
+    return passwords
+
+
+def _batch_sizes(count, batch_size):
+    while count > 0:
+        size = min(count, batch_size)
+        yield size
+        count -= size
+
+
+def chars(charset=None, length=None, min_entropy=None, ledger=None, blocklist=None):
     """Generates a character-based password. If the length parameter is supplied, the min_entropy parameter
     is ignored (i.e. either a length or a minimum entropy is required, but not both). If no length or
     min_entropy parameters are supplied, a default password length is chosen (see
@@ -20,10 +140,22 @@ def chars(charset=None, length=None, min_entropy=None):
             the character set with alphanumeric and special characters.
         length: The desired length of the password.
         min_entropy: The desired minimum entropy of the password, based on the given charset.
+        ledger: An optional Ledger of issued passwords. If given, passwords that have already been issued are
+            redrawn, and the generated password is recorded as issued.
+        blocklist: An optional Blocklist of banned passwords. If given, passwords in the blocklist are redrawn.
 
     Returns:
         A string containing the generated password.
     """
+    if ledger is not None or blocklist is not None:
+        return _screened(lambda: chars(charset, length, min_entropy), blocklist, ledger)
+    if _sinks:
+        with span("chars"):
+            return _chars(charset, length, min_entropy)
+    return _chars(charset, length, min_entropy)
+
+
+def _chars(charset, length, min_entropy):
     if charset not in PASSWORD_CHARSETS:
         raise ValueError("Unrecognised charset: %s" % charset)
     else:
@@ -31,23 +163,86 @@ def chars(charset=None, length=None, min_entropy=None):
         charset_size = len(charset_chars)
 
     password = ""
+    length = _char_password_length(charset_size, length, min_entropy)
+    for i in range(length):
+        password += charset_chars[secure_random(charset_size)]
 
-    if length is None and min_entropy is None:
-        length = DEFAULT_CHAR_PASSWORD_LENGTH
+    return password
 
-    if length is not None:
-        for i in range(length):
-            password += charset_chars[secure_random(charset_size)]
 
-    else:
-        # work backwards from the entropy
-        entropy_per_char = math.log(charset_size, 2.0)
-        # round up on the number of characters
-        min_chars = int(math.ceil(min_entropy / entropy_per_char))
-        for i in range(min_chars):
-            password += charset_chars[secure_random(charset_size)]
+def chars_batch(count, charset=None, length=None, min_entropy=None, lazy=False, ledger=None, blocklist=None):
+    """Generates many character-based passwords at once. Parameters are validated once, and the randomness for
+    many passwords at a time is drawn from the entropy pool in a single bulk read. See chars() for details on
+    the charset, length and min_entropy parameters.
+
+    Args:
+        count: The number of passwords to generate.
+        charset: The character set to use from which to source characters.
+        length: The desired length of each password.
+        min_entropy: The desired minimum entropy of each password, based on the given charset.
+        lazy: If True, returns a generator that produces the passwords on demand (in constant memory) instead of
+            a list.
+        ledger: An optional Ledger of issued passwords (see chars()).
+        blocklist: An optional Blocklist of banned passwords (see chars()).
+
+    Returns:
+        A list (or, if lazy is True, a generator) of count password strings.
+    """
+    charset_chars = _charset_array(charset)
+    length = _char_password_length(len(charset_chars), length, min_entropy)
+    passwords = _iter_chars(charset_chars, length, count)
+    if ledger is not None or blocklist is not None:
+        passwords = _screen_all(
+            passwords, lambda: next(_iter_chars(charset_chars, length, 1)), blocklist, ledger
+        )
+    return passwords if lazy else list(passwords)
+
+
+def _iter_chars(charset_chars, length, count):
+    if length == 0:
+        return repeat("", count)
+    if len(charset_chars) <= 256 and all(ord(c) < 128 for c in charset_chars):
+        return _iter_ascii_chars(charset_chars, length, count)
+    return _iter_indexed_chars(charset_chars, length, count)
+
+
+@lru_cache(maxsize=None)
+def _ascii_charset_table(charset_chars):
+    """Returns a bytes.translate() table mapping each index into the given ASCII charset to its character."""
+    charset_size = len(charset_chars)
+    return bytes(ord(charset_chars[b % charset_size]) for b in range(256))
 
-    return password
+
+def _iter_ascii_chars(charset_chars, length, count):
+    """Generates passwords from an ASCII charset of at most 256 characters by drawing random indices into the
+    charset as bytes, and translating those into characters in one go."""
+    pool = get_entropy_pool()
+    charset_size = len(charset_chars)
+    table = _ascii_charset_table(charset_chars)
+    batch_size = max(1, DEFAULT_BATCH_RANDOM_VALUES // length)
+
+    for size in _batch_sizes(count, batch_size):
+        needed = size * length
+        with span("chars_batch.draw", pool):
+            batch_chars = (
+                pool.randbelow_bytes(charset_size, needed).translate(table).decode("ascii")
+            )
+        for offset in range(0, needed, length):
+            yield batch_chars[offset : offset + length]
+
+
+def _iter_indexed_chars(charset_chars, length, count):
+    pool = get_entropy_pool()
+    lookup = charset_chars.__getitem__
+    batch_size = max(1, DEFAULT_BATCH_RANDOM_VALUES // length)
+
+    for size in _batch_sizes(count, batch_size):
+        # build all of the passwords in this batch as one long string, and then slice it up
+        with span("chars_batch.draw", pool):
+            indices = pool.randbelow_many(len(charset_chars), size * length)
+            batch_chars = "".join(map(lookup, indices))
+        for offset in range(0, size * length, length):
+            yield batch_chars[offset : offset + length]
 
 
 def select_random_words(word_list, count, starting_letters=None):
@@ -55,12 +250,11 @@ def select_random_words(word_list, count, starting_letters=None):
         total_words = len(word_list)
         return [word_list[secure_random(total_words)] for _ in range(count)]
     else:
-        # assume word_list is a dictionary
-        result = []
-        for i in range(count):
-            ch = starting_letters[i]
-            result.append(word_list[ch][secure_random(len(word_list[ch]))])
-        return result
+        # assume word_list is a WordList, and pick each word from the range of words beginning with its prefix
+        ranges = _starting_letter_ranges(
+            word_list, _starting_prefixes(starting_letters)[:count]
+        )
+        return [word_list[secure_random(start, end)] for start, end in ranges]
 
 
 def words(
@@ -69,6 +263,8 @@ def words(
     word_count=None,
     min_entropy=None,
     starting_letters=None,
+    ledger=None,
+    blocklist=None,
 ):
     """Generates a word-based password from the given dictionary. If the word_count parameter is supplied,
     the min_entropy parameter is ignored (i.e. either a word count or minimum entropy is required, but not
@@ -76,95 +272,163 @@ def words(
     constants.DEFAULT_WORD_PASSWORD_WORDS).
 
     Args:
-        dict_set: The word list/dictionary from which to generate a password. Defaults to the built-in word list.
+        dict_set: The WordList (see load_word_list() and as_word_list()) from which to generate a password.
+            Defaults to the built-in word list. Other collections of words are rejected with a TypeError, since
+            they would have to be converted into a WordList on every call.
         separator: The separator to use between words.
         word_count: The number of words to use to build the password.
-        min_entropy: The desired minimum entropy of the password, based on the given dictionary.
-        starting_letters: A string containing the desired starting letters of the generated words. If word_count or
-            min_entropy are specified, the number of letters in this string must exactly match the intended number
-            of words that will be generated.
+        min_entropy: The desired minimum entropy of the password, based on the given dictionary. If
+            starting_letters are given, this is the exact entropy of the constrained password (see
+            passphrase_entropy()), and only as many of the starting letters as are needed to meet it are used.
+        starting_letters: A string containing the desired starting letters of the generated words, or a list of
+            (possibly multi-character) prefixes, one per word. If word_count is specified, there must be at least
+            that many starting letters or prefixes.
+        ledger: An optional Ledger of issued passwords. If given, passwords that have already been issued are
+            redrawn, and the generated password is recorded as issued.
+        blocklist: An optional Blocklist of banned passwords. If given, passwords in the blocklist are redrawn.
 
     Returns:
         A string containing the generated password.
     """
+    if ledger is not None or blocklist is not None:
+        if dict_set is None:
+            dict_set = load_word_list()
+        word_list = _require_word_list(dict_set, "words")
+        return _screened(
+            lambda: words(word_list, separator, word_count, min_entropy, starting_letters),
+            blocklist,
+            ledger,
+        )
+    if _sinks:
+        with span("words"):
+            return _words(dict_set, separator, word_count, min_entropy, starting_letters)
+    return _words(dict_set, separator, word_count, min_entropy, starting_letters)
+
+
+def _words(dict_set, separator, word_count, min_entropy, starting_letters):
     if dict_set is None:
         dict_set = load_word_list()
+    word_list = _require_word_list(dict_set, "words")
 
-    word_list = list(dict_set)
-    word_list_size = len(word_list)
-
-    # words categorised by alphabetical character
-    categorised_words = dict()
-    if starting_letters is not None:
-        # make sure it's lowercase
-        starting_letters = starting_letters.lower()
-        for word in dict_set:
-            ch = word[0]
-            if ch in categorised_words:
-                categorised_words[ch].append(word)
-            else:
-                categorised_words[ch] = [word]
-
-        # check that all of the required starting letters are represented
-        for ch in starting_letters:
-            if not (ch in categorised_words):
-                raise ValueError(
-                    'Dictionary does not contain any words beginning with "%s"' % ch
-                )
-
-    password_words = []
+    if separator is None:
+        separator = DEFAULT_WORD_SEPARATOR
 
-    if word_count is None and min_entropy is None:
-        word_count = (
-            DEFAULT_WORD_PASSWORD_WORDS
-            if starting_letters is None
-            else len(starting_letters)
-        )
+    ranges = _word_ranges(word_list, word_count, min_entropy, starting_letters)
+    return separator.join(
+        [word_list[secure_random(start, end)] for start, end in ranges]
+    )
+
+
+def passphrase_entropy(dict_set=None, word_count=None, min_entropy=None, starting_letters=None):
+    """Calculates the exact entropy of the word-based passwords that words() would generate with the given
+    parameters. Unlike calculate_entropy(), which assumes that every word is drawn from the whole dictionary, this
+    accounts for the smaller number of candidate words available for each word position when starting_letters are
+    given. See words() for details on the parameters.
+
+    Args:
+        dict_set: The word list/dictionary from which the password is generated. Defaults to the built-in word list.
+        word_count: The number of words in the password.
+        min_entropy: The desired minimum entropy of the password.
+        starting_letters: The starting letters (or prefixes) of the words in the password.
+
+    Returns:
+        The entropy of the password, in bits.
+    """
+    if dict_set is None:
+        dict_set = load_word_list()
+    word_list = as_word_list(dict_set)
+    return _ranges_entropy(
+        _word_ranges(word_list, word_count, min_entropy, starting_letters)
+    )
+
+
+def words_batch(
+    count,
+    dict_set=None,
+    separator=None,
+    word_count=None,
+    min_entropy=None,
+    starting_letters=None,
+    lazy=False,
+    ledger=None,
+    blocklist=None,
+):
+    """Generates many word-based passwords at once. Parameters are validated once, and the randomness for many
+    passwords at a time is drawn from the entropy pool in a single bulk read. See words() for details on the
+    other parameters.
+
+    Args:
+        count: The number of passwords to generate.
+        dict_set: The word list/dictionary from which to generate passwords. Defaults to the built-in word list.
+            Unlike words(), this accepts any collection of words, since it is only converted into a WordList once
+            per batch.
+        separator: The separator to use between words.
+        word_count: The number of words to use to build each password.
+        min_entropy: The desired minimum entropy of each password, based on the given dictionary.
+        starting_letters: The desired starting letters (or prefixes) of the generated words.
+        lazy: If True, returns a generator that produces the passwords on demand (in constant memory) instead of
+            a list.
+        ledger: An optional Ledger of issued passwords (see words()).
+        blocklist: An optional Blocklist of banned passwords (see words()).
+
+    Returns:
+        A list (or, if lazy is True, a generator) of count password strings.
+    """
+    if dict_set is None:
+        dict_set = load_word_list()
+    word_list = as_word_list(dict_set)
 
     if separator is None:
         separator = DEFAULT_WORD_SEPARATOR
 
-    if word_count is not None:
-        if starting_letters is None:
-            password_words.extend(select_random_words(word_list, word_count))
-
-        else:
-            if len(starting_letters) < word_count:
-                raise ValueError(
-                    (
-                        "Please supply at least %d starting letters to meet the minimum word count "
-                        + "requirement"
-                    )
-                    % word_count
-                )
-
-            password_words.extend(
-                select_random_words(
-                    categorised_words, word_count, starting_letters=starting_letters
-                )
-            )
+    ranges = _word_ranges(word_list, word_count, min_entropy, starting_letters)
+    passwords = _iter_words(word_list, separator, ranges, count)
+    if ledger is not None or blocklist is not None:
+        passwords = _screen_all(
+            passwords, lambda: next(_iter_words(word_list, separator, ranges, 1)), blocklist, ledger
+        )
+    return passwords if lazy else list(passwords)
 
-    else:
-        entropy_per_word = math.log(word_list_size, 2.0)
-        min_words = int(math.ceil(min_entropy / entropy_per_word))
-
-        if starting_letters is None:
-            password_words.extend(select_random_words(word_list, min_words))
-
-        else:
-            if len(starting_letters) < min_words:
-                raise ValueError(
-                    (
-                        "Please supply at least %d starting letters to meet the minimum word count "
-                        + "requirement"
-                    )
-                    % min_words
-                )
-
-            password_words.extend(
-                select_random_words(
-                    categorised_words, min_words, starting_letters=starting_letters
-                )
-            )
 
-    return separator.join(password_words)
+def _word_ranges(word_list, word_count, min_entropy, starting_letters):
+    """Validates the parameters of a batch of word-based passwords, and works out the range of indices in the
+    given WordList from which each word of each password is to be drawn."""
+    if starting_letters is None:
+        word_count = _password_word_count(len(word_list), word_count, min_entropy, None)
+        return [(0, len(word_list))] * word_count
+
+    starting_letters = _starting_prefixes(starting_letters)
+    letter_ranges = _starting_letter_ranges(word_list, starting_letters)
+    if word_count is None and min_entropy is not None:
+        return _min_entropy_ranges(letter_ranges, min_entropy)
+    word_count = _password_word_count(
+        len(word_list), word_count, min_entropy, starting_letters
+    )
+    _check_starting_letters(starting_letters, word_count)
+    return letter_ranges[:word_count]
+
+
+def _iter_words(word_list, separator, ranges, count):
+    """Generates passwords where each word position has its own range of candidate words in the given WordList."""
+    pool = get_entropy_pool()
+    word_count = len(ranges)
+    if count * word_count >= len(word_list):
+        # for large batches, decoding the whole word list up front is cheaper than decoding each word drawn
+        lookup = list(word_list).__getitem__
+    else:
+        lookup = word_list.__getitem__
+    batch_size = max(1, DEFAULT_BATCH_RANDOM_VALUES // max(1, word_count))
+
+    for size in _batch_sizes(count, batch_size):
+        if word_count == 0:
+            for _ in range(size):
+                yield ""
+            continue
+        # one column of random words for each word position
+        with span("words_batch.draw", pool):
+            columns = [
+                [lookup(start + i) for i in pool.randbelow_many(end - start, size)]
+                for start, end in ranges
+            ]
+        for password_words in zip(*columns):
+            yield separator.join(password_words)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import threading
+import time
+
+from .rng import get_entropy_pool
+
+
+__all__ = [
+    "MetricsRecorder",
+    "add_metrics_sink",
+    "remove_metrics_sink",
+    "recording",
+]
+
+# the registered metrics sinks. Instrumented functions check whether this list is empty before doing any
+# instrumentation at all, so that instrumentation costs next to nothing while no sinks are registered.
+_sinks = []
+_sinks_lock = threading.Lock()
+
+# the stack of spans currently open in each thread
+_local = threading.local()
+
+
+def add_metrics_sink(sink):
+    """Registers a metrics sink, which from then on is notified of every instrumented call made in this process
+    (in any thread), e.g. to passwdgen.chars(), passwdgen.words(), passwdgen.load_word_list(),
+    passwdgen.secure_random() or passwdgen.calculate_entropy(), and of the phases within them.
+
+    Args:
+        sink: An object with a record(name, duration, self_duration, counters, parent) method, which is called
+            once each instrumented call or phase completes, with its name (e.g. "load_word_list" or
+            "load_word_list.parse"), how long it took (in seconds), how much of that time was spent outside of any
+            nested instrumented calls, a dictionary of counters (e.g. random_bytes, rng_syscalls or
+            words_loaded) and the name of the instrumented call within which it was made (or None). See
+            MetricsRecorder.
+    """
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_metrics_sink(sink):
+    """Unregisters a metrics sink previously registered through add_metrics_sink()."""
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+class _Span(object):
+    """Times an instrumented call or phase, and counts the random bytes drawn from the entropy pool (and the
+    operating system calls made to refill it) in the meantime."""
+
+    __slots__ = ["name", "counters", "_pool", "_parent", "_start", "_nested", "_bytes", "_syscalls"]
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.counters = dict()
+        self._pool = pool or get_entropy_pool()
+
+    def count(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self._parent = stack[-1] if stack else None
+        stack.append(self)
+        self._nested = 0.0
+        self._bytes = self._pool.bytes_consumed
+        self._syscalls = self._pool.syscalls
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self._start
+        _local.stack.pop()
+        if self._parent is not None:
+            self._parent._nested += duration
+        random_bytes = self._pool.bytes_consumed - self._bytes
+        if random_bytes > 0:
+            self.count("random_bytes", random_bytes)
+        syscalls = self._pool.syscalls - self._syscalls
+        if syscalls > 0:
+            self.count("rng_syscalls", syscalls)
+
+        parent = self._parent.name if self._parent is not None else None
+        for sink in list(_sinks):
+            sink.record(self.name, duration, duration - self._nested, self.counters, parent)
+        return False
+
+
+class _NullSpan(object):
+    """Stands in for a _Span while no metrics sinks are registered."""
+
+    def count(self, counter, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+def span(name, pool=None):
+    """Returns a context manager that records the enclosed code as an instrumented call or phase with the given
+    name, if any metrics sinks are registered. Counters can be added to it through its count() method.
+
+    Args:
+        name: The name of the call or phase.
+        pool: The entropy pool whose consumption to count (default: the process-wide pool).
+    """
+    return _Span(name, pool) if _sinks else _null_span
+
+
+class MetricsRecorder(object):
+    """A metrics sink that aggregates the calls, time taken and counters of each instrumented call and phase.
+    See add_metrics_sink() and recording()."""
+
+    def __init__(self):
+        self.phases = dict()
+        # time spent in instrumented calls that weren't made from within other instrumented calls
+        self.top_level_time = 0.0
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, duration, self_duration, counters, parent):
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                phase = self.phases[name] = {"calls": 0, "time": 0.0, "self_time": 0.0}
+            phase["calls"] += 1
+            phase["time"] += duration
+            phase["self_time"] += self_duration
+            for counter, value in counters.items():
+                phase[counter] = phase.get(counter, 0) + value
+            if parent is None:
+                self.top_level_time += duration
+
+    def as_dict(self):
+        """Returns a JSON-serialisable copy of the aggregated metrics, by call or phase name."""
+        with self._lock:
+            return dict((name, dict(phase)) for name, phase in self.phases.items())
+
+    def report(self, out, elapsed=None):
+        """Writes a per-phase breakdown of the recorded metrics to the given text stream, slowest phase first.
+
+        Args:
+            out: The text stream to which to write the breakdown.
+            elapsed: The total time (in seconds) over which the metrics were recorded, so that the time spent
+                outside of any instrumented call can be shown. Defaults to the time since this recorder was
+                created.
+        """
+        if elapsed is None:
+            elapsed = time.perf_counter() - self.start_time
+        phases = self.as_dict()
+        name_width = max([len(name) for name in phases] + [len("(not instrumented)")])
+        out.write("\nProfile (%.3f seconds)\n" % elapsed)
+        out.write("-------\n")
+        out.write(
+            ("{:<%d}" % name_width).format("phase")
+            + " : %10s %11s %11s %12s %8s %12s\n"
+            % ("calls", "total (s)", "self (s)", "random bytes", "syscalls", "words loaded")
+        )
+        for name, phase in sorted(phases.items(), key=lambda item: -item[1]["time"]):
+            out.write(
+                ("{:<%d}" % name_width).format(name)
+                + " : %10d %11.6f %11.6f %12d %8d %12d\n"
+                % (
+                    phase["calls"],
+                    phase["time"],
+                    phase["self_time"],
+                    phase.get("random_bytes", 0),
+                    phase.get("rng_syscalls", 0),
+                    phase.get("words_loaded", 0),
+                )
+            )
+        out.write(
+            ("{:<%d}" % name_width).format("(not instrumented)")
+            + " : %10s %11.6f\n" % ("", max(0.0, elapsed - self.top_level_time))
+        )
+
+
+@contextmanager
+def recording():
+    """Records metrics from all instrumented calls made within the context.
+
+    Yields:
+        The MetricsRecorder to which metrics are being recorded.
+    """
+    recorder = MetricsRecorder()
+    add_metrics_sink(recorder)
+    try:
+        yield recorder
+    finally:
+        remove_metrics_sink(recorder)
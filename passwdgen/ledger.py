@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from .bloom import BloomFilter
+from .constants import *
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows, where ledgers can only safely be used by one process at a time
+    fcntl = None
+
+
+__all__ = ["Ledger"]
+
+# ledger index files start with this magic string (the last two bytes are the format version)
+LEDGER_INDEX_MAGIC = b"PWDGLX02"
+
+# magic, hash table capacity (in slots), number of log records reflected in the index, Bloom filter bits and hashes
+_header = struct.Struct("<8sQQQQ")
+
+# the number of log records reflected in the index, which is updated in place
+_records_field = struct.Struct("<Q")
+_RECORDS_OFFSET = 16
+
+# the size of each keyed hash, in bytes
+_DIGEST_SIZE = 16
+
+_EMPTY_SLOT = bytes(_DIGEST_SIZE)
+
+
+def _table_offset(bloom_bits):
+    """Returns the offset of the hash table in an index file, which follows the header and the Bloom filter."""
+    offset = _header.size + (bloom_bits + 7) // 8
+    return (offset + _DIGEST_SIZE - 1) // _DIGEST_SIZE * _DIGEST_SIZE
+
+
+def _index_layout(capacity):
+    """Works out the Bloom filter size and total file size of an index with the given hash table capacity."""
+    bloom_bits, bloom_hashes = BloomFilter.size_for(
+        int(capacity * LEDGER_MAX_LOAD), LEDGER_BLOOM_FALSE_POSITIVE_RATE
+    )
+    return bloom_bits, bloom_hashes, _table_offset(bloom_bits) + capacity * _DIGEST_SIZE
+
+
+class Ledger(object):
+    """A persistent record of issued passwords, which guarantees that no password is ever issued twice. Only keyed
+    hashes (keyed BLAKE2b) of the passwords are stored, never the passwords themselves.
+
+    A ledger is a directory containing:
+
+    * key: The secret key used to hash passwords, generated when the ledger is created. Without it, the hashes
+      can't be checked against guesses (e.g. all 10,000 4-digit PINs). Keep it as private as the passwords.
+    * log: An append-only file of the hashes of all issued passwords, which is the ledger's record of truth.
+    * index: A memory-mapped Bloom filter and open addressing hash table of the hashes in the log, so that
+      checking a password costs O(1) on average. The hash table doubles in size whenever it is half full (so
+      insertions are O(1) amortised), and the index can always be rebuilt or brought up to date from the log.
+    * lock: Serialises access to the ledger across processes (using flock), so that several processes on the same
+      host can safely issue passwords from the same ledger.
+    """
+
+    def __init__(self, path, capacity=None, sync=False):
+        """Opens the ledger in the given directory, creating it if necessary.
+
+        Args:
+            path: The ledger's directory.
+            capacity: The number of passwords the ledger is expected to hold, so that its index can be sized up
+                front rather than grown as passwords are added.
+            sync: If True, the log is flushed to disk (with fsync) after each password is added, so that no issued
+                password is forgotten even if the machine crashes.
+        """
+        self.path = path
+        self.sync = sync
+        os.makedirs(path, exist_ok=True)
+        self._thread_lock = threading.RLock()
+        self._lock_fd = os.open(os.path.join(path, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        self._log_fd = None
+        self._map = None
+        with self._locked():
+            self._key = self._load_key()
+            self._log_fd = os.open(
+                os.path.join(path, "log"), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600
+            )
+            if not self._index_current():
+                # a missing index, or one in an older format, is rebuilt from the log (by _refresh())
+                initial = LEDGER_INITIAL_CAPACITY
+                while capacity is not None and initial * LEDGER_MAX_LOAD < capacity:
+                    initial *= 2
+                self._build_index(initial, [])
+            self._refresh()
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, "index")
+
+    def _index_current(self):
+        """Checks whether the index file exists, and isn't in an older format than the current one."""
+        try:
+            with open(self._index_path, "rb") as f:
+                magic = f.read(len(LEDGER_INDEX_MAGIC))
+        except FileNotFoundError:
+            return False
+        return not (magic[:6] == LEDGER_INDEX_MAGIC[:6] and magic < LEDGER_INDEX_MAGIC)
+
+    def _load_key(self):
+        key_path = os.path.join(self.path, "key")
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(key_path, "rb") as f:
+                key = f.read()
+            if len(key) != LEDGER_KEY_SIZE:
+                raise ValueError("Invalid ledger key: %s" % key_path)
+            return key
+        key = os.urandom(LEDGER_KEY_SIZE)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def _locked(self):
+        return _LedgerLock(self)
+
+    def _hash(self, password):
+        digest = hashlib.blake2b(
+            password.encode("utf-8"), key=self._key, digest_size=_DIGEST_SIZE
+        ).digest()
+        # the all-zero digest marks empty hash table slots
+        return digest if digest != _EMPTY_SLOT else b"\x01" + digest[1:]
+
+    def _build_index(self, capacity, digests):
+        """Writes a new index file with the given hash table capacity (a power of two) containing the given
+        hashes, and moves it into place."""
+        bloom_bits, bloom_hashes, size = _index_layout(capacity)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            # the file is sparse until the hash table fills up
+            os.ftruncate(fd, size)
+            mapped = mmap.mmap(fd, size)
+            try:
+                index = _Index(mapped, capacity, bloom_bits, bloom_hashes)
+                count = 0
+                for digest in digests:
+                    index.insert(digest)
+                    count += 1
+                _header.pack_into(
+                    mapped, 0, LEDGER_INDEX_MAGIC, capacity, count, bloom_bits, bloom_hashes
+                )
+                index.release()
+                mapped.flush()
+            finally:
+                mapped.close()
+            os.close(fd)
+            fd = None
+            os.replace(tmp_path, self._index_path)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            os.unlink(tmp_path)
+            raise
+
+    def _remap(self):
+        """Makes sure that the mapped index is the current index file, which another process may have replaced
+        while growing it. Must be called with the lock held."""
+        inode = os.stat(self._index_path).st_ino
+        if self._map is None or inode != self._inode:
+            self._unmap()
+            with open(self._index_path, "r+b") as f:
+                mapped = mmap.mmap(f.fileno(), 0)
+            magic, capacity, _, bloom_bits, bloom_hashes = _header.unpack_from(mapped, 0)
+            if magic != LEDGER_INDEX_MAGIC or len(mapped) != _index_layout(capacity)[2]:
+                mapped.close()
+                raise ValueError("Not a valid ledger index: %s" % self._index_path)
+            self._map = mapped
+            self._inode = inode
+            self._index = _Index(mapped, capacity, bloom_bits, bloom_hashes)
+
+    def _refresh(self):
+        """Makes sure that the mapped index is current (see _remap()), and that it reflects every hash in the log.
+        Must be called with the lock held."""
+        self._remap()
+        records = os.fstat(self._log_fd).st_size // _DIGEST_SIZE
+        indexed = self._records()
+        if indexed < records:
+            # another process (or an earlier, interrupted call) added hashes to the log without indexing them
+            with open(os.path.join(self.path, "log"), "rb") as f:
+                f.seek(indexed * _DIGEST_SIZE)
+                for _ in range(records - indexed):
+                    self._insert(f.read(_DIGEST_SIZE), logged=True)
+
+    def _records(self):
+        return _records_field.unpack_from(self._map, _RECORDS_OFFSET)[0]
+
+    def _unmap(self):
+        if self._map is not None:
+            self._index.release()
+            self._map.close()
+            self._map = None
+
+    def _insert(self, digest, logged=False):
+        """Adds the given hash to the log (unless it's already there) and to the index, growing the index if
+        necessary. Must be called with the lock held."""
+        if not logged:
+            os.write(self._log_fd, digest)
+            if self.sync:
+                os.fsync(self._log_fd)
+        index = self._index
+        if digest not in index:
+            index.insert(digest)
+        records = self._records() + 1
+        _records_field.pack_into(self._map, _RECORDS_OFFSET, records)
+        if records > index.capacity * LEDGER_MAX_LOAD:
+            self._grow()
+
+    def _grow(self):
+        capacity = self._index.capacity * 2
+        self._build_index(capacity, self._index.digests())
+        self._remap()
+
+    def __contains__(self, password):
+        digest = self._hash(password)
+        with self._locked():
+            self._refresh()
+            return digest in self._index
+
+    def __len__(self):
+        with self._locked():
+            self._refresh()
+            return self._records()
+
+    def add(self, password):
+        """Records the given password as issued, unless it already has been.
+
+        Args:
+            password: The password to record.
+
+        Returns:
+            True if the password was recorded, or False if it had already been issued.
+        """
+        digest = self._hash(password)
+        with self._locked():
+            self._refresh()
+            if digest in self._index:
+                return False
+            self._insert(digest)
+            return True
+
+    def issue(self, generate, max_attempts=None):
+        """Generates a password that has never been issued before, and records it as issued.
+
+        Args:
+            generate: A function that generates a (random) password.
+            max_attempts: The maximum number of passwords to generate before giving up (default:
+                constants.LEDGER_MAX_ATTEMPTS).
+
+        Returns:
+            The newly issued password.
+        """
+        if max_attempts is None:
+            max_attempts = LEDGER_MAX_ATTEMPTS
+        for _ in range(max_attempts):
+            password = generate()
+            if self.add(password):
+                return password
+        raise ValueError(
+            "Could not generate a password that hasn't already been issued in %d attempts (almost every possible "
+            "password may have been issued)" % max_attempts
+        )
+
+    def issue_all(self, passwords, generate, max_attempts=None):
+        """Records each of the given passwords as issued, replacing any that have already been issued with new
+        ones. See issue().
+
+        Args:
+            passwords: An iterable of passwords.
+            generate: A function that generates a replacement (random) password.
+            max_attempts: The maximum number of replacements to generate for each password before giving up.
+
+        Yields:
+            The newly issued passwords.
+        """
+        for password in passwords:
+            yield password if self.add(password) else self.issue(generate, max_attempts)
+
+    def close(self):
+        with self._thread_lock:
+            self._unmap()
+            for fd in [self._log_fd, self._lock_fd]:
+                if fd is not None:
+                    os.close(fd)
+            self._log_fd = self._lock_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return "Ledger(%r)" % self.path
+
+
+class _LedgerLock(object):
+    """Holds a ledger's lock, both against other threads and against other processes."""
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+
+    def __enter__(self):
+        self.ledger._thread_lock.acquire()
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.ledger._lock_fd, fcntl.LOCK_EX)
+            except BaseException:
+                self.ledger._thread_lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.ledger._lock_fd, fcntl.LOCK_UN)
+        finally:
+            self.ledger._thread_lock.release()
+        return False
+
+
+class _Index(object):
+    """The Bloom filter and open addressing (linear probing) hash table of a memory-mapped ledger index file."""
+
+    def __init__(self, mapped, capacity, bloom_bits, bloom_hashes):
+        self.capacity = capacity
+        self._map = mapped
+        self._mask = capacity - 1
+        self._table = _table_offset(bloom_bits)
+        self._bloom_view = memoryview(mapped)[_header.size : _header.size + (bloom_bits + 7) // 8]
+        self.bloom = BloomFilter(self._bloom_view, bloom_bits, bloom_hashes)
+
+    def _probe(self, digest):
+        """Returns the offset of the slot holding the given hash, or of the empty slot where it belongs."""
+        mapped, table, mask = self._map, self._table, self._mask
+        i = int.from_bytes(digest[:8], "little") & mask
+        while True:
+            offset = table + i * _DIGEST_SIZE
+            slot = mapped[offset : offset + _DIGEST_SIZE]
+            if slot == digest or slot == _EMPTY_SLOT:
+                return offset
+            i = (i + 1) & mask
+
+    def __contains__(self, digest):
+        # the Bloom filter rules out most absent hashes without touching the (much larger) hash table
+        if digest not in self.bloom:
+            return False
+        offset = self._probe(digest)
+        return self._map[offset : offset + _DIGEST_SIZE] == digest
+
+    def insert(self, digest):
+        offset = self._probe(digest)
+        self._map[offset : offset + _DIGEST_SIZE] = digest
+        self.bloom.add(digest)
+
+    def digests(self):
+        """Yields every hash in the hash table."""
+        mapped, table = self._map, self._table
+        for offset in range(table, table + self.capacity * _DIGEST_SIZE, _DIGEST_SIZE):
+            slot = mapped[offset : offset + _DIGEST_SIZE]
+            if slot != _EMPTY_SLOT:
+                yield slot
+
+    def release(self):
+        """Releases the Bloom filter's view of the mapped file, so that the file can be unmapped."""
+        self._bloom_view.release()
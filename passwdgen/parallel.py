@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import os
+
+from .generator import (
+    _batch_sizes,
+    _char_password_length,
+    _charset_array,
+    _iter_chars,
+    _iter_words,
+    _word_ranges,
+)
+from .utils import load_word_list
+from .wordlist import WordList, as_word_list
+from .constants import *
+
+
+__all__ = ["chars_parallel", "words_parallel"]
+
+# compiled word lists memory-mapped by this (worker) process, by path
+_worker_word_lists = dict()
+
+
+# tasks send their passwords back to the parent process joined into one string wherever possible, since a single
+# string is far cheaper to pickle than a list of many small ones
+_PASSWORD_DELIMITER = "\n"
+
+
+def _worker_word_list(word_list_path, word_list_size):
+    """Memory-maps the compiled word list shared with this worker process through _shared_word_list(), loading
+    it only once per process."""
+    word_list = _worker_word_lists.get(word_list_path)
+    if word_list is None:
+        word_list = WordList.load(word_list_path)
+        if len(word_list) != word_list_size:
+            raise ValueError(
+                "Compiled word list changed while in use: %s" % word_list_path
+            )
+        _worker_word_lists[word_list_path] = word_list
+    return word_list
+
+
+def _chars_task(charset, length, count):
+    return _PASSWORD_DELIMITER.join(_iter_chars(_charset_array(charset), length, count))
+
+
+def _words_task(word_list_path, word_list_size, separator, ranges, count):
+    word_list = _worker_word_list(word_list_path, word_list_size)
+    passwords = _iter_words(word_list, separator, ranges, count)
+    if _PASSWORD_DELIMITER in separator:
+        return list(passwords)
+    return _PASSWORD_DELIMITER.join(passwords)
+
+
+def _parallelism(jobs, chunk_size):
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise ValueError("Number of jobs must be at least 1")
+    if chunk_size is None:
+        chunk_size = DEFAULT_PARALLEL_CHUNK_SIZE
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+    return jobs, chunk_size
+
+
+def _map_parallel(task, args, chunks, jobs, ordered=True):
+    """Runs task(*args, chunk) for each of the given chunks across a pool of jobs processes, and yields the
+    results. Only a limited number of tasks are submitted at a time (and chunks are only drawn from the given
+    iterable as they are needed), so that memory use stays bounded no matter how many chunks there are."""
+    # imported here, since multiprocessing takes a noticeable share of the command line's startup time
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    max_pending = jobs * PARALLEL_CHUNKS_PER_JOB
+    chunks = iter(chunks)
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        pending = []
+        while True:
+            for chunk in chunks:
+                pending.append(executor.submit(task, *(args + (chunk,))))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            if ordered:
+                done = [pending.pop(0)]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending = [future for future in pending if future not in done]
+            for future in done:
+                yield future.result()
+    finally:
+        # if the consumer stopped early, don't bother running the tasks that are still queued up
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _iter_parallel(task, args, count, jobs, chunk_size, ordered):
+    """Splits the generation of count passwords up into tasks of at most chunk_size passwords each, runs them
+    across a pool of jobs processes and yields the resulting passwords."""
+    sizes = _batch_sizes(count, chunk_size)
+    for passwords in _map_parallel(task, args, sizes, jobs, ordered):
+        if isinstance(passwords, str):
+            passwords = passwords.split(_PASSWORD_DELIMITER)
+        yield from passwords
+
+
+@contextmanager
+def _shared_word_list(word_list):
+    """Provides the path of a compiled word list file from which worker processes can memory-map the given word
+    list, rather than having it pickled and sent to each of them. Word lists that weren't loaded from a compiled
+    word list file are written out to a temporary one for the duration of the context."""
+    if word_list.path is not None:
+        yield word_list.path
+        return
+    import shutil
+    import tempfile
+
+    temp_dir = tempfile.mkdtemp(prefix="passwdgen-")
+    try:
+        path = os.path.join(temp_dir, "words.pwl")
+        word_list.save(path)
+        yield path
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _iter_words_parallel(word_list, separator, ranges, count, jobs, chunk_size, ordered):
+    with _shared_word_list(word_list) as path:
+        yield from _iter_parallel(
+            _words_task,
+            (path, len(word_list), separator, ranges),
+            count,
+            jobs,
+            chunk_size,
+            ordered,
+        )
+
+
+def chars_parallel(
+    count,
+    charset=None,
+    length=None,
+    min_entropy=None,
+    jobs=None,
+    ordered=True,
+    chunk_size=None,
+):
+    """Generates a very large number of character-based passwords across several processes. Each process draws
+    its randomness from its own entropy pool, read independently from the operating system. See chars() for
+    details on the charset, length and min_entropy parameters.
+
+    Args:
+        count: The number of passwords to generate.
+        charset: The character set to use from which to source characters.
+        length: The desired length of each password.
+        min_entropy: The desired minimum entropy of each password, based on the given charset.
+        jobs: The number of processes to use. Defaults to the number of CPUs. If 1, the passwords are generated in
+            the current process.
+        ordered: If False, passwords are yielded in whichever order the processes finish generating them. Since
+            every password is independently random, this does not affect their randomness.
+        chunk_size: The number of passwords generated by each process at a time (see
+            constants.DEFAULT_PARALLEL_CHUNK_SIZE).
+
+    Returns:
+        A generator that produces count password strings.
+    """
+    charset_chars = _charset_array(charset)
+    length = _char_password_length(len(charset_chars), length, min_entropy)
+    jobs, chunk_size = _parallelism(jobs, chunk_size)
+    if jobs == 1:
+        return _iter_chars(charset_chars, length, count)
+    return _iter_parallel(
+        _chars_task, (charset, length), count, jobs, chunk_size, ordered
+    )
+
+
+def words_parallel(
+    count,
+    dict_set=None,
+    separator=None,
+    word_count=None,
+    min_entropy=None,
+    starting_letters=None,
+    jobs=None,
+    ordered=True,
+    chunk_size=None,
+):
+    """Generates a very large number of word-based passwords across several processes. The word list is shared
+    between the processes by memory-mapping a compiled word list file. See words() for details on the other
+    parameters.
+
+    Args:
+        count: The number of passwords to generate.
+        dict_set: The word list/dictionary from which to generate passwords. Defaults to the built-in word list.
+        separator: The separator to use between words.
+        word_count: The number of words to use to build each password.
+        min_entropy: The desired minimum entropy of each password, based on the given dictionary.
+        starting_letters: The desired starting letters (or prefixes) of the generated words.
+        jobs: The number of processes to use. Defaults to the number of CPUs. If 1, the passwords are generated in
+            the current process.
+        ordered: If False, passwords are yielded in whichever order the processes finish generating them.
+        chunk_size: The number of passwords generated by each process at a time (see
+            constants.DEFAULT_PARALLEL_CHUNK_SIZE).
+
+    Returns:
+        A generator that produces count password strings.
+    """
+    if dict_set is None:
+        dict_set = load_word_list()
+    word_list = as_word_list(dict_set)
+
+    if separator is None:
+        separator = DEFAULT_WORD_SEPARATOR
+
+    ranges = _word_ranges(word_list, word_count, min_entropy, starting_letters)
+    jobs, chunk_size = _parallelism(jobs, chunk_size)
+    if jobs == 1:
+        return _iter_words(word_list, separator, ranges, count)
+    return _iter_words_parallel(
+        word_list, separator, ranges, count, jobs, chunk_size, ordered
+    )
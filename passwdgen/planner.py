@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+import math
+
+from .generator import _batch_sizes
+from .instrument import span
+from .rng import get_entropy_pool
+from .utils import load_word_list
+from .wordlist import as_word_list
+from .constants import *
+
+
+__all__ = ["PasswordPlan", "plan_password"]
+
+
+def _source_chars(source):
+    """Returns the (sorted) characters of the given character-based password component source."""
+    if source == PLAN_SOURCE_SYMBOLS:
+        return CHARACTER_CLASSES[CC_SPECIAL]
+    if source == PLAN_SOURCE_SEPARATORS:
+        return separators
+    if source in PASSWORD_CHARSETS:
+        return "".join(sorted(PASSWORD_CHARSETS[source]))
+    raise ValueError("Unrecognised password component source: %s" % source)
+
+
+def _gaps(word_count, char_count):
+    """Returns the number of separators in a password made up of the given numbers of words and characters: one
+    between each pair of words, and one between the words and the characters that follow them."""
+    return max(0, word_count - 1) + (1 if word_count > 0 and char_count > 0 else 0)
+
+
+def _plan_size(word_count, char_count, mean_word_size, separator, random_separators):
+    """Returns the expected length (in characters) of the passwords made up of the given numbers of words and
+    characters, and the number of random components in each (i.e. what has to be remembered)."""
+    gaps = _gaps(word_count, char_count)
+    length = (
+        (word_count * mean_word_size if word_count else 0.0)
+        + char_count
+        + gaps * (1 if random_separators else len(separator))
+    )
+    return length, word_count + char_count + (gaps if random_separators else 0)
+
+
+class PasswordPlan(object):
+    """A template for passwords that mix several sources of randomness: a number of words from a word list, joined
+    by separators (which are either fixed, or drawn at random), followed by a fixed number of characters from each
+    of a number of charsets. Plans are usually worked out by plan_password().
+
+    The entropy of a plan is exact: it is the sum of the entropy of each of the random choices made when generating
+    a password from it, given that the plan itself is known.
+    """
+
+    def __init__(self, word_list, word_count, char_counts, separator=None, random_separators=False):
+        """Constructor.
+
+        Args:
+            word_list: The WordList from which to draw words (may be None if word_count is 0).
+            word_count: The number of words in each password.
+            char_counts: A list of (source, count) tuples, giving the number of characters from each charset (see
+                constants.PASSWORD_CHARSETS and constants.PLAN_SOURCE_SYMBOLS) that follow the words, in order.
+            separator: The separator to use between the words, and between the words and the characters.
+            random_separators: If True, each separator is instead drawn at random from constants.separators.
+        """
+        if separator is None:
+            separator = DEFAULT_WORD_SEPARATOR
+        self.word_list = word_list
+        self.word_count = word_count
+        self.char_counts = [(source, count) for source, count in char_counts if count > 0]
+        self.separator = separator
+        self.random_separators = random_separators
+
+        char_count = sum(count for _, count in self.char_counts)
+        gaps = _gaps(word_count, char_count)
+        separator_chars = separators if random_separators else (separator,)
+        self.entropy = (
+            (word_count * math.log2(len(word_list)) if word_count else 0.0)
+            + sum(count * math.log2(len(_source_chars(source))) for source, count in self.char_counts)
+            + gaps * math.log2(len(separator_chars))
+        )
+        # the expected length of the passwords, in characters, and the number of random choices that make up each
+        # password, i.e. what has to be remembered
+        self.length, self.components = _plan_size(
+            word_count, char_count, word_list.mean_word_size if word_count else 0.0, separator, random_separators
+        )
+
+        # each password is the concatenation of one random choice from each of these sequences, in order
+        columns = []
+        for i in range(word_count):
+            if i > 0:
+                columns.append(separator_chars)
+            columns.append(word_list)
+        if word_count and char_count:
+            columns.append(separator_chars)
+        for source, count in self.char_counts:
+            columns.extend([_source_chars(source)] * count)
+        self._columns = columns
+
+    def generate(self):
+        """Generates a password from this plan.
+
+        Returns:
+            A string containing the generated password.
+        """
+        return next(self._iter_passwords(1))
+
+    def generate_batch(self, count, lazy=False):
+        """Generates many passwords from this plan at once, drawing the randomness for many passwords at a time
+        from the entropy pool in a single bulk read per component.
+
+        Args:
+            count: The number of passwords to generate.
+            lazy: If True, returns a generator that produces the passwords on demand (in constant memory) instead of
+                a list.
+
+        Returns:
+            A list (or, if lazy is True, a generator) of count password strings.
+        """
+        passwords = self._iter_passwords(count)
+        return passwords if lazy else list(passwords)
+
+    def _iter_passwords(self, count):
+        pool = get_entropy_pool()
+        columns = self._columns
+        if self.word_count and count * self.word_count >= len(self.word_list):
+            # for large batches, decoding the whole word list up front is cheaper than decoding each word drawn
+            words = list(self.word_list)
+            columns = [words if values is self.word_list else values for values in columns]
+        batch_size = max(1, DEFAULT_BATCH_RANDOM_VALUES // max(1, len(columns)))
+
+        for size in _batch_sizes(count, batch_size):
+            with span("plan_batch.draw", pool):
+                drawn = [
+                    [values[i] for i in pool.randbelow_many(len(values), size)]
+                    for values in columns
+                ]
+            for parts in zip(*drawn):
+                yield "".join(parts)
+
+    def __repr__(self):
+        char_count = sum(count for _, count in self.char_counts)
+        components = [(PC_DICT, self.word_count)] + self.char_counts
+        if self.random_separators:
+            components.append((PLAN_SOURCE_SEPARATORS, _gaps(self.word_count, char_count)))
+        return "PasswordPlan(%s; %.2f bits)" % (
+            ", ".join("%d x %s" % (count, source) for source, count in components if count > 0),
+            self.entropy,
+        )
+
+
+def plan_password(min_entropy, sources=None, objective=None, word_list=None, separator=None, minimums=None):
+    """Works out the best password template (see PasswordPlan) that mixes the given sources of randomness to meet
+    an entropy target, e.g. three words followed by two digits and a symbol. Plans are cached, so asking for the
+    same plan again costs next to nothing.
+
+    The planner considers every possible number of words (from none to as many as would meet the target on their
+    own), topping each up with the fewest characters that meet the target. Since every character takes up one
+    position, the fewest characters are always those drawn from the largest charset, beyond any minimums.
+
+    Args:
+        min_entropy: The minimum entropy of the passwords.
+        sources: A list of the sources of randomness to use: PC_DICT (words from the word list), charset IDs from
+            constants.PASSWORD_CHARSETS, constants.PLAN_SOURCE_SYMBOLS (special characters) and
+            constants.PLAN_SOURCE_SEPARATORS (randomly chosen separators). Defaults to
+            constants.DEFAULT_PLAN_SOURCES.
+        objective: What to optimise for (see constants.PLAN_OBJECTIVES): the shortest password (the default), the
+            fewest words, or the fewest random components (words, characters and random separators) to remember.
+        word_list: The word list from which to draw words. Defaults to the built-in word list.
+        separator: The separator to use between components, unless separators are drawn at random.
+        minimums: An optional dictionary mapping sources to the minimum number of components from that source.
+
+    Returns:
+        A PasswordPlan.
+    """
+    if sources is None:
+        sources = DEFAULT_PLAN_SOURCES
+    if objective is None:
+        objective = PLAN_OBJECTIVE_LENGTH
+    if objective not in PLAN_OBJECTIVES:
+        raise ValueError("Unrecognised planning objective: %s" % objective)
+    if separator is None:
+        separator = DEFAULT_WORD_SEPARATOR
+    if PC_DICT in sources:
+        if word_list is None:
+            word_list = load_word_list()
+        word_list = as_word_list(word_list)
+    else:
+        word_list = None
+    minimums = tuple(sorted((minimums or {}).items()))
+    # plans only depend on the size of the word list and the mean size of its words, so the cache is keyed on
+    # those rather than on the word list itself (which it would otherwise keep from ever being freed)
+    word_list_size = (len(word_list), word_list.mean_word_size) if word_list is not None else (0, 0.0)
+    word_count, char_counts, random_separators = _plan(
+        min_entropy, tuple(sources), objective, word_list_size, separator, minimums
+    )
+    return PasswordPlan(word_list, word_count, char_counts, separator, random_separators)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _plan(min_entropy, sources, objective, word_list_size, separator, minimums):
+    """Works out the best plan for plan_password(), given the size of the word list (as a (number of words, mean
+    word size) tuple).
+
+    Returns:
+        A (word_count, char_counts, random_separators) tuple (see PasswordPlan).
+    """
+    word_list_len, mean_word_size = word_list_size
+    minimums = dict(minimums)
+    for source, count in minimums.items():
+        if source not in sources or source == PLAN_SOURCE_SEPARATORS:
+            raise ValueError("Cannot require a minimum number of components from source: %s" % source)
+        if count < 0:
+            raise ValueError("Minimum number of components cannot be negative")
+
+    random_separators = PLAN_SOURCE_SEPARATORS in sources
+    charsets = [
+        (source, _source_chars(source))
+        for source in sources
+        if source not in (PC_DICT, PLAN_SOURCE_SEPARATORS)
+    ]
+    char_bits = dict((source, math.log2(len(chars))) for source, chars in charsets)
+    largest = max(charsets, key=lambda charset: len(charset[1]))[0] if charsets else None
+    separator_bits = math.log2(len(separators)) if random_separators else 0.0
+    word_bits = math.log2(word_list_len) if word_list_len > 1 else 0.0
+
+    min_words = minimums.get(PC_DICT, 0)
+    min_chars = sum(count for source, count in minimums.items() if source != PC_DICT)
+    base_char_bits = sum(count * char_bits[source] for source, count in minimums.items() if source != PC_DICT)
+
+    def entropy(word_count, extra_chars):
+        return (
+            word_count * word_bits
+            + base_char_bits
+            + extra_chars * (char_bits[largest] if largest else 0.0)
+            + _gaps(word_count, min_chars + extra_chars) * separator_bits
+        )
+
+    max_words = min_words
+    if word_bits > 0:
+        max_words = max(min_words, int(math.ceil(min_entropy / word_bits)))
+
+    best, best_key = None, None
+    for word_count in range(min_words, max_words + 1):
+        extra_chars = 0
+        shortfall = min_entropy - entropy(word_count, 0)
+        if shortfall > 0:
+            if largest is None or char_bits[largest] == 0:
+                continue
+            extra_chars = int(math.ceil(shortfall / char_bits[largest]))
+            # the separator before the characters may have made up some of the shortfall
+            while extra_chars > 0 and entropy(word_count, extra_chars - 1) >= min_entropy:
+                extra_chars -= 1
+
+        char_counts = [
+            (source, minimums.get(source, 0) + (extra_chars if source == largest else 0))
+            for source, _ in charsets
+        ]
+        length, components = _plan_size(
+            word_count, min_chars + extra_chars, mean_word_size, separator, random_separators
+        )
+        if objective == PLAN_OBJECTIVE_WORDS:
+            key = (word_count, length)
+        elif objective == PLAN_OBJECTIVE_MEMORABLE:
+            key = (components, length)
+        else:
+            key = (length, components)
+        if best_key is None or key < best_key:
+            best, best_key = (word_count, char_counts, random_separators), key
+
+    if best is None:
+        raise ValueError(
+            "The given sources cannot make up a password with an entropy of %.2f bits" % min_entropy
+        )
+    return best
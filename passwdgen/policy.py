@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_right
+from itertools import accumulate
+import math
+
+from .instrument import _sinks, span
+from .rng import get_entropy_pool
+from .constants import *
+
+
+__all__ = ["PasswordPolicy"]
+
+
+class PasswordPolicy(object):
+    """A password composition policy: a password length, and the minimum and maximum number of characters from each
+    of a number of character classes (e.g. "at least 2 digits and 1 special character, and no ambiguous
+    characters").
+
+    Compliant passwords are generated in a single pass, without any retries, and uniformly at random from the set
+    of all compliant passwords: the number of characters from each class is drawn with probability proportional
+    to the number of compliant passwords with that composition, the characters are drawn from their classes, and
+    the result is securely shuffled. The number of compliant passwords (and therefore their exact entropy) is
+    worked out combinatorially when the policy is created.
+    """
+
+    def __init__(
+        self,
+        length=None,
+        minimums=None,
+        maximums=None,
+        exclude=None,
+        exclude_ambiguous=False,
+        classes=None,
+        min_entropy=None,
+    ):
+        """Constructor. If the length parameter is supplied, the min_entropy parameter is ignored. If neither is
+        supplied, a default password length is chosen (see constants.DEFAULT_CHAR_PASSWORD_LENGTH).
+
+        Args:
+            length: The length of the passwords to generate.
+            minimums: A dictionary mapping character class IDs to the minimum number of characters from that class
+                (default: 0).
+            maximums: A dictionary mapping character class IDs to the maximum number of characters from that class
+                (default: no maximum). A maximum of 0 excludes the class altogether.
+            exclude: A string of characters that may not appear in passwords.
+            exclude_ambiguous: If True, easily confused characters (see constants.AMBIGUOUS_CHARS) may not appear
+                in passwords.
+            classes: A dictionary mapping character class IDs to the (mutually exclusive) characters in each class.
+                Defaults to constants.CHARACTER_CLASSES.
+            min_entropy: The desired minimum entropy of the passwords, from which the shortest suitable length is
+                worked out.
+        """
+        if classes is None:
+            classes = CHARACTER_CLASSES
+        minimums = dict(minimums or {})
+        maximums = dict(maximums or {})
+        for class_id in list(minimums) + list(maximums):
+            if class_id not in classes:
+                raise ValueError("Unrecognised character class: %s" % class_id)
+        excluded = set(exclude or "")
+        if exclude_ambiguous:
+            excluded.update(AMBIGUOUS_CHARS)
+
+        self.classes = []
+        seen = set()
+        for class_id in sorted(classes, key=_class_order):
+            lo, hi = minimums.get(class_id, 0), maximums.get(class_id)
+            if lo < 0 or (hi is not None and hi < lo):
+                raise ValueError("Invalid limits for character class: %s" % class_id)
+            chars = "".join(sorted(set(classes[class_id]) - excluded))
+            if seen.intersection(chars):
+                raise ValueError("Character classes may not overlap")
+            seen.update(chars)
+            if not chars or hi == 0:
+                if lo > 0:
+                    raise ValueError("No characters left in character class: %s" % class_id)
+                continue
+            self.classes.append((class_id, chars, lo, hi))
+        if not self.classes:
+            raise ValueError("Password policy does not allow any characters")
+
+        self.alphabet = "".join(chars for _, chars, _, _ in self.classes)
+        self._min_length = sum(lo for _, _, lo, _ in self.classes)
+        if length is None:
+            length = (
+                DEFAULT_CHAR_PASSWORD_LENGTH
+                if min_entropy is None
+                else self._length_for_entropy(min_entropy)
+            )
+        self.length = length
+        self._counts = self._count_table(length)
+        self.count = self._counts[0][length]
+        self._weights = dict()
+        self._arrangements = math.factorial(length)
+        if self.count == 0:
+            raise ValueError("No password of length %d can satisfy the policy" % length)
+
+    @property
+    def entropy(self):
+        """The exact entropy of the passwords generated under this policy, in bits."""
+        return math.log2(self.count)
+
+    def _count_table(self, length):
+        """Works out, for each class i and password length l, the number of ways of filling l positions with
+        characters from classes i onwards within their limits. Choosing k positions out of l for class i leaves the
+        remaining l - k positions to the classes after it, hence
+        counts[i][l] = sum(C(l, k) * n_i^k * counts[i + 1][l - k]) over the allowed k."""
+        counts = [[1] + [0] * length]
+        for _, chars, lo, hi in reversed(self.classes):
+            following = counts[0]
+            n = len(chars)
+            row = []
+            for l in range(length + 1):
+                top = l if hi is None else min(hi, l)
+                row.append(
+                    sum(
+                        math.comb(l, k) * n**k * following[l - k]
+                        for k in range(lo, top + 1)
+                    )
+                )
+            counts.insert(0, row)
+        return counts
+
+    def _length_for_entropy(self, min_entropy):
+        if len(self.alphabet) < 2 and min_entropy > 0:
+            raise ValueError("The password policy cannot reach an entropy of %.2f bits" % min_entropy)
+        # start from the shortest length that could reach the entropy if there were no limits on the classes
+        length = max(1, self._min_length, int(math.ceil(min_entropy / math.log2(max(2, len(self.alphabet))))))
+        bounded = all(hi is not None for _, _, _, hi in self.classes)
+        while True:
+            count = self._count_table(length)[0][length]
+            if count > 0 and math.log2(count) >= min_entropy:
+                return length
+            if bounded and length >= sum(hi for _, _, _, hi in self.classes):
+                raise ValueError("The password policy cannot reach an entropy of %.2f bits" % min_entropy)
+            length += 1
+
+    def check(self, password):
+        """Checks whether the given password complies with this policy.
+
+        Args:
+            password: The password to check.
+
+        Returns:
+            True if the password complies with this policy, otherwise False.
+        """
+        if len(password) != self.length:
+            return False
+        remaining = len(password)
+        for _, chars, lo, hi in self.classes:
+            k = sum(password.count(ch) for ch in chars)
+            if k < lo or (hi is not None and k > hi):
+                return False
+            remaining -= k
+        return remaining == 0
+
+    def generate(self, pool=None):
+        """Generates a password that complies with this policy.
+
+        Args:
+            pool: The entropy pool from which to draw random bytes. Defaults to the process-wide pool.
+
+        Returns:
+            A string containing the generated password.
+        """
+        pool = pool or get_entropy_pool()
+        if _sinks:
+            with span("policy_chars", pool):
+                return self._generate(pool)
+        return self._generate(pool)
+
+    def _composition_weights(self, i, l):
+        """Returns the cumulative number of ways of filling the last l positions of a password with characters from
+        classes i onwards, for each allowed number of characters from class i (in increasing order)."""
+        weights = self._weights.get((i, l))
+        if weights is None:
+            _, chars, lo, hi = self.classes[i]
+            n = len(chars)
+            following = self._counts[i + 1]
+            top = l if hi is None else min(hi, l)
+            weights = self._weights[(i, l)] = list(
+                accumulate(math.comb(l, k) * n**k * following[l - k] for k in range(lo, top + 1))
+            )
+        return weights
+
+    def _generate(self, pool):
+        password = []
+        l = self.length
+        for i, (_, chars, lo, _) in enumerate(self.classes):
+            # draw the number of characters from this class, weighted by the number of passwords with that many
+            weights = self._composition_weights(i, l)
+            k = lo + bisect_right(weights, pool.randbelow(weights[-1]))
+            password.extend(chars[j] for j in pool.randbelow_many(len(chars), k))
+            l -= k
+
+        # Fisher-Yates shuffle, so that every arrangement of the drawn characters is equally likely. The swap
+        # positions are the mixed-radix digits of a single random integer below len(password)!.
+        r = pool.randbelow(self._arrangements)
+        for i in range(len(password) - 1, 0, -1):
+            r, j = divmod(r, i + 1)
+            password[i], password[j] = password[j], password[i]
+        return "".join(password)
+
+    @classmethod
+    def from_spec(cls, spec, length=None, exclude=None, exclude_ambiguous=False, min_entropy=None):
+        """Builds a policy from a compact specification of the limits on each character class, as given to the
+        --policy option of `passwdgen generate`: a comma-separated list of class=min or class=min-max entries, e.g.
+        "digits=2,special=1-3,upper=1". See the constructor for details on the other parameters.
+
+        Args:
+            spec: The specification of the limits on each character class.
+
+        Returns:
+            A PasswordPolicy.
+        """
+        minimums, maximums = dict(), dict()
+        for entry in spec.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                class_id, limits = entry.split("=")
+                lo, _, hi = limits.partition("-")
+                minimums[class_id.strip()] = int(lo)
+                if hi:
+                    maximums[class_id.strip()] = int(hi)
+            except ValueError:
+                raise ValueError("Invalid password policy entry: %s" % entry)
+        return cls(
+            length=length,
+            minimums=minimums,
+            maximums=maximums,
+            exclude=exclude,
+            exclude_ambiguous=exclude_ambiguous,
+            min_entropy=min_entropy,
+        )
+
+    def __repr__(self):
+        return "PasswordPolicy(length=%d, %s)" % (
+            self.length,
+            ", ".join(
+                "%s=%d-%s" % (class_id, lo, "" if hi is None else hi)
+                for class_id, _, lo, hi in self.classes
+            ),
+        )
+
+
+def _class_order(class_id):
+    """Orders the built-in character classes as in constants.CHARACTER_CLASS_IDS, followed by any others."""
+    if class_id in CHARACTER_CLASS_IDS:
+        return 0, CHARACTER_CLASS_IDS.index(class_id), ""
+    return 1, 0, class_id
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+from itertools import chain
+import os
+import re
+import threading
+
+from .utils import _entry_stat, _loaded_word_lists, load_word_list
+from .wordlist import WordList
+from .constants import *
+
+
+__all__ = [
+    "WordListRegistry",
+    "get_word_list",
+    "register_word_list",
+    "word_list_names",
+]
+
+# registry names may not contain path separators or the union separator
+_valid_name = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _word_list_name(filename):
+    """Works out the registry name of the word list in the given file (without its directory), or returns None if
+    the file isn't a word list."""
+    for extension in WORD_LIST_EXTENSIONS:
+        if filename.endswith(extension) and len(filename) > len(extension):
+            name = filename[: -len(extension)]
+            if name.endswith(WORD_LIST_NAME_SUFFIX) and len(name) > len(WORD_LIST_NAME_SUFFIX):
+                name = name[: -len(WORD_LIST_NAME_SUFFIX)]
+            return name if _valid_name.match(name) else None
+    return None
+
+
+def _find_word_lists(filenames):
+    """Returns a dictionary mapping the names of the word lists among the given file names (those in one directory)
+    to their file names, preferring compiled word lists to plain text ones of the same name."""
+    found = dict()
+    for filename in sorted(filenames):
+        name = _word_list_name(filename)
+        if name is None:
+            continue
+        current = found.get(name)
+        if current is None or _extension_rank(filename) < _extension_rank(current):
+            found[name] = filename
+    return found
+
+
+def _extension_rank(filename):
+    for i, extension in enumerate(WORD_LIST_EXTENSIONS):
+        if filename.endswith(extension):
+            return i
+    return len(WORD_LIST_EXTENSIONS)
+
+
+class WordListRegistry(object):
+    """A registry of named word lists, e.g. one per language, so that a long-running process can generate
+    passphrases from any of them by name. Word lists are discovered (without being loaded) in passwdgen's bundled
+    data, in the directories listed in the constants.WORD_LIST_PATH_ENV environment variable, and in any other
+    directories given, and can also be registered explicitly (see register()).
+
+    Each word list is only loaded the first time it is used, through load_word_list(), so all of the word lists in
+    use share the same memory budget (constants.LOADED_WORD_LISTS_MAX_BYTES): the least recently used ones are
+    discarded (and loaded again when next needed) once they take up more than that between them. Each word's
+    Unicode normalization form (constants.WORD_LIST_NORMALIZATION) is fixed once, as the word list is loaded, and
+    several word lists can be combined by joining their names with constants.WORD_LIST_UNION_SEPARATOR (e.g.
+    "de+fr").
+
+    Where several word lists share the same name, explicitly registered ones take precedence over those found in
+    directories, which in turn take precedence (in order) over the bundled ones.
+    """
+
+    def __init__(self, directories=None, include_bundled=True):
+        """Constructor.
+
+        Args:
+            directories: The directories to search for word lists. If not specified, the directories listed in the
+                constants.WORD_LIST_PATH_ENV environment variable are searched.
+            include_bundled: Whether or not to include the word lists bundled with passwdgen (e.g. the default
+                one).
+        """
+        if directories is None:
+            directories = [path for path in os.environ.get(WORD_LIST_PATH_ENV, "").split(os.pathsep) if path]
+        self.directories = list(directories)
+        self.include_bundled = include_bundled
+        # name -> (filename, resource, encoding)
+        self._registered = dict()
+        self._discovered = None
+        self._lock = threading.Lock()
+
+    def register(self, name, path, encoding=None):
+        """Registers a word list under the given name, replacing any other word list of the same name.
+
+        Args:
+            name: The word list's name, consisting of letters, digits, dashes, underscores and periods.
+            path: The path to a plain text or compiled word list.
+            encoding: The encoding of the word list (default: constants.WORD_LIST_ENCODING).
+        """
+        if not _valid_name.match(name):
+            raise ValueError("Invalid word list name: %r" % name)
+        with self._lock:
+            self._registered[name] = (os.path.abspath(os.fspath(path)), None, encoding)
+
+    def refresh(self):
+        """Discards the names of the word lists discovered so far, so that word lists added to (or removed from)
+        the registry's directories are picked up the next time the registry is used."""
+        with self._lock:
+            self._discovered = None
+
+    def _entries(self):
+        with self._lock:
+            if self._discovered is None:
+                discovered = dict()
+                if self.include_bundled:
+                    import importlib.resources
+
+                    data_dir = importlib.resources.files("passwdgen").joinpath(WORD_LIST_DATA_DIR)
+                    filenames = [entry.name for entry in data_dir.iterdir()] if data_dir.is_dir() else []
+                    for name, filename in _find_word_lists(filenames).items():
+                        discovered[name] = (None, "%s/%s" % (WORD_LIST_DATA_DIR, filename), None)
+                for directory in reversed(self.directories):
+                    try:
+                        filenames = os.listdir(directory)
+                    except OSError:
+                        # directories that don't exist (yet) simply don't contribute any word lists
+                        continue
+                    for name, filename in _find_word_lists(filenames).items():
+                        discovered[name] = (os.path.abspath(os.path.join(directory, filename)), None, None)
+                self._discovered = discovered
+            entries = dict(self._discovered)
+            entries.update(self._registered)
+            return entries
+
+    def names(self):
+        """Returns the sorted names of all of the word lists in the registry."""
+        return sorted(self._entries())
+
+    def path(self, name):
+        """Returns the path of the file from which the word list of the given name is loaded."""
+        return self._path(self._entry(name))
+
+    def __contains__(self, name):
+        entries = self._entries()
+        return all(part in entries for part in name.split(WORD_LIST_UNION_SEPARATOR))
+
+    def _entry(self, name):
+        entry = self._entries().get(name)
+        if entry is None:
+            raise ValueError(
+                "Unknown word list: %s (available word lists: %s)" % (name, ", ".join(self.names()) or "none")
+            )
+        return entry
+
+    @staticmethod
+    def _path(entry):
+        filename, resource, _ = entry
+        if filename is not None:
+            return filename
+        import importlib.resources
+
+        return str(importlib.resources.files("passwdgen").joinpath(resource))
+
+    def load(self, name, encoding=None):
+        """Loads the named word list, or the union of several word lists given their names joined by
+        constants.WORD_LIST_UNION_SEPARATOR (e.g. "de+fr").
+
+        Args:
+            name: The name(s) of the word list(s) to load.
+            encoding: The encoding of the word list(s) (default: the encoding each was registered with, or
+                constants.WORD_LIST_ENCODING).
+
+        Returns:
+            A WordList.
+        """
+        names = sorted(set(name.split(WORD_LIST_UNION_SEPARATOR)))
+        entries = [self._entry(part) for part in names]
+        if len(entries) == 1:
+            return self._load(entries[0], encoding)
+
+        # unions are cached alongside the word lists they're made of, and are loaded again if any of those change
+        paths = tuple(self._path(entry) for entry in entries)
+        key = (paths, None, encoding, WORD_LIST_NORMALIZATION)
+        word_list = _loaded_word_lists.get(key)
+        if word_list is not None:
+            return word_list
+        file_stat = _entry_stat(paths)
+        word_list = WordList.from_words(chain.from_iterable(self._load(entry, encoding) for entry in entries))
+        _loaded_word_lists.put(key, word_list, paths, file_stat)
+        return word_list
+
+    @staticmethod
+    def _load(entry, encoding):
+        filename, resource, entry_encoding = entry
+        return load_word_list(
+            filename=filename,
+            resource=resource,
+            encoding=encoding or entry_encoding or WORD_LIST_ENCODING,
+            normalization=WORD_LIST_NORMALIZATION,
+        )
+
+    def __repr__(self):
+        return "WordListRegistry(%r)" % self.directories
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def _registry():
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = WordListRegistry()
+        return _default_registry
+
+
+def get_word_list(name, encoding=None):
+    """Loads a word list by name from the process-wide registry (see WordListRegistry.load()).
+
+    Args:
+        name: The name of the word list, or the names of several word lists joined by
+            constants.WORD_LIST_UNION_SEPARATOR to load their union (e.g. "de+fr").
+        encoding: The encoding of the word list(s) (default: constants.WORD_LIST_ENCODING).
+
+    Returns:
+        A WordList.
+    """
+    return _registry().load(name, encoding=encoding)
+
+
+def register_word_list(name, path, encoding=None):
+    """Registers a word list under the given name in the process-wide registry (see WordListRegistry.register())."""
+    _registry().register(name, path, encoding=encoding)
+
+
+def word_list_names():
+    """Returns the sorted names of all of the word lists in the process-wide registry."""
+    return _registry().names()
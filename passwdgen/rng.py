@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import binascii
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+import threading
+import weakref
+
+from .constants import *
+
+
+__all__ = [
+    "EntropyPool",
+    "get_entropy_pool",
+    "sampling_unit",
+]
+
+_uint64 = struct.Struct("<Q")
+
+# how many extra bits per draw to consider beyond the minimum when looking for the cheapest sampling unit
+_MAX_EXTRA_UNIT_BITS = 16
+
+# ways of splitting random bytes into u-bit symbols at C speed: u -> (encoder, symbol alphabet, input bytes that
+# encode without padding)
+_symbol_encoders = {
+    4: (binascii.hexlify, b"0123456789abcdef", 1),
+    5: (base64.b32encode, b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", 5),
+    6: (
+        base64.b64encode,
+        b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+        3,
+    ),
+    8: (None, bytes(range(256)), 1),
+}
+_symbol_unit_sizes = tuple(sorted(_symbol_encoders))
+
+# below this many draws, randbelow_many() draws each value separately
+_MIN_BULK_DRAWS = 16
+
+
+@lru_cache(maxsize=1024)
+def sampling_unit(n, unit_sizes=None):
+    """Works out how to draw uniformly distributed integers in the range [0, n) using as few random bits as
+    possible on average. Each draw takes a fixed number of random bits u, and is accepted if its value falls below
+    the largest multiple of n that fits in u bits (limit), and rejected and redrawn otherwise. Accepted draws are
+    reduced modulo n. Since every value below limit is equally likely, and limit is a multiple of n, every
+    result is equally likely.
+
+    The smallest possible u wastes the fewest bits per draw, but may reject many draws (e.g. for n = 65, 7-bit
+    draws are rejected almost half of the time). Slightly larger units can reject far fewer draws, so the unit
+    size with the lowest expected number of bits per accepted draw is chosen.
+
+    Args:
+        n: The (exclusive) upper bound of the range, n >= 1.
+        unit_sizes: Optionally, a tuple of the only unit sizes (in bits) to consider.
+
+    Returns:
+        A (u, limit) tuple.
+    """
+    if n < 1:
+        raise ValueError("Cannot sample from an empty range")
+    if n == 1:
+        return 0, 1
+    min_bits = (n - 1).bit_length()
+    if unit_sizes is None:
+        unit_sizes = range(min_bits, min_bits + _MAX_EXTRA_UNIT_BITS + 1)
+    best = None
+    for bits in unit_sizes:
+        if bits < min_bits:
+            continue
+        limit = n * ((1 << bits) // n)
+        # expected number of bits consumed per accepted draw, compared without floating point rounding
+        cost = (bits << bits, limit)
+        if best is None or cost[0] * best[1][1] < best[1][0] * cost[1]:
+            best = ((bits, limit), cost)
+    if best is None:
+        raise ValueError("None of the given unit sizes can represent %d values" % n)
+    return best[0]
+
+# all live pools, so that their buffered entropy can be discarded in a child process after a fork
+_pools = weakref.WeakSet()
+
+
+class EntropyPool(object):
+    """A thread-safe, buffered source of cryptographically secure random bytes. Rather than making one
+    os.urandom() call per random value, large blocks are read from the operating system at once and random
+    values are served directly from the buffer until it runs out.
+
+    After a fork, any bytes buffered by the parent are discarded in the child process, so that parent and
+    child never hand out the same random values.
+    """
+
+    def __init__(self, block_size=None):
+        """Constructor.
+
+        Args:
+            block_size: The number of bytes to read from the operating system whenever the buffer needs to be
+                refilled. Defaults to constants.DEFAULT_ENTROPY_POOL_BLOCK_SIZE.
+        """
+        if block_size is None:
+            block_size = DEFAULT_ENTROPY_POOL_BLOCK_SIZE
+        if block_size < 8:
+            raise ValueError("Entropy pool block size must be at least 8 bytes")
+        self.block_size = block_size
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._buffer = memoryview(b"")
+        self._offset = 0
+        # random bits left over from previous draws, and how many of them there are
+        self._bits = 0
+        self._nbits = 0
+        # the total number of random bytes handed out by this pool, and the number of times it read from the OS
+        self.bytes_consumed = 0
+        self.syscalls = 0
+
+    def _reserve(self, n):
+        """Ensures that at least n bytes are available in the buffer, and returns the offset of the first of
+        them. Must be called with the lock held."""
+        offset = self._offset
+        if len(self._buffer) - offset < n:
+            # whatever is left over in the current block is simply discarded
+            self._buffer = memoryview(os.urandom(max(self.block_size, n)))
+            self.syscalls += 1
+            offset = 0
+        self._offset = offset + n
+        self.bytes_consumed += n
+        return offset
+
+    def read(self, n):
+        """Reads n random bytes from the pool.
+
+        Args:
+            n: The number of bytes to read.
+
+        Returns:
+            A bytes object of length n.
+        """
+        with self._lock:
+            offset = self._reserve(n)
+            return self._buffer[offset : offset + n].tobytes()
+
+    def uint64(self):
+        """Draws a random unsigned 64-bit integer from the pool.
+
+        Returns:
+            A random integer i, with 0 <= i < 2**64.
+        """
+        with self._lock:
+            offset = self._reserve(8)
+            return _uint64.unpack_from(self._buffer, offset)[0]
+
+    def uint64s(self, count):
+        """Draws many random unsigned 64-bit integers from the pool in one bulk read.
+
+        Args:
+            count: The number of integers to draw.
+
+        Returns:
+            An array (of typecode "Q") containing count random integers, each with 0 <= i < 2**64.
+        """
+        values = array("Q", self.read(8 * count))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def _randbits(self, k):
+        """Draws k random bits from the pool, keeping any bits left over for subsequent draws. Must be called
+        with the lock held."""
+        bits, nbits = self._bits, self._nbits
+        while nbits < k:
+            offset = self._reserve(8)
+            bits |= _uint64.unpack_from(self._buffer, offset)[0] << nbits
+            nbits += 64
+        self._bits = bits >> k
+        self._nbits = nbits - k
+        return bits & ((1 << k) - 1)
+
+    def randbits(self, k):
+        """Draws a random integer with k random bits. Unlike uint64(), this consumes only k bits from the pool.
+
+        Args:
+            k: The number of random bits to draw, k >= 0.
+
+        Returns:
+            A random integer i, with 0 <= i < 2**k.
+        """
+        with self._lock:
+            return self._randbits(k)
+
+    def randbelow(self, n):
+        """Draws an unbiased, uniformly distributed random integer below n, using rejection sampling and as few
+        random bits as possible (see sampling_unit()).
+
+        Args:
+            n: The (exclusive) upper bound of the random integer, n >= 1.
+
+        Returns:
+            A random integer i, with 0 <= i < n.
+        """
+        bits, limit = sampling_unit(n)
+        with self._lock:
+            value = self._randbits(bits)
+            while value >= limit:
+                value = self._randbits(bits)
+        return value % n
+
+    def randbelow_many(self, n, count):
+        """Draws many unbiased, uniformly distributed random integers below n at once. This is equivalent to
+        calling randbelow() count times, but much faster.
+
+        Args:
+            n: The (exclusive) upper bound of the random integers, n >= 1.
+            count: The number of random integers to draw.
+
+        Returns:
+            A list of count random integers, each with 0 <= i < n.
+        """
+        bits, limit = sampling_unit(n)
+        if bits == 0:
+            return [0] * count
+        if count < _MIN_BULK_DRAWS:
+            # not worth drawing a whole block of 64 values
+            return [self.randbelow(n) for _ in range(count)]
+        mask = (1 << bits) - 1
+        # a block of 8 * bits bytes holds exactly 64 draws
+        block_size = 8 * bits
+        shifts = range(0, 64 * bits, bits)
+        from_bytes = int.from_bytes
+
+        result = []
+        while len(result) < count:
+            missing = count - len(result)
+            # enough blocks to cover the expected number of rejections
+            blocks = (missing << bits) // (64 * limit) + 1
+            data = self.read(blocks * block_size)
+            draws = []
+            for offset in range(0, len(data), block_size):
+                block = from_bytes(data[offset : offset + block_size], "little")
+                draws.extend([(block >> shift) & mask for shift in shifts])
+            result.extend([value % n for value in draws if value < limit])
+        del result[count:]
+        return result
+
+    def randbelow_bytes(self, n, count):
+        """Draws many unbiased, uniformly distributed random integers below n (where n <= 256) at once, returned as
+        the bytes of a bytes object. Random bytes are split into 4-, 5-, 6- or 8-bit symbols (whichever wastes the
+        fewest bits for n) by the hex, base32 and base64 encoders, and rejected and reduced modulo n by a single
+        bytes.translate() call, so that no per-draw Python code runs at all.
+
+        Args:
+            n: The (exclusive) upper bound of the random integers, 1 <= n <= 256.
+            count: The number of random integers to draw.
+
+        Returns:
+            A bytes object of length count, each byte b of which has 0 <= b < n.
+        """
+        bits, limit = sampling_unit(n, _symbol_unit_sizes)
+        if bits == 0:
+            return bytes(count)
+        encode, alphabet, block_size = _symbol_encoders[bits]
+        table = bytearray(256)
+        for value, symbol in enumerate(alphabet):
+            table[symbol] = value % n
+        rejected = bytes(alphabet[limit:])
+
+        result = b""
+        while len(result) < count:
+            missing = count - len(result)
+            # enough bytes to cover the expected number of rejections, rounded up to a whole number of blocks
+            size = ((missing * bits << bits) // (8 * limit)) + block_size
+            size -= size % block_size
+            symbols = self.read(size)
+            if encode is not None:
+                symbols = encode(symbols)
+            result += symbols.translate(table, rejected)
+        return result[:count]
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+_default_pool = EntropyPool()
+
+
+def get_entropy_pool():
+    """Returns the process-wide entropy pool used by default for all random number generation in passwdgen."""
+    return _default_pool
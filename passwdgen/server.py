@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+from functools import partial
+import json
+import os
+import socket
+import stat
+import tempfile
+
+from .generator import _char_password_length, _password_word_count, chars_batch, words_batch
+from .utils import load_word_list
+from .constants import *
+
+
+__all__ = [
+    "PasswordServer",
+    "PasswordClient",
+    "default_server_socket_path",
+]
+
+# the generate options that may be given in a request to the password server
+_REQUEST_OPTIONS = frozenset(
+    ["id", "charset", "length", "min_entropy", "separator", "starting_letters", "count"]
+)
+
+
+def default_server_socket_path():
+    """Returns the path of the Unix domain socket on which the password server listens by default. This can be
+    overridden through the PASSWDGEN_SOCKET environment variable, and otherwise lives in the user's runtime
+    directory (or, failing that, in a private directory within the system's temporary directory)."""
+    if os.environ.get(SERVER_SOCKET_ENV):
+        return os.environ[SERVER_SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "passwdgen.sock")
+    return os.path.join(_private_socket_dir(), "passwdgen.sock")
+
+
+def _uid():
+    return os.getuid() if hasattr(os, "getuid") else 0
+
+
+def _private_socket_dir():
+    """Returns the directory within the (world-writable) temporary directory in which the default socket is kept
+    when there's no runtime directory. Only the user running the server may have access to it, since anyone else
+    who could create the socket in it first could hand out passwords of their choosing."""
+    return os.path.join(tempfile.gettempdir(), "passwdgen-%d" % _uid())
+
+
+def _check_private(path, file_type, description):
+    """Checks that the given path (which isn't followed if it's a symlink) is a file of the given type (e.g.
+    stat.S_ISSOCK), owned by the current user and inaccessible to anyone else.
+
+    Raises:
+        ValueError: If it isn't.
+    """
+    path_stat = os.lstat(path)
+    if not file_type(path_stat.st_mode):
+        raise ValueError("Not a %s: %s" % (description, path))
+    if path_stat.st_uid != _uid() or stat.S_IMODE(path_stat.st_mode) & 0o077:
+        raise ValueError(
+            "Refusing to use %s %s, which is owned by another user or accessible by others" % (description, path)
+        )
+
+
+def _check_socket(socket_path):
+    """Checks that the given socket (and, for the default socket outside of the runtime directory, the private
+    directory containing it) belongs to the current user and can't be used by anyone else, before connecting to
+    it. See _check_private()."""
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    if socket_dir == _private_socket_dir():
+        _check_private(socket_dir, stat.S_ISDIR, "directory")
+    _check_private(socket_path, stat.S_ISSOCK, "socket")
+
+
+def _check_int(request, name, minimum):
+    value = request.get(name)
+    if value is not None and (
+        isinstance(value, bool) or not isinstance(value, int) or value < minimum
+    ):
+        raise ValueError('"%s" must be an integer >= %d' % (name, minimum))
+    return value
+
+
+def _check_size(count, size):
+    """Checks that the number of characters or words in each of the requested passwords, and in all of them
+    together, is within the server's limits."""
+    if size > SERVER_MAX_PASSWORD_LENGTH:
+        raise ValueError("Passwords may be at most %d characters or words long" % SERVER_MAX_PASSWORD_LENGTH)
+    if count * size > SERVER_MAX_REQUEST_OUTPUT:
+        raise ValueError(
+            "At most %d characters or words may be requested at a time" % SERVER_MAX_REQUEST_OUTPUT
+        )
+
+
+class PasswordServer(object):
+    """A long-running password generation server, which keeps its word list loaded so that passwords can be
+    generated without paying for interpreter startup and word list loading on every request.
+
+    The server speaks a simple line-based protocol: each request is a JSON object on a line of its own, with
+    any of the options of `passwdgen generate` (charset, length, min_entropy, separator, starting_letters and
+    count), plus an optional id. Each response is a JSON object on a line of its own, containing the request's id
+    and either the generated passwords or an error message. Requests may be pipelined (i.e. sent without waiting
+    for the responses to previous requests), and are always answered in order.
+    """
+
+    def __init__(self, word_list=None):
+        """Constructor.
+
+        Args:
+            word_list: The word list from which to generate word-based passwords. Defaults to the built-in one.
+        """
+        self.word_list = load_word_list() if word_list is None else word_list
+
+    def generate(self, request):
+        """Generates the passwords described by the given request.
+
+        Args:
+            request: A dictionary of generate options (see the class documentation).
+
+        Returns:
+            A list of passwords.
+        """
+        return self._plan(request)[0]()
+
+    def _plan(self, request):
+        """Validates the given request, working out how to generate the passwords it describes without actually
+        generating them.
+
+        Returns:
+            A (generate, size) tuple, where generate is a function of no arguments which generates the passwords,
+            and size is the total number of characters or words to be generated.
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Requests must be JSON objects")
+        unknown = set(request).difference(_REQUEST_OPTIONS)
+        if unknown:
+            raise ValueError("Unrecognised request option(s): %s" % ", ".join(sorted(unknown)))
+
+        count = _check_int(request, "count", 1)
+        count = 1 if count is None else count
+        if count > SERVER_MAX_PASSWORDS_PER_REQUEST:
+            raise ValueError(
+                "At most %d passwords may be requested at a time" % SERVER_MAX_PASSWORDS_PER_REQUEST
+            )
+        length = _check_int(request, "length", 0)
+        min_entropy = request.get("min_entropy")
+        if min_entropy is not None and (
+            isinstance(min_entropy, bool)
+            or not isinstance(min_entropy, (int, float))
+            or not 0 <= min_entropy <= SERVER_MAX_MIN_ENTROPY
+        ):
+            raise ValueError('"min_entropy" must be a number between 0 and %d' % SERVER_MAX_MIN_ENTROPY)
+
+        charset = request.get("charset", PC_DICT)
+        if not isinstance(charset, str):
+            raise ValueError('"charset" must be a string')
+        if charset != PC_DICT:
+            if charset not in PASSWORD_CHARSETS:
+                raise ValueError("Unrecognised charset: %s" % charset)
+            size = _char_password_length(len(PASSWORD_CHARSETS[charset]), length, min_entropy)
+            _check_size(count, size)
+            return partial(chars_batch, count, charset, length=length, min_entropy=min_entropy), count * size
+
+        separator = request.get("separator", SEP_DASH)
+        if not isinstance(separator, str) or separator not in PASSWORD_SEPARATORS:
+            raise ValueError("Unrecognised separator: %s" % separator)
+        starting_letters = request.get("starting_letters")
+        if starting_letters is not None and not (
+            isinstance(starting_letters, str)
+            or (
+                isinstance(starting_letters, list)
+                and all(isinstance(prefix, str) for prefix in starting_letters)
+            )
+        ):
+            raise ValueError('"starting_letters" must be a string or a list of strings')
+        size = _password_word_count(len(self.word_list), length, min_entropy, starting_letters)
+        if starting_letters is not None:
+            size = max(size, len(starting_letters))
+        _check_size(count, size)
+        generate = partial(
+            words_batch,
+            count,
+            self.word_list,
+            separator=PASSWORD_SEPARATORS[separator],
+            word_count=length,
+            min_entropy=min_entropy,
+            starting_letters=starting_letters,
+        )
+        return generate, count * size
+
+    def _prepare(self, line):
+        """Parses and validates a single request line.
+
+        Returns:
+            A (request_id, generate, size, error) tuple, where generate and size are as returned by _plan(), and
+            error is the message to respond with instead if the request is invalid.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get("id")
+            generate, size = self._plan(request)
+        except Exception as e:
+            # this includes JSON decoding errors
+            return request_id, None, 0, str(e)
+        return request_id, generate, size, None
+
+    def _answer(self, request_id, generate, error):
+        """Generates the passwords for a request prepared by _prepare(), returning the encoded response line."""
+        if error is None:
+            try:
+                response = {"id": request_id, "passwords": generate()}
+            except Exception as e:
+                # no request may take down the connection (or the server)
+                response = {"id": request_id, "error": str(e)}
+        else:
+            response = {"id": request_id, "error": error}
+        return (json.dumps(response) + "\n").encode("utf-8")
+
+    def respond(self, line):
+        """Handles a single request line, returning the encoded response line."""
+        request_id, generate, _, error = self._prepare(line)
+        return self._answer(request_id, generate, error)
+
+    async def _handle_connection(self, reader, writer):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        pending = b""
+        try:
+            while True:
+                data = await reader.read(SERVER_READ_SIZE)
+                if not data:
+                    break
+                # answer all of the (pipelined) requests received so far in one go
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                if len(pending) > SERVER_MAX_REQUEST_SIZE:
+                    break
+                responses = []
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    request_id, generate, size, error = self._prepare(line)
+                    if size > SERVER_EXECUTOR_MIN_SIZE:
+                        # large requests are answered on a worker thread, so as not to hold up other clients
+                        responses.append(
+                            await loop.run_in_executor(None, self._answer, request_id, generate, error)
+                        )
+                    else:
+                        responses.append(self._answer(request_id, generate, error))
+                writer.write(b"".join(responses))
+                # only actually waits if the client isn't reading its responses
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, socket_path=None, host=None, port=None):
+        """Starts listening for connections, either on a Unix domain socket (the default) or, if a port is
+        given, on a TCP socket.
+
+        Args:
+            socket_path: The path of the Unix domain socket on which to listen. Defaults to
+                default_server_socket_path().
+            host: The host on which to listen for TCP connections (default: 127.0.0.1).
+            port: The TCP port on which to listen.
+
+        Returns:
+            An asyncio.Server.
+        """
+        # imported here rather than at module level, so that clients don't pay for importing asyncio
+        import asyncio
+
+        if port is not None:
+            return await asyncio.start_server(
+                self._handle_connection, host or "127.0.0.1", port
+            )
+
+        if socket_path is None:
+            socket_path = default_server_socket_path()
+        socket_dir = os.path.dirname(os.path.abspath(socket_path))
+        if socket_dir == _private_socket_dir():
+            try:
+                os.mkdir(socket_dir, 0o700)
+            except FileExistsError:
+                pass
+        _remove_stale_socket(socket_path)
+        # the socket must only be accessible by the user running the server, since anyone who can connect to it
+        # can obtain passwords from it
+        old_umask = os.umask(0o177)
+        try:
+            return await asyncio.start_unix_server(self._handle_connection, socket_path)
+        finally:
+            os.umask(old_umask)
+
+    def serve(self, socket_path=None, host=None, port=None, ready=None):
+        """Runs the server until interrupted (or until the asyncio.Server passed to ready is closed). See start()
+        for details on the parameters.
+
+        Args:
+            ready: An optional function to call with the asyncio.Server once the server is listening.
+        """
+        import asyncio
+
+        if port is None and socket_path is None:
+            socket_path = default_server_socket_path()
+        listening = []
+
+        async def run():
+            server = await self.start(socket_path=socket_path, host=host, port=port)
+            listening.append(server)
+            if ready is not None:
+                ready(server)
+            async with server:
+                try:
+                    await server.serve_forever()
+                except asyncio.CancelledError:
+                    # the server was closed
+                    pass
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # only clean up the socket if it's ours (i.e. if another server wasn't already listening on it)
+            if listening and port is None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def _remove_stale_socket(socket_path):
+    """Removes a socket file left behind by a server that is no longer running, refusing to take over from one
+    that is, or to touch one that may belong to someone else (see _check_socket())."""
+    try:
+        _check_socket(socket_path)
+    except FileNotFoundError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise ValueError("A password server is already listening on %s" % socket_path)
+
+
+class PasswordClient(object):
+    """A thin client for the password server (see PasswordServer)."""
+
+    def __init__(self, socket_path=None, host=None, port=None, timeout=None):
+        """Constructor. Connects to the server straight away.
+
+        Args:
+            socket_path: The path of the server's Unix domain socket. Defaults to default_server_socket_path().
+            host: The host of a server listening on a TCP socket (default: 127.0.0.1).
+            port: The TCP port of a server listening on a TCP socket.
+            timeout: An optional timeout, in seconds, for socket operations.
+        """
+        if port is not None:
+            self._socket = socket.create_connection((host or "127.0.0.1", port), timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            socket_path = socket_path or default_server_socket_path()
+            # otherwise another user could stand in for the server (e.g. by creating the socket first)
+            _check_socket(socket_path)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(socket_path)
+        self._file = self._socket.makefile("rwb")
+
+    def request_many(self, requests):
+        """Sends the given requests to the server all at once (without waiting for the responses in between), and
+        then reads all of the responses.
+
+        Args:
+            requests: A list of request dictionaries (see PasswordServer).
+
+        Returns:
+            A list of response dictionaries, in the same order as the requests.
+        """
+        self._file.write(
+            "".join(json.dumps(request) + "\n" for request in requests).encode("utf-8")
+        )
+        self._file.flush()
+        responses = []
+        for _ in requests:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("The password server closed the connection")
+            responses.append(json.loads(line))
+        return responses
+
+    def generate(self, **options):
+        """Requests passwords from the server.
+
+        Args:
+            options: Any of the request options (see PasswordServer).
+
+        Returns:
+            A list of passwords.
+        """
+        response = self.request_many([options])[0]
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["passwords"]
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from itertools import product
+import math
+import re
+import threading
+import weakref
+
+from .instrument import _sinks, span
+from .utils import load_word_list
+from .wordlist import _require_word_list
+from .constants import *
+
+
+__all__ = ["estimate_strength"]
+
+# the Aho-Corasick automata built over each word list, which are kept for as long as the word list is in use
+_automata = weakref.WeakKeyDictionary()
+_automata_lock = threading.Lock()
+
+# the cardinality assumed for characters in none of the character classes (e.g. accented letters)
+_OTHER_CARDINALITY = 100
+
+# the rows of a US QWERTY keyboard, unshifted and shifted
+_KEYBOARD_ROWS = [
+    ("`1234567890-=", "~!@#$%^&*()_+"),
+    ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+    ("asdfghjkl;'", 'ASDFGHJKL:"'),
+    ("zxcvbnm,./", "ZXCVBNM<>?"),
+]
+
+# separated dates, e.g. 25/12/1999, 1999-12-25 or 25.12.99
+_SEPARATED_DATE = re.compile(r"(?<!\d)(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})(?!\d)")
+
+# runs of digits, within which unseparated dates (e.g. 251299 or 19991225) are looked for
+_DIGIT_RUN = re.compile(r"\d{4,}")
+
+# repeated characters or substrings, with the shortest base that repeats
+_REPEAT = re.compile(r"(.+?)\1+", re.DOTALL)
+
+
+class _Automaton(object):
+    """An Aho-Corasick automaton over the (lowercased) words of a word list, which finds every dictionary word
+    within a string in a single pass over it. Transitions are kept in one dictionary keyed by (state, character)
+    pairs packed into integers, and the per-state data in arrays, so the automaton costs a few tens of bytes per
+    state."""
+
+    def __init__(self, words, min_length):
+        goto = dict()
+        depth = array("l", [0])
+        # the length of the word ending at each state (0 if none does)
+        lengths = array("l", [0])
+        for word in words:
+            if len(word) < min_length:
+                continue
+            state = 0
+            for ch in word.lower():
+                key = (state << 21) | ord(ch)
+                child = goto.get(key)
+                if child is None:
+                    child = goto[key] = len(depth)
+                    depth.append(depth[state] + 1)
+                    lengths.append(0)
+                state = child
+            lengths[state] = len(word)
+
+        # failure links (the state of the longest proper suffix that is also in the trie) are worked out a level of
+        # the trie at a time, since each depends on the failure links of the states above it
+        levels = dict()
+        for key, child in goto.items():
+            levels.setdefault(depth[child], []).append((key >> 21, key & 0x1FFFFF, child))
+        fail = array("l", [0]) * len(depth)
+        # the nearest state along the chain of failure links at which a word ends (0 if there is none)
+        outputs = array("l", [0]) * len(depth)
+        for level in sorted(levels):
+            for parent, code, child in levels[level]:
+                target = 0
+                if parent != 0:
+                    state = fail[parent]
+                    while True:
+                        target = goto.get((state << 21) | code)
+                        if target is not None:
+                            break
+                        if state == 0:
+                            target = 0
+                            break
+                        state = fail[state]
+                fail[child] = target
+                outputs[child] = target if lengths[target] else outputs[target]
+
+        self._goto = goto
+        self._fail = fail
+        self._lengths = lengths
+        self._outputs = outputs
+
+    def find(self, text):
+        """Yields the (start, end) indices of every occurrence of a word in the given (lowercased) text."""
+        goto, fail, lengths, outputs = self._goto, self._fail, self._lengths, self._outputs
+        state = 0
+        for end, ch in enumerate(text, 1):
+            code = ord(ch)
+            while True:
+                child = goto.get((state << 21) | code)
+                if child is not None:
+                    state = child
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            match = state if lengths[state] else outputs[state]
+            while match:
+                yield end - lengths[match], end
+                match = outputs[match]
+
+
+def _automaton(word_list):
+    """Returns the Aho-Corasick automaton over the given word list, building it on first use."""
+    automaton = _automata.get(word_list)
+    if automaton is None:
+        with _automata_lock:
+            automaton = _automata.get(word_list)
+            if automaton is None:
+                automaton = _automata[word_list] = _Automaton(word_list, STRENGTH_MIN_MATCH_LENGTH)
+    return automaton
+
+
+def _keyboard():
+    """Works out the position of each key on the keyboard, and the mean number of neighbours of each key."""
+    positions = dict()
+    for row, (unshifted, shifted) in enumerate(_KEYBOARD_ROWS):
+        for col, (key, shifted_key) in enumerate(zip(unshifted, shifted)):
+            positions[key] = (row, col, False)
+            positions[shifted_key] = (row, col, True)
+    keys = set((row, col) for row, col, _ in positions.values())
+    # the rows are staggered, so each key touches two keys in the row above and two in the row below
+    directions = [(0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0)]
+    degree = sum(
+        sum((row + dr, col + dc) in keys for dr, dc in directions) for row, col in keys
+    ) / len(keys)
+    return positions, directions, len(keys), degree
+
+
+_KEY_POSITIONS, _KEY_DIRECTIONS, _KEY_COUNT, _KEY_DEGREE = _keyboard()
+
+
+# the character class of each character in one of them
+_CHAR_CLASSES = dict(
+    (ch, class_id) for class_id, chars in CHARACTER_CLASSES.items() for ch in chars
+)
+
+
+def _cardinality(password):
+    """The number of characters an attacker brute-forcing the password would have to try at each position."""
+    return sum(
+        len(CHARACTER_CLASSES[class_id]) if class_id is not None else _OTHER_CARDINALITY
+        for class_id in set(_CHAR_CLASSES.get(ch) for ch in password)
+    )
+
+
+def _log2_combinations(n, k_max):
+    """log2 of the number of ways of choosing between 1 and k_max of n items."""
+    return math.log2(sum(math.comb(n, k) for k in range(1, k_max + 1)))
+
+
+def _case_entropy(token):
+    """The entropy added by the capitalisation of a word, i.e. the number of bits needed to say which of its
+    letters are uppercase, with the common capitalisations (none, the first letter, or all letters) costing less."""
+    upper = sum(ch.isupper() for ch in token)
+    lower = sum(ch.islower() for ch in token)
+    if upper == 0:
+        return 0.0
+    if lower == 0 or (upper == 1 and (token[0].isupper() or token[-1].isupper())):
+        return 1.0
+    return _log2_combinations(upper + lower, min(upper, lower))
+
+
+def _l33t_entropy(token, word):
+    """The entropy added by the l33t substitutions that turn the given word into the given token."""
+    entropy = 0.0
+    for letter in set(word):
+        subbed = sum(1 for a, b in zip(token.lower(), word) if b == letter and a != letter)
+        if subbed:
+            unsubbed = sum(1 for a, b in zip(token.lower(), word) if b == letter and a == letter)
+            entropy += 1.0 if not unsubbed else _log2_combinations(subbed + unsubbed, min(subbed, unsubbed))
+    return entropy
+
+
+def _l33t_variants(lowered):
+    """Yields the ways of undoing l33t substitutions in the given (lowercased) password, as translated strings."""
+    candidates = []
+    for ch in sorted(set(lowered)):
+        letters = [letter for letter, subs in L33T_SUBSTITUTIONS.items() if ch in subs]
+        if letters:
+            candidates.append((ch, letters))
+    if not candidates:
+        return
+    for count, choice in enumerate(product(*[letters for _, letters in candidates])):
+        if count >= STRENGTH_MAX_L33T_VARIANTS:
+            return
+        table = dict((ord(ch), letter) for (ch, _), letter in zip(candidates, choice))
+        yield lowered.translate(table)
+
+
+def _dictionary_matches(password, word_list):
+    word_entropy = math.log2(len(word_list))
+    automaton = _automaton(word_list)
+    lowered = password.lower()
+    matches = dict()
+
+    def add(start, end, entropy, pattern, **details):
+        match = matches.get((start, end))
+        if match is None or entropy < match["entropy"]:
+            details.update(pattern=pattern, start=start, end=end, entropy=entropy)
+            matches[(start, end)] = details
+
+    for start, end in automaton.find(lowered):
+        token = password[start:end]
+        add(start, end, word_entropy + _case_entropy(token), STRENGTH_PATTERN_DICTIONARY, word=lowered[start:end])
+    # words spelt backwards cost an extra bit
+    n = len(password)
+    for start, end in automaton.find(lowered[::-1]):
+        start, end = n - end, n - start
+        token = password[start:end]
+        add(
+            start,
+            end,
+            word_entropy + _case_entropy(token) + 1.0,
+            STRENGTH_PATTERN_DICTIONARY,
+            word=lowered[start:end][::-1],
+            reversed=True,
+        )
+    for variant in _l33t_variants(lowered):
+        for start, end in automaton.find(variant):
+            word = variant[start:end]
+            if word == lowered[start:end]:
+                continue
+            token = password[start:end]
+            add(
+                start,
+                end,
+                word_entropy + _case_entropy(token) + _l33t_entropy(token, word),
+                STRENGTH_PATTERN_L33T,
+                word=word,
+            )
+    return list(matches.values())
+
+
+def _keyboard_matches(password):
+    matches = []
+    n = len(password)
+    start = 0
+    while start < n - 1:
+        end = start + 1
+        turns, last_direction = 0, None
+        while end < n:
+            a, b = _KEY_POSITIONS.get(password[end - 1]), _KEY_POSITIONS.get(password[end])
+            if a is None or b is None:
+                break
+            direction = (b[0] - a[0], b[1] - a[1])
+            if direction not in _KEY_DIRECTIONS:
+                break
+            if direction != last_direction:
+                turns += 1
+                last_direction = direction
+            end += 1
+        length = end - start
+        if length >= STRENGTH_MIN_MATCH_LENGTH:
+            # the number of walks of up to this length with up to this many turns, from any starting key
+            guesses = sum(
+                math.comb(i - 1, j - 1) * _KEY_COUNT * _KEY_DEGREE**j
+                for i in range(2, length + 1)
+                for j in range(1, min(turns, i - 1) + 1)
+            )
+            token = password[start:end]
+            shifted = sum(_KEY_POSITIONS[ch][2] for ch in token)
+            entropy = math.log2(guesses)
+            if shifted == length:
+                entropy += 1.0
+            elif shifted:
+                entropy += _log2_combinations(length, min(shifted, length - shifted))
+            matches.append(
+                {
+                    "pattern": STRENGTH_PATTERN_KEYBOARD,
+                    "start": start,
+                    "end": end,
+                    "entropy": entropy,
+                    "turns": turns,
+                }
+            )
+        start = end - 1 if length > 1 else end
+    return matches
+
+
+def _sequence_matches(password):
+    matches = []
+    n = len(password)
+    start = 0
+    while start < n - 1:
+        delta = ord(password[start + 1]) - ord(password[start])
+        end = start + 2
+        while end < n and ord(password[end]) - ord(password[end - 1]) == delta:
+            end += 1
+        token = password[start:end]
+        char_class = _CHAR_CLASSES.get(token[0])
+        if (
+            len(token) >= STRENGTH_MIN_MATCH_LENGTH
+            and 0 < abs(delta) <= 5
+            and char_class in (CC_LOWER, CC_UPPER, CC_DIGITS)
+            and all(_CHAR_CLASSES.get(ch) == char_class for ch in token)
+        ):
+            # sequences starting at the beginning or end of the alphabet (or digits) are the obvious ones
+            if token[0] in "aAzZ019":
+                entropy = 1.0
+            else:
+                entropy = math.log2(len(CHARACTER_CLASSES[char_class]))
+            entropy += math.log2(len(token)) + (1.0 if delta < 0 else 0.0)
+            matches.append(
+                {
+                    "pattern": STRENGTH_PATTERN_SEQUENCE,
+                    "start": start,
+                    "end": end,
+                    "entropy": entropy,
+                    "ascending": delta > 0,
+                }
+            )
+        start = end - 1
+    return matches
+
+
+def _repeat_matches(password, word_list):
+    matches = []
+    for match in _REPEAT.finditer(password):
+        start, end = match.span()
+        base = match.group(1)
+        if end - start < STRENGTH_MIN_MATCH_LENGTH:
+            continue
+        if len(base) == 1:
+            base_entropy = math.log2(_cardinality(base))
+        else:
+            base_entropy = _estimate(base, word_list)["entropy"]
+        matches.append(
+            {
+                "pattern": STRENGTH_PATTERN_REPEAT,
+                "start": start,
+                "end": end,
+                "entropy": base_entropy + math.log2((end - start) // len(base)),
+                "base": base,
+            }
+        )
+    return matches
+
+
+def _date_entropy(day, month, year, year_size):
+    """The entropy of the given date, or None if it isn't a plausible one."""
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return None
+    if year_size == 4:
+        if not DATE_MIN_YEAR <= year <= DATE_MAX_YEAR:
+            return None
+        years = DATE_MAX_YEAR - DATE_MIN_YEAR + 1
+    else:
+        years = 100
+    return math.log2(31 * 12 * years)
+
+
+def _best_date(day_month, year, year_size):
+    """The lowest entropy reading of the given date (with the day and month either way around), or None if there
+    is no plausible reading."""
+    a, b = day_month
+    entropies = [
+        entropy
+        for entropy in (_date_entropy(a, b, year, year_size), _date_entropy(b, a, year, year_size))
+        if entropy is not None
+    ]
+    return min(entropies) if entropies else None
+
+
+def _unseparated_date_entropy(token):
+    """The lowest entropy reading of the given digits as a year or a date, or None if there is none."""
+    entropies = []
+    if len(token) == 4 and DATE_MIN_YEAR <= int(token) <= DATE_MAX_YEAR:
+        entropies.append(math.log2(DATE_MAX_YEAR - DATE_MIN_YEAR + 1))
+    # every split into a 2 or 4 digit year (at either end) and a 1-2 digit day and month
+    for year_size in (2, 4):
+        rest_size = len(token) - year_size
+        if not 2 <= rest_size <= 4:
+            continue
+        for year, rest in [(token[:year_size], token[year_size:]), (token[rest_size:], token[:rest_size])]:
+            for first_size in (1, 2):
+                if 1 <= rest_size - first_size <= 2:
+                    entropy = _best_date(
+                        (int(rest[:first_size]), int(rest[first_size:])), int(year), year_size
+                    )
+                    if entropy is not None:
+                        entropies.append(entropy)
+    return min(entropies) if entropies else None
+
+
+def _date_matches(password):
+    matches = []
+    for match in _SEPARATED_DATE.finditer(password):
+        first, _, second, third = match.groups()
+        if len(first) == 4:
+            year, day_month = first, (int(second), int(third))
+        else:
+            year, day_month = third, (int(first), int(second))
+        if len(year) not in (2, 4) or len(first) == len(third) == 4:
+            continue
+        entropy = _best_date(day_month, int(year), len(year))
+        if entropy is not None:
+            # plus which separator was used
+            matches.append(
+                {
+                    "pattern": STRENGTH_PATTERN_DATE,
+                    "start": match.start(),
+                    "end": match.end(),
+                    "entropy": entropy + 2.0,
+                }
+            )
+
+    for run in _DIGIT_RUN.finditer(password):
+        digits = run.group()
+        for start in range(len(digits)):
+            for end in range(start + 4, min(len(digits), start + 8) + 1):
+                entropy = _unseparated_date_entropy(digits[start:end])
+                if entropy is not None:
+                    matches.append(
+                        {
+                            "pattern": STRENGTH_PATTERN_DATE,
+                            "start": run.start() + start,
+                            "end": run.start() + end,
+                            "entropy": entropy,
+                        }
+                    )
+    return matches
+
+
+def estimate_strength(password, dict_set=None):
+    """Estimates the entropy of a password from the perspective of an attacker who knows the patterns people use
+    when choosing passwords: dictionary words (including l33t substitutions, capitalisation and words spelt
+    backwards), keyboard walks, repeated characters or substrings, sequences and dates. The password is
+    decomposed into the sequence of such patterns (and brute-forced characters in between) with the lowest total
+    entropy, by dynamic programming over every pattern found within it.
+
+    Dictionary words are found with an Aho-Corasick automaton built over the word list, which is built once per
+    word list and kept for as long as the word list is in use, so that estimating the strength of many passwords
+    costs a single pass over each of them. The automaton is kept alongside the WordList, which is why other
+    collections of words (which would need a new WordList, and a new automaton, on every call) are rejected.
+
+    Args:
+        password: The password to assess.
+        dict_set: The WordList (see load_word_list() and as_word_list()) in which to look for words. Defaults to
+            the built-in word list.
+
+    Raises:
+        TypeError: If dict_set isn't a WordList.
+
+    Returns:
+        A dictionary containing the estimated entropy of the password (in bits), and the list of patterns making
+        up the password, each a dictionary with its pattern (see constants.STRENGTH_PATTERNS), token, start and end
+        indices and entropy.
+    """
+    if dict_set is None:
+        dict_set = load_word_list()
+    word_list = _require_word_list(dict_set, "estimate_strength")
+    if _sinks:
+        with span("estimate_strength"):
+            return _estimate(password, word_list)
+    return _estimate(password, word_list)
+
+
+def _estimate(password, word_list):
+    n = len(password)
+    matches = (
+        _dictionary_matches(password, word_list)
+        + _keyboard_matches(password)
+        + _sequence_matches(password)
+        + _repeat_matches(password, word_list)
+        + _date_matches(password)
+    )
+    ending_at = [[] for _ in range(n + 1)]
+    for match in matches:
+        ending_at[match["end"]].append(match)
+
+    # best[j] is the lowest entropy of any decomposition of the first j characters
+    char_entropy = math.log2(_cardinality(password)) if password else 0.0
+    best = [0.0] * (n + 1)
+    previous = [None] * (n + 1)
+    for end in range(1, n + 1):
+        best[end] = best[end - 1] + char_entropy
+        for match in ending_at[end]:
+            entropy = best[match["start"]] + match["entropy"]
+            if entropy < best[end]:
+                best[end], previous[end] = entropy, match
+
+    sequence = []
+    end = n
+    while end > 0:
+        match = previous[end]
+        if match is None:
+            # runs of brute-forced characters are reported as one
+            if sequence and sequence[-1]["pattern"] == STRENGTH_PATTERN_BRUTEFORCE:
+                sequence[-1]["start"] = end - 1
+                sequence[-1]["entropy"] += char_entropy
+            else:
+                sequence.append(
+                    {
+                        "pattern": STRENGTH_PATTERN_BRUTEFORCE,
+                        "start": end - 1,
+                        "end": end,
+                        "entropy": char_entropy,
+                    }
+                )
+            end -= 1
+        else:
+            sequence.append(dict(match))
+            end = match["start"]
+    sequence.reverse()
+    for match in sequence:
+        match["token"] = password[match["start"] : match["end"]]
+    return {"entropy": best[n], "sequence": sequence}
@@ -1,77 +1,235 @@
 # -*- coding: utf-8 -*-
 
-from functools import reduce
-from operator import mul
+from collections import Counter, OrderedDict
+from functools import lru_cache, reduce
+from operator import and_, mul
 from string import ascii_lowercase
 from io import open
+import codecs
+import hashlib
+import heapq
+import io
+import locale
+import os
+import re
+import shutil
+import tempfile
+import threading
 import time
 import math
-import os
-import struct
-import importlib.resources
+import unicodedata
 
 from .constants import *
+from .instrument import _sinks, span
+from .rng import get_entropy_pool
+from .wordlist import WordList, is_compiled_word_list, word_list_cache_dir
 
 
 __all__ = [
     "clean_word_list",
+    "clear_loaded_word_lists",
+    "compile_word_list",
     "permutations",
     "calculate_entropy",
     "load_word_list",
     "secure_random",
     "secure_random_quality",
+    "rng_test_battery",
 ]
 
 
-def clean_word_list(input_path, output_path, encoding=None, min_word_len=None):
+# possessives are stripped from the end of each line of a word list (ignoring trailing whitespace), followed by
+# everything other than lowercase ASCII letters
+_possessive_suffix = re.compile(r"'s[^\S\n]*$", re.MULTILINE)
+_non_word_chars = re.compile(r"[^a-z\n]+")
+_non_word_bytes = bytes(b for b in range(256) if b != ord("\n") and chr(b) not in ascii_lowercase)
+
+
+def _clean_chunk(text, min_word_len):
+    """Cleans a chunk of a word list consisting of whole lines.
+
+    Returns:
+        A (words_read, words) tuple, where words_read is the number of non-blank lines in the chunk, and words is
+        a string containing the sorted, unique, cleaned words from the chunk, each followed by a newline.
+    """
+    text = text.lower()
+    lines = text.split("\n")
+    # lines that are empty or consist only of whitespace aren't counted as words
+    words_read = len(lines) - lines.count("") - sum(map(str.isspace, lines))
+    text = _possessive_suffix.sub("", text)
+    if text.isascii():
+        # much faster than the regular expression, for the common case
+        text = text.encode("ascii").translate(None, _non_word_bytes).decode("ascii")
+    else:
+        text = _non_word_chars.sub("", text)
+    words = [word for word in dict.fromkeys(text.split("\n")) if len(word) >= min_word_len]
+    words.sort()
+    return words_read, "".join(word + "\n" for word in words)
+
+
+def _read_chunks(input_file, chunk_size):
+    """Reads the given text file in chunks of about chunk_size characters, each consisting of whole lines."""
+    while True:
+        chunk = input_file.read(chunk_size)
+        if not chunk:
+            return
+        if not chunk.endswith("\n"):
+            chunk += input_file.readline()
+        yield chunk
+
+
+def _spill_run(runs, temp_dir):
+    """Sorts and deduplicates the given runs of sorted words (each a string of newline-terminated words), and
+    writes them out to a new run file.
+
+    Returns:
+        A (path, words) tuple, where words is the number of words written to the run file at the given path.
+    """
+    words = []
+    for run in runs:
+        words.extend(run.split("\n")[:-1])
+    words.sort()
+    words = dict.fromkeys(words)
+    fd, path = tempfile.mkstemp(dir=temp_dir, suffix=".run")
+    with os.fdopen(fd, "wt", encoding="ascii") as run_file:
+        run_file.write("".join(word + "\n" for word in words))
+    return path, len(words)
+
+
+def _merge_runs(paths, output_file):
+    """Merges the given files of sorted words into the given output file, dropping duplicates, and returns the
+    number of words written."""
+    run_files = [open(path, "rt", encoding="ascii") for path in paths]
+    try:
+        last_word = None
+        words_written = 0
+        batch = []
+        for word in heapq.merge(*run_files):
+            if word != last_word:
+                batch.append(word)
+                last_word = word
+                if len(batch) >= DEFAULT_OUTPUT_BATCH_SIZE:
+                    output_file.write("".join(batch))
+                    words_written += len(batch)
+                    batch = []
+        output_file.write("".join(batch))
+        return words_written + len(batch)
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+def clean_word_list(
+    input_path,
+    output_path,
+    encoding=None,
+    min_word_len=None,
+    jobs=1,
+    chunk_size=None,
+    max_run_words=None,
+    temp_dir=None,
+):
     """Cleans the given word list, ensuring no punctuation or capitalisation or duplicate words. Word lists
     must be plain text files, with one word per line, and sorted alphabetically.
 
+    The word list is cleaned as a stream, in chunks, which can be spread across several processes. The cleaned
+    words are sorted and deduplicated by way of an external merge sort: whenever too many words have accumulated
+    in memory, they are sorted and spilled to disk as a sorted run, and the runs are merged at the end. Memory
+    use is therefore bounded no matter how large the word list is.
+
     Args:
         input_path: The path to the input word list file.
         output_path: The path to where to write the output, filtered word list.
         encoding: The encoding to use when attempting to read the file (default: platform-dependent).
         min_word_len: The minimum length of words to include. Defaults to constants.DEFAULT_MIN_WORD_LEN.
+        jobs: The number of processes across which to spread the cleaning of the word list.
+        chunk_size: The number of characters to clean at a time. Defaults to constants.DEFAULT_CLEAN_CHUNK_SIZE.
+        max_run_words: The maximum number of words to hold in memory before spilling them to disk. Defaults to
+            constants.DEFAULT_CLEAN_RUN_WORDS.
+        temp_dir: The directory in which to store sorted runs (default: the system's temporary directory).
 
     Returns:
         A dictionary containing statistics about the clean operation.
     """
     if min_word_len is None:
         min_word_len = DEFAULT_MIN_WORD_LEN
-    word_list = set()
+    min_word_len = max(1, min_word_len)
+    if chunk_size is None:
+        chunk_size = DEFAULT_CLEAN_CHUNK_SIZE
+    if max_run_words is None:
+        max_run_words = DEFAULT_CLEAN_RUN_WORDS
+    if jobs < 1:
+        raise ValueError("Number of jobs must be at least 1")
+
     start_time = time.time()
     words_read = 0
-    with open(input_path, "rt", encoding=encoding) as input_file:
-        for line in input_file:
-            word = line.strip().lower()
-            if len(word) > 0:
-                words_read += 1
+    run_dir = tempfile.mkdtemp(prefix="passwdgen-clean-", dir=temp_dir)
+    try:
+        with open(input_path, "rt", encoding=encoding) as input_file:
+            chunks = _read_chunks(input_file, chunk_size)
+            if jobs == 1:
+                results = (_clean_chunk(chunk, min_word_len) for chunk in chunks)
+            else:
+                # imported here, since the parallel module itself depends on this one
+                from .parallel import _map_parallel
 
-                # strip possessives
-                if word.endswith("'s"):
-                    word = word[:-2]
+                results = _map_parallel(
+                    _clean_chunk_task, (min_word_len,), chunks, jobs
+                )
 
-                # strip non-alphabetical characters
-                stripped_word = ""
-                for c in word:
-                    if c in ascii_lowercase:
-                        stripped_word += c
+            # (path, number of words) of each sorted run spilled to disk
+            spilled, runs, buffered_words = [], [], 0
+            for chunk_words_read, chunk_words in results:
+                words_read += chunk_words_read
+                runs.append(chunk_words)
+                buffered_words += chunk_words.count("\n")
+                if buffered_words >= max_run_words:
+                    spilled.append(_spill_run(runs, run_dir))
+                    runs, buffered_words = [], 0
+            if runs or not spilled:
+                spilled.append(_spill_run(runs, run_dir))
+        run_paths = [path for path, _ in spilled]
+        run_count = len(run_paths)
 
-                if stripped_word and len(stripped_word) >= min_word_len:
-                    word_list.add(stripped_word)
+        # merge the runs a limited number at a time, so as not to run out of file handles
+        while len(run_paths) > CLEAN_MERGE_FAN_IN:
+            merged_paths = []
+            for i in range(0, len(run_paths), CLEAN_MERGE_FAN_IN):
+                fd, path = tempfile.mkstemp(dir=run_dir, suffix=".run")
+                with os.fdopen(fd, "wt", encoding="ascii") as run_file:
+                    _merge_runs(run_paths[i : i + CLEAN_MERGE_FAN_IN], run_file)
+                merged_paths.append(path)
+            run_paths = merged_paths
 
-    with open(output_path, "wt", encoding=encoding) as output_file:
-        for word in sorted(list(word_list)):
-            output_file.write("%s\n" % word)
+        with open(output_path, "wt", encoding=encoding) as output_file:
+            if len(run_paths) == 1:
+                # everything fit into a single run, which is already sorted and deduplicated
+                with open(run_paths[0], "rt", encoding="ascii") as run_file:
+                    shutil.copyfileobj(run_file, output_file)
+                words_written = spilled[0][1]
+            else:
+                words_written = _merge_runs(run_paths, output_file)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
 
-    end_time = time.time()
+    elapsed = time.time() - start_time
+    bytes_read = os.path.getsize(input_path)
     return {
-        "time": end_time - start_time,
+        "time": elapsed,
         "words_read": words_read,
-        "words_written": len(word_list),
+        "words_written": words_written,
+        "bytes_read": bytes_read,
+        "runs": run_count,
+        "throughput_mb_per_second": (bytes_read / 1048576.0) / elapsed
+        if elapsed > 0
+        else None,
     }
 
 
+def _clean_chunk_task(min_word_len, text):
+    return _clean_chunk(text, min_word_len)
+
+
 def permutations(n, k):
     """Calculates the number of ordered k-permutations of n.
 
@@ -85,6 +243,52 @@ def permutations(n, k):
     return reduce(mul, range(n - k + 1, n + 1)) if 0 <= k <= n else 0
 
 
+@lru_cache(maxsize=None)
+def _charset_classification():
+    """Works out which of the charsets in PASSWORD_CHARSETS each character belongs to, so that a password can be
+    classified in a single pass over its characters.
+
+    Returns:
+        A (char_masks, charsets) tuple, where charsets is a tuple of (charset name, log2(charset size)) pairs in
+        the order of PASSWORD_CHARSETS, and char_masks maps each character to a bitmask in which bit i is set if
+        the character belongs to charsets[i].
+    """
+    charsets = tuple(
+        (charset_name, math.log(1.0 * len(charset), 2.0))
+        for charset_name, charset in PASSWORD_CHARSETS.items()
+    )
+    char_masks = dict()
+    for bit, charset in enumerate(PASSWORD_CHARSETS.values()):
+        for c in charset:
+            char_masks[c] = char_masks.get(c, 0) | (1 << bit)
+    return char_masks, charsets
+
+
+@lru_cache(maxsize=4096)
+def _charset_entropies(mask, password_len):
+    """Returns the entropies of a password of the given length in each of the charsets whose bits are set in the
+    given mask, as a tuple of (charset name, entropy) pairs."""
+    charsets = _charset_classification()[1]
+    return tuple(
+        (charset_name, log2_size * password_len)
+        for bit, (charset_name, log2_size) in enumerate(charsets)
+        if (mask >> bit) & 1
+    )
+
+
+# beyond this many terms, log2 of the number of permutations is worked out from the log-gamma function instead
+_MAX_LOG_PERMUTATION_TERMS = 256
+
+
+@lru_cache(maxsize=1024)
+def _log2_permutations(n, k):
+    """Calculates log2(permutations(n, k)) in the log domain, without building up the (potentially huge) number of
+    permutations itself."""
+    if k <= _MAX_LOG_PERMUTATION_TERMS:
+        return math.fsum(map(math.log2, range(n - k + 1, n + 1)))
+    return (math.lgamma(n + 1) - math.lgamma(n - k + 1)) / math.log(2.0)
+
+
 def calculate_entropy(password, dict_set=None):
     """Utility to calculate the entropy of a password (in bits) based on the detected charset (as from the
     perspective of a prospective attacker).
@@ -96,86 +300,388 @@ def calculate_entropy(password, dict_set=None):
     Returns:
         A dictionary containing the entropies of the password based on different attacker dictionaries.
     """
-    password_letters = set(password)
-    password_len = len(password)
-    entropy = dict()
-
-    # find the charsets in which we'll find this password
-    for charset_name, charset in PASSWORD_CHARSETS.items():
-        if password_letters.issubset(charset):
-            entropy[charset_name] = math.log(1.0 * len(charset), 2.0) * password_len
-
-    if dict_set is not None:
-        # we assume our dictionary words are all lowercase, and that our separator is used
-        if password_letters.issubset(PASSWORD_CHARSETS[PC_ALPHA_LOWER_SEP]):
-            # detect the separator
-            sep = None
-            for c in password_letters:
-                if c in separators:
-                    sep = c
-                    break
-
-            # split the words by separator
-            words = password.split(sep) if sep is not None else [password]
-            # only if the words are unique to each other
-            if len(words) == len(set(words)):
-                all_words_found = True
-                for word in words:
-                    if word not in dict_set:
-                        all_words_found = False
-
-                # only if all of the words in the password are in our specific dictionary
-                if all_words_found:
-                    entropy[PC_DICT] = math.log(
-                        permutations(len(dict_set), len(words)), 2.0
-                    )
+    if _sinks:
+        with span("calculate_entropy"):
+            return _calculate_entropy(password, dict_set)
+    return _calculate_entropy(password, dict_set)
+
+
+def _calculate_entropy(password, dict_set):
+    char_masks, charsets = _charset_classification()
+    # find the charsets in which we'll find this password, in a single pass over its characters
+    try:
+        mask = reduce(and_, map(char_masks.__getitem__, password), (1 << len(charsets)) - 1)
+    except KeyError:
+        # the password contains a character that's in none of the charsets
+        mask = 0
+    entropy = dict(_charset_entropies(mask, len(password)))
+
+    # we assume our dictionary words are all lowercase, and that our separator is used
+    if dict_set is not None and PC_ALPHA_LOWER_SEP in entropy:
+        # detect the separator
+        sep = None
+        for c in separators:
+            if c in password:
+                sep = c
+                break
+
+        # split the words by separator
+        words = password.split(sep) if sep is not None else [password]
+        # only if the words are unique to each other, and all of them are in our specific dictionary
+        if len(words) == len(set(words)) and all(word in dict_set for word in words):
+            entropy[PC_DICT] = _log2_permutations(len(dict_set), len(words))
 
     return entropy
 
 
-def load_word_list(filename=None, resource=None, encoding=None):
-    """Loads a word list from the given filename or resource.
+def _read_word_list_text(data, encoding, normalization=None):
+    words = set()
+    with io.TextIOWrapper(io.BytesIO(data), encoding=encoding) as input_file:
+        for line in input_file:
+            word = line.strip()
+            if len(word) > 0:
+                words.add(word)
+    if normalization is not None:
+        words = set(unicodedata.normalize(normalization, word) for word in words)
+    return words
+
+
+def _normalize_word_list(word_list, normalization):
+    """Applies the given Unicode normalization form to a word list loaded from a compiled word list file, only
+    building a new word list if any of its words aren't normalized already."""
+    words = list(word_list)
+    if all(unicodedata.is_normalized(normalization, word) for word in words):
+        return word_list
+    return WordList.from_words(
+        (unicodedata.normalize(normalization, word) for word in words), source_hash=word_list.source_hash
+    )
+
+
+def _word_list_cache_path(data, encoding, normalization=None):
+    """Works out where the compiled copy of a word list with the given contents, encoding and normalization form is
+    to be cached."""
+    encoding = codecs.lookup(encoding or locale.getpreferredencoding(False)).name
+    if normalization is not None:
+        encoding = "%s-%s" % (encoding, normalization.lower())
+    return os.path.join(
+        word_list_cache_dir(),
+        "%s-%s.pwl" % (hashlib.sha256(data).hexdigest()[:32], encoding),
+    )
+
+
+def _word_list_stat_path(filename, encoding, normalization):
+    """Works out where the record of the compiled copy of the text word list at the given path (read with the
+    given encoding and normalization form) is kept, so that the compiled copy can be found without reading the
+    text file."""
+    encoding = codecs.lookup(encoding or locale.getpreferredencoding(False)).name
+    key = "\n".join([os.path.abspath(os.fspath(filename)), encoding, normalization or ""])
+    return os.path.join(
+        word_list_cache_dir(),
+        "%s.stat" % hashlib.sha256(key.encode("utf-8", "surrogateescape")).hexdigest()[:32],
+    )
+
+
+def _load_word_list_by_stat(filename, file_stat, encoding, normalization):
+    """Loads the compiled copy of a text word list recorded by _record_word_list_stat(), as long as the text
+    file's modification and change times, inode and size haven't changed since, without reading (or hashing) the
+    text file itself.
+
+    Returns:
+        The compiled WordList, or None if there's no up to date record of one.
+    """
+    try:
+        with open(_word_list_stat_path(filename, encoding, normalization), "rt", encoding="ascii") as f:
+            *recorded_stat, source_hash, cache_name = f.read().split()
+        if tuple(int(value) for value in recorded_stat) != file_stat:
+            return None
+        source_hash = bytes.fromhex(source_hash)
+    except (OSError, ValueError):
+        return None
+    return _load_cached_word_list(os.path.join(word_list_cache_dir(), os.path.basename(cache_name)), source_hash)
+
+
+def _record_word_list_stat(filename, file_stat, encoding, normalization, cache_path, source_hash):
+    """Records the modification and change times, inode and size of a text word list alongside the location of
+    its compiled copy (see _load_word_list_by_stat())."""
+    stat_path = _word_list_stat_path(filename, encoding, normalization)
+    try:
+        os.makedirs(os.path.dirname(stat_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(stat_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wt", encoding="ascii") as f:
+                f.write(
+                    "%s %s %s\n"
+                    % (" ".join("%d" % value for value in file_stat), source_hash.hex(), os.path.basename(cache_path))
+                )
+            os.replace(tmp_path, stat_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        # caching is purely an optimisation
+        pass
+
+
+def _load_cached_word_list(cache_path, source_hash):
+    try:
+        word_list = WordList.load(cache_path)
+    except (OSError, ValueError):
+        return None
+    return word_list if word_list.source_hash == source_hash else None
+
+
+def _cache_word_list(word_list, cache_path):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        word_list.save(cache_path)
+    except OSError:
+        # caching is purely an optimisation
+        pass
+
+
+class _LoadedWordLists(object):
+    """A thread-safe, process-wide cache of the word lists loaded by load_word_list(), evicting the least recently
+    used word lists once they take up more than max_bytes between them. Each word list is validated against the
+    modification time and size of the file it was loaded from, but at most once every stat_interval seconds, so
+    that repeatedly loading the same word list doesn't touch the file system at all."""
+
+    def __init__(self, max_bytes, stat_interval):
+        self.max_bytes = max_bytes
+        self.stat_interval = stat_interval
+        self.nbytes = 0
+        # (path, resource, encoding, normalization) -> [word list, file path, (mtime, size), time of the last check]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            word_list, path, file_stat, checked = entry
+            if time.monotonic() - checked < self.stat_interval:
+                return word_list
+
+        try:
+            current_stat = _entry_stat(path)
+        except OSError:
+            current_stat = None
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                # replaced or invalidated in the meantime
+                return None
+            if current_stat != file_stat:
+                self._remove(key)
+                return None
+            entry[3] = time.monotonic()
+            return word_list
+
+    def put(self, key, word_list, path, file_stat):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = [word_list, path, file_stat, time.monotonic()]
+            self.nbytes += word_list.nbytes
+            # always keep the word list just loaded, even if it alone exceeds the limit
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self, path=None):
+        with self._lock:
+            for key in list(self._entries):
+                if path is None or key[0] == path or (isinstance(key[0], tuple) and path in key[0]):
+                    self._remove(key)
+
+    def _remove(self, key):
+        self.nbytes -= self._entries.pop(key)[0].nbytes
+
+
+def _file_stat(path):
+    # the change time and inode are included since, unlike the modification time, they can't be set back (e.g. by
+    # "cp -p", "rsync -t" or "tar -x") after the file has been changed
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino, stat.st_size
+
+
+def _entry_stat(path):
+    """Returns the modification and change times, inode and size of the file from which a word list was loaded
+    (see _file_stat()), or those of each of the files, given a tuple of paths (for word lists combined from several
+    files)."""
+    if isinstance(path, tuple):
+        return tuple(_file_stat(p) for p in path)
+    return _file_stat(path)
+
+
+_loaded_word_lists = _LoadedWordLists(LOADED_WORD_LISTS_MAX_BYTES, LOADED_WORD_LIST_STAT_INTERVAL)
+
+
+def clear_loaded_word_lists(filename=None):
+    """Discards word lists cached in memory by load_word_list(), so that the next call to load_word_list() loads
+    them from disk again. Changes to word list files are picked up automatically (within
+    constants.LOADED_WORD_LIST_STAT_INTERVAL seconds), so this is only needed to free up memory, or to pick up
+    changes immediately.
+
+    Args:
+        filename: If specified, only the word list loaded from this file is discarded. Otherwise all of them
+            (including the built-in one) are.
+    """
+    _loaded_word_lists.clear(None if filename is None else os.path.abspath(os.fspath(filename)))
+
+
+def load_word_list(filename=None, resource=None, encoding=None, use_cache=True, normalization=None):
+    """Loads a word list from the given filename or resource. Files may either be plain text files, with one word
+    per line, or compiled word lists (see compile_word_list()). The first time a plain text word list is loaded,
+    a compiled copy of it is cached (see wordlist.word_list_cache_dir()), and subsequent loads of the same file
+    memory-map the compiled copy instead of parsing the text again. Cached copies are identified by a hash of the
+    text file's contents.
+
+    Loaded word lists are also kept in memory (up to a total of constants.LOADED_WORD_LISTS_MAX_BYTES), so that
+    loading the same word list again returns the same WordList without touching the file system. Loading a text
+    word list in a new process only reads and hashes the text file if its modification time, change time, inode
+    or size has changed since its compiled copy was cached; otherwise the compiled copy is mapped straight away.
+    Since writing to a file updates its change time, which (unlike its modification time) can't be set back,
+    changes are picked up even if the modification time is restored afterwards (e.g. by "cp -p"). The file is
+    checked for changes in the same way at most every constants.LOADED_WORD_LIST_STAT_INTERVAL seconds, and it
+    is loaded again if it has changed. See also clear_loaded_word_lists().
 
     Args:
         filename: If specified, loads the word list from this file system path.
         resource: If no filename is specified, this is loaded relative to the passwdgen package path. If no resource
             is specified, the default word list is used.
         encoding: The encoding to use when reading the file (default: OS-dependent).
+        use_cache: Whether or not to use (and populate) the in-memory and compiled word list caches.
+        normalization: If specified, the Unicode normalization form (e.g. "NFC") to apply to each word as the word
+            list is loaded, so that words typed or stored in different forms compare equal. The normalized
+            word list is what gets cached, so the normalization is only ever done once per file.
 
     Returns:
-        A set containing the entire list of non-zero-length words in the word list.
+        A WordList containing the entire list of unique, non-zero-length words in the word list.
     """
-    words = set()
-
-    if filename is None:
-        filename = importlib.resources.files("passwdgen").joinpath(
-            resource or DEFAULT_WORD_LIST
+    if normalization is not None and normalization not in UNICODE_NORMALIZATION_FORMS:
+        raise ValueError(
+            "Unknown Unicode normalization form: %s (must be one of %s)"
+            % (normalization, ", ".join(UNICODE_NORMALIZATION_FORMS))
         )
+    if filename is not None:
+        key = (os.path.abspath(os.fspath(filename)), None, encoding, normalization)
+    else:
+        key = (None, resource or DEFAULT_WORD_LIST, encoding, normalization)
 
-    with open(filename, "rt", encoding=encoding) as input_file:
-        for line in input_file:
-            word = line.strip()
-            if len(word) > 0:
-                words.add(word)
+    with span("load_word_list") as load_span:
+        if use_cache:
+            word_list = _loaded_word_lists.get(key)
+            if word_list is not None:
+                load_span.count("memory_cache_hits")
+                return word_list
 
-    if len(words) < MIN_DICT_SIZE:
+        if filename is None:
+            import importlib.resources
+
+            filename = importlib.resources.files("passwdgen").joinpath(
+                resource or DEFAULT_WORD_LIST
+            )
+        # taken before reading the file, so that changes made while reading it are picked up next time
+        file_stat = _file_stat(filename)
+
+        if is_compiled_word_list(filename):
+            with span("load_word_list.map"):
+                word_list = WordList.load(filename)
+            if normalization is not None:
+                with span("load_word_list.normalize"):
+                    word_list = _normalize_word_list(word_list, normalization)
+        else:
+            word_list = None
+            if use_cache:
+                with span("load_word_list.map"):
+                    word_list = _load_word_list_by_stat(filename, file_stat, encoding, normalization)
+                if word_list is not None:
+                    load_span.count("stat_cache_hits")
+
+        if word_list is None:
+            with span("load_word_list.read"):
+                with open(filename, "rb") as input_file:
+                    data = input_file.read()
+                source_hash = hashlib.sha256(data).digest()
+                cache_path = _word_list_cache_path(data, encoding, normalization)
+
+            if use_cache:
+                with span("load_word_list.map"):
+                    word_list = _load_cached_word_list(cache_path, source_hash)
+            if word_list is None:
+                with span("load_word_list.parse"):
+                    word_list = WordList.from_words(
+                        _read_word_list_text(data, encoding, normalization), source_hash=source_hash
+                    )
+                if use_cache:
+                    with span("load_word_list.save"):
+                        _cache_word_list(word_list, cache_path)
+            if use_cache:
+                _record_word_list_stat(filename, file_stat, encoding, normalization, cache_path, source_hash)
+        load_span.count("words_loaded", len(word_list))
+
+    if len(word_list) < MIN_DICT_SIZE:
         raise ValueError(
             "Dictionary is too small. Valid dictionaries must contain at least %d unique words."
             % MIN_DICT_SIZE
         )
 
-    return words
+    if use_cache:
+        _loaded_word_lists.put(key, word_list, filename, file_stat)
+    return word_list
+
+
+def compile_word_list(input_path, output_path=None, encoding=None):
+    """Compiles the given plain text word list into a compiled word list: a single file containing a table of
+    offsets and one contiguous UTF-8 blob of sorted words, which can be memory-mapped and used without any
+    parsing. Compiled word lists can be passed to load_word_list() in place of the original text file.
+
+    Args:
+        input_path: The path to the input word list file, one word per line.
+        output_path: Where to write the compiled word list. If not specified, the compiled word list is written
+            to the word list cache, from where load_word_list() will pick it up automatically when loading
+            input_path.
+        encoding: The encoding to use when reading the input file (default: platform-dependent).
+
+    Returns:
+        A dictionary containing statistics about the compile operation.
+    """
+    start_time = time.time()
+    file_stat = _file_stat(input_path)
+    with open(input_path, "rb") as input_file:
+        data = input_file.read()
+
+    word_list = WordList.from_words(
+        _read_word_list_text(data, encoding), source_hash=hashlib.sha256(data).digest()
+    )
+    if output_path is None:
+        output_path = _word_list_cache_path(data, encoding)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        word_list.save(output_path)
+        _record_word_list_stat(input_path, file_stat, encoding, None, output_path, word_list.source_hash)
+    else:
+        word_list.save(output_path)
 
+    end_time = time.time()
+    return {
+        "time": end_time - start_time,
+        "words_written": len(word_list),
+        "output_path": output_path,
+    }
 
-def secure_random(a, b=None):
+
+def secure_random(a, b=None, pool=None):
     """Generates integers in the most secure manner possible provided by the operating system. On POSIX machines,
-    this will use /dev/urandom. On Windows machines, this will use CryptGenRandom().
+    this will use /dev/urandom. On Windows machines, this will use CryptGenRandom(). Random bytes are read from
+    the OS in large blocks and buffered in an entropy pool, and integers are drawn from it without modulo bias
+    and using as few random bits as possible (see rng.EntropyPool.randbelow()).
 
     Args:
         a: If b is supplied, this should be the minimum value of the randomly generated number (inclusive). If b
             is not supplied, this should be the maximum value of the randomly generated number (exclusive), and the
             minimum will be 0.
         b: If supplied, this must provide the maximum value of the randomly generated number (exclusive).
+        pool: The entropy pool from which to draw random bytes. Defaults to the process-wide pool.
 
     Returns:
         A random integer i, with a <= i < b if b is supplied, otherwise 0 <= i < a.
@@ -186,33 +692,90 @@ def secure_random(a, b=None):
         )
     if (b is not None) and (b <= a):
         raise ValueError("For secure random number generation, b must be < a")
+    if (b is None) and (a == 0):
+        raise ValueError("For secure random number generation, a must be > 0 if b is not supplied")
+
+    pool = pool or get_entropy_pool()
+    if _sinks:
+        with span("secure_random", pool):
+            return pool.randbelow(int(a)) if b is None else (int(a) + pool.randbelow(int(b - a)))
+    return pool.randbelow(int(a)) if b is None else (int(a) + pool.randbelow(int(b - a)))
+
+
+def _import_numpy():
+    """Imports NumPy if it is installed (it is an optional dependency), returning None otherwise."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# the RNG quality test draws integers in [0, 101) from random bytes, rejecting bytes >= 202 (2 * 101)
+_QUALITY_RANGE = 101
+
+
+def _quality_histogram_python(pool, sample_size, chunk_size):
+    byte_counts = Counter()
+    remaining = sample_size
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        byte_counts.update(pool.randbelow_bytes(_QUALITY_RANGE, size))
+        remaining -= size
+    return [byte_counts[val] for val in range(_QUALITY_RANGE)]
+
+
+def _quality_histogram_numpy(numpy, pool, sample_size, chunk_size):
+    counts = numpy.zeros(_QUALITY_RANGE, dtype=numpy.int64)
+    remaining = sample_size
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        chunk = numpy.frombuffer(pool.randbelow_bytes(_QUALITY_RANGE, size), dtype=numpy.uint8)
+        counts += numpy.bincount(chunk, minlength=_QUALITY_RANGE)
+        remaining -= size
+    return [int(count) for count in counts]
 
-    (random_val,) = struct.unpack("Q", os.urandom(8))
-    return (random_val % int(a)) if b is None else (int(a) + (random_val % int(b - a)))
 
+def secure_random_quality(sample_size=1000000, backend=None, chunk_size=None, pool=None):
+    """Attempts to estimate the quality of the secure random number generator of the operating system, by
+    drawing sample_size integers between 0 and 100 (inclusive) and comparing their mean and standard deviation to
+    those expected of a uniform distribution.
 
-def secure_random_quality(sample_size=1000000):
-    """Attempts to estimate the quality of the secure random number generator of the operating system.
+    The samples are drawn from the entropy pool with the same unbiased sampling that character-based passwords
+    are generated with (see rng.EntropyPool.randbelow_bytes()), so that the test covers the path passwords actually
+    come from, and only a histogram of the samples is kept, so memory use is bounded regardless of the sample size.
+    If NumPy is installed, the histogram is built with NumPy; otherwise a pure Python implementation is used.
 
     Args:
         sample_size: The number of random samples to generate and test.
+        backend: One of constants.RNG_BACKENDS. Defaults to NumPy if it is installed.
+        chunk_size: The number of samples to draw at a time. Defaults to constants.DEFAULT_RNG_TEST_CHUNK_SIZE.
+        pool: The entropy pool from which to draw the samples. Defaults to the process-wide pool.
 
     Returns:
         A dictionary containing some statistics about the random number generator.
     """
+    if chunk_size is None:
+        chunk_size = DEFAULT_RNG_TEST_CHUNK_SIZE
+    numpy = _import_numpy() if backend in (None, RNG_BACKEND_NUMPY) else None
+    if backend == RNG_BACKEND_NUMPY and numpy is None:
+        raise ValueError("The NumPy RNG test backend requires NumPy to be installed")
+    elif backend not in (None, RNG_BACKEND_NUMPY, RNG_BACKEND_PYTHON):
+        raise ValueError("Unrecognised RNG test backend: %s" % backend)
+    pool = pool or get_entropy_pool()
+
     start_time = time.time()
 
-    total = 0
-    counts = dict()
-    for i in range(sample_size):
-        rnd_val = secure_random(101)
-        total += rnd_val
-        counts[rnd_val] = (counts[rnd_val] + 1) if rnd_val in counts else 1
+    if numpy is not None:
+        counts = _quality_histogram_numpy(numpy, pool, sample_size, chunk_size)
+    else:
+        counts = _quality_histogram_python(pool, sample_size, chunk_size)
 
+    total = sum(val * count for val, count in enumerate(counts))
     mean = float(total) / float(sample_size)
     # calculate the variance
     variance = 0.0
-    for val, count in counts.items():
+    for val, count in enumerate(counts):
         variance += ((val - mean) ** 2.0) * count
     variance /= float(sample_size) - 1.0
     # ensure variance is positive (sometimes zeros can be negative with floating point numbers)
@@ -232,3 +795,235 @@ def secure_random_quality(sample_size=1000000):
         "stddev_diff": 100.0 * (abs(expected_stddev - stddev) / expected_stddev),
         "time": end_time - start_time,
     }
+
+
+def _popcount(value):
+    if hasattr(value, "bit_count"):
+        # Python 3.10+
+        return value.bit_count()
+    return bin(value).count("1")
+
+
+def _new_battery_stats():
+    return {
+        "byte_counts": [0] * 256,
+        # sum of the products of each byte with the next one
+        "sum_products": 0,
+        # number of changes from one bit to the next, taking bits from least to most significant within each byte
+        "transitions": 0,
+        "first_byte": None,
+        "last_byte": None,
+    }
+
+
+def _update_battery_stats(stats, chunk, numpy=None):
+    """Accumulates the statistics needed by the RNG test battery for the next chunk of a random stream."""
+    if not chunk:
+        return
+    byte_counts = stats["byte_counts"]
+    if numpy is not None:
+        values = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        for val, count in enumerate(numpy.bincount(values, minlength=256).tolist()):
+            byte_counts[val] += count
+        wide = values.astype(numpy.uint64)
+        stats["sum_products"] += int(numpy.dot(wide[:-1], wide[1:]))
+    else:
+        for val, count in Counter(chunk).items():
+            byte_counts[val] += count
+        stats["sum_products"] += sum(map(mul, chunk, chunk[1:]))
+
+    bits = int.from_bytes(chunk, "little")
+    bit_count = 8 * len(chunk)
+    stats["transitions"] += _popcount((bits ^ (bits >> 1)) & ((1 << (bit_count - 1)) - 1))
+
+    if stats["last_byte"] is None:
+        stats["first_byte"] = chunk[0]
+    else:
+        stats["sum_products"] += stats["last_byte"] * chunk[0]
+        stats["transitions"] += (stats["last_byte"] >> 7) ^ (chunk[0] & 1)
+    stats["last_byte"] = chunk[-1]
+
+
+def _battery_stream_stats(byte_count, chunk_size, backend):
+    """Reads byte_count random bytes from the OS, chunk by chunk, and accumulates the statistics needed by the
+    RNG test battery. Only a fixed amount of state is kept between chunks."""
+    numpy = _import_numpy() if backend == RNG_BACKEND_NUMPY else None
+    stats = _new_battery_stats()
+    remaining = byte_count
+    while remaining > 0:
+        chunk = os.urandom(min(chunk_size, remaining))
+        remaining -= len(chunk)
+        _update_battery_stats(stats, chunk, numpy)
+    return stats
+
+
+def _merge_battery_stats(stats):
+    """Merges the statistics of several independent random streams as if they were one long stream."""
+    merged = stats[0]
+    for other in stats[1:]:
+        if other["first_byte"] is None:
+            continue
+        if merged["first_byte"] is None:
+            merged = other
+            continue
+        merged = {
+            "byte_counts": [a + b for a, b in zip(merged["byte_counts"], other["byte_counts"])],
+            "sum_products": merged["sum_products"]
+            + other["sum_products"]
+            + merged["last_byte"] * other["first_byte"],
+            "transitions": merged["transitions"]
+            + other["transitions"]
+            + ((merged["last_byte"] >> 7) ^ (other["first_byte"] & 1)),
+            "first_byte": merged["first_byte"],
+            "last_byte": other["last_byte"],
+        }
+    return merged
+
+
+def _chi_square_p_value(statistic, df):
+    """Upper tail probability of the chi-square distribution, using the Wilson-Hilferty approximation (which is
+    very accurate for the 255 degrees of freedom of a byte histogram)."""
+    h = 2.0 / (9.0 * df)
+    z = ((statistic / df) ** (1.0 / 3.0) - (1.0 - h)) / math.sqrt(h)
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def rng_test_battery(sample_bytes=None, chunk_size=None, jobs=1, backend=None):
+    """Runs a battery of statistical tests over a large sample of the operating system's random number generator's
+    output, in a single streaming pass and in constant memory. The sample can be split across several processes,
+    each of which tests its own share of the sample. The tests are:
+
+    * chi_square: a chi-square goodness of fit test of the byte histogram against a uniform distribution.
+    * monobit: whether the proportion of one bits is close enough to 1/2 (NIST SP 800-22, section 2.1).
+    * runs: whether the number of runs of identical bits is as expected (NIST SP 800-22, section 2.3).
+    * serial_correlation: the correlation between each byte and the next one (which should be close to 0).
+    * entropy: the Shannon entropy of the byte histogram (which should be close to 8 bits per byte).
+
+    Args:
+        sample_bytes: The number of random bytes to test. Defaults to constants.DEFAULT_RNG_BATTERY_BYTES.
+        chunk_size: The number of random bytes to read and process at a time. Defaults to
+            constants.DEFAULT_RNG_TEST_CHUNK_SIZE.
+        jobs: The number of processes across which to split the sample.
+        backend: One of constants.RNG_BACKENDS. Defaults to NumPy if it is installed.
+
+    Returns:
+        A JSON-serialisable dictionary containing the results of each test.
+    """
+    if sample_bytes is None:
+        sample_bytes = DEFAULT_RNG_BATTERY_BYTES
+    if chunk_size is None:
+        chunk_size = DEFAULT_RNG_TEST_CHUNK_SIZE
+    if sample_bytes < 2:
+        raise ValueError("The RNG test battery needs a sample of at least 2 bytes")
+    if backend is None:
+        backend = RNG_BACKEND_NUMPY if _import_numpy() else RNG_BACKEND_PYTHON
+    elif backend == RNG_BACKEND_NUMPY and _import_numpy() is None:
+        raise ValueError("The NumPy RNG test backend requires NumPy to be installed")
+    elif backend not in RNG_BACKENDS:
+        raise ValueError("Unrecognised RNG test backend: %s" % backend)
+
+    start_time = time.time()
+    jobs = max(1, min(jobs, sample_bytes // 2))
+    if jobs == 1:
+        stats = _battery_stream_stats(sample_bytes, chunk_size, backend)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        shares = [sample_bytes // jobs + (1 if i < sample_bytes % jobs else 0) for i in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            stats = _merge_battery_stats(
+                list(
+                    executor.map(
+                        _battery_stream_stats,
+                        shares,
+                        [chunk_size] * jobs,
+                        [backend] * jobs,
+                    )
+                )
+            )
+
+    report = _battery_report(stats)
+    elapsed = time.time() - start_time
+    report.update(
+        {
+            "jobs": jobs,
+            "backend": backend,
+            "time": elapsed,
+            "throughput_mb_per_second": (sample_bytes / 1048576.0) / elapsed
+            if elapsed > 0
+            else None,
+        }
+    )
+    return report
+
+
+def _battery_report(stats):
+    """Runs the tests of the RNG test battery over the given accumulated statistics."""
+    byte_counts = stats["byte_counts"]
+    n = sum(byte_counts)
+    bit_count = 8 * n
+
+    expected = n / 256.0
+    chi_square = sum((count - expected) ** 2 for count in byte_counts) / expected
+    chi_square_p = _chi_square_p_value(chi_square, 255)
+
+    ones = sum(_popcount(val) * count for val, count in enumerate(byte_counts))
+    monobit_p = math.erfc(abs(2 * ones - bit_count) / math.sqrt(bit_count) / math.sqrt(2.0))
+
+    # the runs test only applies if the monobit test's frequency prerequisite holds
+    proportion = float(ones) / bit_count
+    runs = stats["transitions"] + 1
+    expected_runs = 2.0 * bit_count * proportion * (1.0 - proportion)
+    if abs(proportion - 0.5) < 2.0 / math.sqrt(bit_count):
+        runs_p = math.erfc(
+            abs(runs - expected_runs)
+            / (2.0 * math.sqrt(2.0 * bit_count) * proportion * (1.0 - proportion))
+        )
+    else:
+        runs_p = 0.0
+
+    # serial correlation coefficient, treating the sample as circular (as the ent utility does)
+    sum_x = sum(val * count for val, count in enumerate(byte_counts))
+    sum_x2 = sum(val * val * count for val, count in enumerate(byte_counts))
+    sum_products = stats["sum_products"] + stats["last_byte"] * stats["first_byte"]
+    denominator = n * sum_x2 - sum_x * sum_x
+    correlation = (n * sum_products - sum_x * sum_x) / float(denominator) if denominator else 1.0
+    correlation_p = math.erfc(abs(correlation) * math.sqrt(n) / math.sqrt(2.0))
+
+    entropy = -sum(
+        (count / float(n)) * math.log(count / float(n), 2.0) for count in byte_counts if count
+    )
+    # the expected shortfall of the Shannon entropy of a finite sample below the true entropy
+    expected_entropy = 8.0 - 255.0 / (2.0 * n * math.log(2.0))
+
+    return {
+        "bytes": n,
+        "significance": RNG_BATTERY_SIGNIFICANCE,
+        "chi_square": {
+            "statistic": chi_square,
+            "degrees_of_freedom": 255,
+            "p_value": chi_square_p,
+            "passed": chi_square_p >= RNG_BATTERY_SIGNIFICANCE,
+        },
+        "monobit": {
+            "ones": ones,
+            "proportion": proportion,
+            "p_value": monobit_p,
+            "passed": monobit_p >= RNG_BATTERY_SIGNIFICANCE,
+        },
+        "runs": {
+            "runs": runs,
+            "expected_runs": expected_runs,
+            "p_value": runs_p,
+            "passed": runs_p >= RNG_BATTERY_SIGNIFICANCE,
+        },
+        "serial_correlation": {
+            "coefficient": correlation,
+            "p_value": correlation_p,
+            "passed": correlation_p >= RNG_BATTERY_SIGNIFICANCE,
+        },
+        "entropy": {
+            "bits_per_byte": entropy,
+            "expected_bits_per_byte": expected_entropy,
+        },
+    }
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from itertools import accumulate
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from .constants import *
+
+
+__all__ = [
+    "WordList",
+    "as_word_list",
+    "is_compiled_word_list",
+    "word_list_cache_dir",
+]
+
+# compiled word list files start with this magic string (the last two bytes are the format version)
+COMPILED_WORD_LIST_MAGIC = b"PWDGWL01"
+
+# magic, SHA-256 hash of the source text file, number of words, size of the UTF-8 blob
+_header = struct.Struct("<8s32sQQ")
+
+
+class WordList(object):
+    """An immutable, sorted list of unique words. All of the words are stored in a single UTF-8 encoded blob, each
+    terminated by a newline, along with a table of offsets into the blob, so that a word list takes up only a
+    couple of allocations instead of one per word. Word lists can be saved to and memory-mapped from compiled word list
+    files, in which case loading one involves no parsing at all.
+
+    Word lists support len(), indexing, iteration and membership tests (by way of binary search). Since the words
+    are sorted, all of the words beginning with a particular letter (or any other prefix) occupy a contiguous range
+    of indices (see letter_ranges() and prefix_range()).
+    """
+
+    def __init__(self, blob, offsets, source_hash=None, path=None):
+        """Constructor. Word lists should generally be created through WordList.from_words() or WordList.load().
+
+        Args:
+            blob: A bytes-like object (e.g. bytes or an mmap) containing the sorted, UTF-8 encoded words, each
+                terminated by a newline.
+            offsets: A sequence of len(words) + 1 integers, giving the start offset of each word in the blob
+                (the last entry being the offset just past the end of the last word's newline).
+            source_hash: The SHA-256 hash of the text file from which this word list was compiled (if any).
+            path: The path of the compiled word list file from which this word list was loaded (if any).
+        """
+        self._blob = blob
+        self._offsets = offsets
+        self.source_hash = source_hash
+        self.path = path
+        self._letter_ranges = None
+        self._prefix_ranges = dict()
+
+    @classmethod
+    def from_words(cls, words, source_hash=None):
+        """Builds a word list from the given iterable of words. Duplicate and empty words are removed, and the
+        words are sorted by their UTF-8 encoding.
+
+        Args:
+            words: An iterable of strings, none of which may contain newlines.
+            source_hash: The hash of the source file from which the words were read (if any).
+
+        Returns:
+            A WordList containing the given words.
+        """
+        # code point order is the same as UTF-8 byte order
+        words = sorted(set(words).difference([""]))
+        text = "\n".join(words) + "\n" if words else ""
+        if text.count("\n") != len(words):
+            raise ValueError("Words in a word list may not contain newlines")
+        blob = text.encode("utf-8")
+        if len(blob) == len(text):
+            lengths = map(len, words)
+        else:
+            lengths = (len(word.encode("utf-8")) for word in words)
+        offsets = array("I", [0])
+        offsets.extend(accumulate(length + 1 for length in lengths))
+        return cls(blob, offsets, source_hash=source_hash)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps a compiled word list file (as written by WordList.save()).
+
+        Args:
+            path: The path to the compiled word list file.
+
+        Returns:
+            A WordList backed by the memory-mapped file.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _header.size:
+                raise ValueError("Not a compiled word list: %s" % path)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, source_hash, count, blob_size = _header.unpack_from(mapped, 0)
+        offsets_start = _header.size
+        blob_start = offsets_start + 4 * (count + 1)
+        if magic != COMPILED_WORD_LIST_MAGIC or blob_start + blob_size != size:
+            raise ValueError("Not a valid compiled word list: %s" % path)
+
+        offsets = memoryview(mapped)[offsets_start:blob_start].cast("I")
+        if sys.byteorder == "big":
+            offsets = array("I", offsets.tobytes())
+            offsets.byteswap()
+        if count > 0 and not (offsets[0] == blob_start and offsets[-1] == size):
+            raise ValueError("Not a valid compiled word list: %s" % path)
+        return cls(
+            mapped,
+            offsets,
+            source_hash=source_hash if any(source_hash) else None,
+            path=path,
+        )
+
+    def save(self, path):
+        """Writes this word list to the given path as a compiled word list file. The file is written to a
+        temporary file first and then moved into place, so concurrent readers never see a partial file.
+
+        Args:
+            path: The path of the file to write.
+        """
+        count = len(self)
+        blob_start, blob_end = self._offsets[0], self._offsets[-1]
+        # offsets are stored relative to the start of the file, so that the mapped file can be indexed directly
+        shift = _header.size + 4 * (count + 1) - blob_start
+        offsets = array("I", [offset + shift for offset in self._offsets])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        header = _header.pack(
+            COMPILED_WORD_LIST_MAGIC,
+            self.source_hash or bytes(32),
+            count,
+            blob_end - blob_start,
+        )
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(offsets.tobytes())
+                f.write(self._blob[blob_start:blob_end])
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @property
+    def nbytes(self):
+        """The approximate amount of memory (or mapped file space) occupied by this word list, in bytes."""
+        return 4 * len(self._offsets) + self._offsets[-1] - self._offsets[0]
+
+    @property
+    def mean_word_size(self):
+        """The mean size of the words in this word list, in UTF-8 bytes (which, for ASCII words, is their length)."""
+        if len(self) == 0:
+            return 0.0
+        return (self._offsets[-1] - self._offsets[0]) / len(self) - 1.0
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("word list index out of range")
+        return self._blob[self._offsets[i] : self._offsets[i + 1] - 1].decode("utf-8")
+
+    def __iter__(self):
+        text = self._blob[self._offsets[0] : self._offsets[-1]].decode("utf-8")
+        return iter(text.split("\n")[:-1])
+
+    def letter_ranges(self):
+        """Returns the range of indices occupied by the words beginning with each letter. The ranges are worked
+        out once (by way of binary search) and cached.
+
+        Returns:
+            A dictionary mapping each first letter to a (start, end) tuple, such that the words beginning with that
+            letter are self[start:end].
+        """
+        if self._letter_ranges is None:
+            ranges = dict()
+            start = 0
+            while start < len(self):
+                letter = self[start][0]
+                end = self._prefix_end(letter.encode("utf-8"), start)
+                ranges[letter] = (start, end)
+                start = end
+            self._letter_ranges = ranges
+        return self._letter_ranges
+
+    def prefix_range(self, prefix):
+        """Returns the range of indices occupied by the words beginning with the given prefix, which may be any
+        number of characters long. The range is found by way of binary search within the range of the prefix's first
+        letter. Short prefixes (of up to constants.WORD_LIST_MEMO_PREFIX_LENGTH characters) that some words begin
+        with are cached, so that looking them up again costs a dictionary lookup; since there are at most as many
+        of those as there are words, the cache can't grow without bound, whatever prefixes are looked up.
+
+        Args:
+            prefix: A non-empty string.
+
+        Returns:
+            A (start, end) tuple, such that the words beginning with the prefix are self[start:end]. If no words
+            begin with the prefix, start == end.
+        """
+        prefix_range = self._prefix_ranges.get(prefix)
+        if prefix_range is None:
+            if not prefix:
+                raise ValueError("Word prefixes cannot be empty")
+            lo, hi = self.letter_ranges().get(prefix[0], (0, 0))
+            if len(prefix) > 1 and lo < hi:
+                encoded = prefix.encode("utf-8")
+                lo = self._bisect(encoded, lo, hi)
+                hi = self._bisect(encoded + b"\xff", lo, hi)
+            prefix_range = (lo, hi)
+            if lo < hi and len(prefix) <= WORD_LIST_MEMO_PREFIX_LENGTH:
+                self._prefix_ranges[prefix] = prefix_range
+        return prefix_range
+
+    def __contains__(self, word):
+        if not isinstance(word, str) or not word:
+            return False
+        # only the words beginning with the same letter need to be searched
+        letter_range = self.letter_ranges().get(word[0])
+        if letter_range is None:
+            return False
+        return self._find(word.encode("utf-8"), *letter_range) >= 0
+
+    def _bisect(self, encoded, lo=0, hi=None):
+        """Returns the index of the first word >= the given UTF-8 encoded word."""
+        blob, offsets = self._blob, self._offsets
+        if hi is None:
+            hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[offsets[mid] : offsets[mid + 1] - 1] < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _prefix_end(self, encoded_prefix, lo=0):
+        """Returns the index just past the last word beginning with the given UTF-8 encoded prefix. Since 0xff never
+        occurs in UTF-8, every word beginning with the prefix sorts before the prefix followed by 0xff."""
+        return self._bisect(encoded_prefix + b"\xff", lo)
+
+    def _find(self, encoded, lo=0, hi=None):
+        i = self._bisect(encoded, lo, hi)
+        if i < len(self) and self._blob[self._offsets[i] : self._offsets[i + 1] - 1] == encoded:
+            return i
+        return -1
+
+    def __repr__(self):
+        return "WordList(%d words%s)" % (
+            len(self),
+            (", path=%r" % self.path) if self.path else "",
+        )
+
+
+def as_word_list(words):
+    """Returns the given words as a WordList, building one if necessary.
+
+    Args:
+        words: A WordList, or any other iterable of words (e.g. a set).
+
+    Returns:
+        A WordList. If words is already a WordList, it is returned as-is.
+    """
+    return words if isinstance(words, WordList) else WordList.from_words(words)
+
+
+def _require_word_list(words, function):
+    """Returns the given words if they're a WordList, for functions called once per password, which would
+    otherwise have to convert the same collection of words into a WordList on every call.
+
+    Raises:
+        TypeError: If the words aren't a WordList.
+    """
+    if not isinstance(words, WordList):
+        raise TypeError(
+            "%s() needs a WordList rather than a %s, so that the words aren't converted on every call: convert "
+            "them once with as_word_list(), or load them with load_word_list()" % (function, type(words).__name__)
+        )
+    return words
+
+
+def is_compiled_word_list(path):
+    """Checks whether the file at the given path is a compiled word list (as opposed to a plain text one)."""
+    with open(path, "rb") as f:
+        return f.read(len(COMPILED_WORD_LIST_MAGIC)) == COMPILED_WORD_LIST_MAGIC
+
+
+def word_list_cache_dir():
+    """Returns the directory in which compiled copies of word lists are cached. This can be overridden through
+    the PASSWDGEN_CACHE_DIR environment variable, and otherwise follows the XDG base directory conventions."""
+    if os.environ.get(WORD_LIST_CACHE_DIR_ENV):
+        return os.environ[WORD_LIST_CACHE_DIR_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "passwdgen")
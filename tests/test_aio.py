@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import unittest
+from unittest import mock
+
+from passwdgen.aio import *
+from passwdgen.aio import _word_list_loads
+from passwdgen.constants import *
+from passwdgen.instrument import recording
+from passwdgen.utils import clear_loaded_word_lists, load_word_list
+
+
+class TestAsyncGeneration(unittest.TestCase):
+    def test_word_list_loaded_once(self):
+        async def load():
+            return await asyncio.gather(*[aload_word_list() for _ in range(10)])
+
+        clear_loaded_word_lists()
+        with mock.patch("passwdgen.aio.load_word_list", wraps=load_word_list) as load_mock:
+            word_lists = asyncio.run(load())
+        self.assertEqual(1, load_mock.call_count)
+        self.assertEqual(1, len(set(id(word_list) for word_list in word_lists)))
+        # completed loads aren't kept by the async API: the word list is shared (across event loops too) through
+        # load_word_list()'s cache
+        self.assertEqual({}, _word_list_loads)
+        self.assertIs(word_lists[0], load_word_list())
+        self.assertIs(word_lists[0], asyncio.run(aload_word_list()))
+        clear_loaded_word_lists()
+        self.assertIsNot(word_lists[0], asyncio.run(aload_word_list()))
+
+    def test_generate(self):
+        async def generate():
+            return await asyncio.gather(
+                agenerate_chars(PC_NUMERIC, length=6),
+                agenerate_words(word_count=3, separator=":"),
+                agenerate_words(starting_letters="abc"),
+            )
+
+        digits, words, initials = asyncio.run(generate())
+        self.assertTrue(digits.isdigit() and len(digits) == 6)
+        self.assertEqual(3, len(words.split(":")))
+        for letter, word in zip("abc", initials.split("-")):
+            self.assertTrue(word.startswith(letter))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, asyncio.run, agenerate_chars("some-unrecognised-charset"))
+
+        async def iterate():
+            async for _ in aiter_passwords(10, batch_size=0):
+                pass
+
+        self.assertRaises(ValueError, asyncio.run, iterate())
+
+    def test_iter_passwords(self):
+        async def collect(**kwargs):
+            return [pw async for pw in aiter_passwords(**kwargs)]
+
+        passwords = asyncio.run(collect(count=1000, charset=PC_ALPHA_NUMERIC, length=10, batch_size=64))
+        self.assertEqual(1000, len(passwords))
+        for pw in passwords:
+            self.assertEqual(10, len(pw))
+        passwords = asyncio.run(collect(count=10, dict_set={"apple", "banana", "cherry"}, length=2))
+        for pw in passwords:
+            self.assertTrue(set(pw.split("-")).issubset({"apple", "banana", "cherry"}))
+
+    def test_backpressure(self):
+        async def consume_one():
+            with recording() as recorder:
+                passwords = aiter_passwords(1000, length=2, batch_size=10, prefetch=1)
+                await passwords.__anext__()
+                # give the executor every chance to run ahead of the consumer
+                await asyncio.sleep(0.05)
+                await passwords.aclose()
+            return recorder.as_dict()
+
+        phases = asyncio.run(consume_one())
+        self.assertEqual(1, phases["words_batch.draw"]["calls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+import unittest
+
+from passwdgen.audit import *
+from passwdgen.constants import *
+from passwdgen.generator import chars_batch, words_batch
+from passwdgen.utils import calculate_entropy, load_word_list
+
+
+class TestPasswordAudit(unittest.TestCase):
+    word_list = load_word_list()
+
+    def get_passwords(self):
+        return (
+            chars_batch(100, PC_SPECIAL)
+            + words_batch(100, self.word_list)
+            + ["123456", "password", "café", "Hello World"]
+        )
+
+    def test_audit_password(self):
+        self.assertEqual(
+            (PC_NUMERIC, calculate_entropy("123456")[PC_NUMERIC]), audit_password("123456")
+        )
+        charset, entropy = audit_password("password", self.word_list)
+        self.assertEqual(PC_DICT, charset)
+        self.assertEqual(min(calculate_entropy("password", self.word_list).values()), entropy)
+        self.assertEqual((None, None), audit_password("café"))
+
+    def check_jsonl(self, passwords, jobs):
+        out = io.StringIO()
+        stats = audit_stream(passwords, out, OUTPUT_FORMAT_JSONL, self.word_list, jobs=jobs, chunk_size=32)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(passwords, [record["password"] for record in records])
+        for record in records:
+            charset, entropy = audit_password(record["password"], self.word_list)
+            self.assertEqual(len(record["password"]), record["length"])
+            self.assertEqual(charset, record["charset"])
+            self.assertEqual(entropy, record["entropy"])
+        return stats
+
+    def test_audit_stream(self):
+        passwords = self.get_passwords()
+        stats = self.check_jsonl(passwords, 1)
+        self.assertEqual(len(passwords), stats.count)
+        self.assertEqual(1, stats.unclassified)
+        self.assertEqual(len(passwords) - 1, sum(stats.histogram.values()))
+        self.assertEqual(len(passwords) - 1, sum(stats.charsets.values()))
+        self.assertEqual(1, stats.charsets[PC_NUMERIC])
+        self.assertTrue(stats.charsets[PC_DICT] >= 101)
+
+    def test_audit_stream_jobs(self):
+        passwords = self.get_passwords()
+        serial = self.check_jsonl(passwords, 1)
+        parallel = self.check_jsonl(passwords, 2)
+        self.assertEqual(serial.as_dict(), parallel.as_dict())
+
+    def test_csv_output(self):
+        out = io.StringIO()
+        audit_stream(["123456", "café"], out, OUTPUT_FORMAT_CSV)
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        self.assertEqual(
+            [
+                ["password", "length", "charset", "entropy"],
+                ["123456", "6", PC_NUMERIC, "%.6f" % calculate_entropy("123456")[PC_NUMERIC]],
+                ["café", "4", "", ""],
+            ],
+            rows,
+        )
+
+    def test_stats_merge(self):
+        first, second, combined = AuditStats(), AuditStats(), AuditStats()
+        for stats, length, charset, entropy in [
+            (first, 6, PC_NUMERIC, 19.9),
+            (second, 4, None, None),
+            (second, 12, PC_SPECIAL, 78.0),
+        ]:
+            stats.add(length, charset, entropy)
+            combined.add(length, charset, entropy)
+        first.merge(second)
+        self.assertEqual(combined.as_dict(), first.as_dict())
+        self.assertEqual(19.9, first.min_entropy)
+        self.assertEqual(78.0, first.max_entropy)
+        self.assertEqual({10: 1, 70: 1}, dict(first.histogram))
+
+    def test_validation(self):
+        self.assertRaises(ValueError, audit_stream, ["a"], io.StringIO(), "xml")
+        self.assertRaises(ValueError, audit_stream, ["a"], io.StringIO(), jobs=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import io
+import types
+import unittest
+from contextlib import redirect_stdout
+
+from passwdgen.aio import agenerate_words
+from passwdgen.cmdline import main
+from passwdgen.generator import *
+from passwdgen.server import PasswordServer
+from passwdgen.constants import *
+from passwdgen.utils import *
+
+
+class TestBatchGeneration(unittest.TestCase):
+    word_list = load_word_list()
+
+    def test_chars_batch(self):
+        for charset_id, charset in PASSWORD_CHARSETS.items():
+            passwords = chars_batch(50, charset_id, length=15)
+            self.assertEqual(50, len(passwords))
+            for pw in passwords:
+                self.assertEqual(15, len(pw))
+                self.assertTrue(set(pw).issubset(charset))
+
+    def test_chars_batch_covers_charset(self):
+        passwords = chars_batch(1000, PC_SPECIAL)
+        self.assertEqual(PASSWORD_CHARSETS[PC_SPECIAL], set("".join(passwords)))
+
+    def test_chars_batch_entropy(self):
+        for pw in chars_batch(10, PC_ALPHA_NUMERIC, min_entropy=80):
+            entropy = calculate_entropy(pw)
+            self.assertTrue(entropy[PC_ALPHA_NUMERIC] >= 80.0)
+
+    def test_chars_batch_unrecognised_charset(self):
+        self.assertRaises(ValueError, chars_batch, 10, "some-unrecognised-charset")
+
+    def test_lazy_batches(self):
+        passwords = chars_batch(100000, PC_NUMERIC, length=4, lazy=True)
+        self.assertIsInstance(passwords, types.GeneratorType)
+        self.assertEqual(100000, sum(1 for _ in passwords))
+
+        passwords = words_batch(10, self.word_list, lazy=True)
+        self.assertIsInstance(passwords, types.GeneratorType)
+        self.assertEqual(10, len(list(passwords)))
+
+    def test_words_batch(self):
+        passwords = words_batch(50, self.word_list, separator=":", word_count=6)
+        self.assertEqual(50, len(passwords))
+        for pw in passwords:
+            pw_words = pw.split(":")
+            self.assertEqual(6, len(pw_words))
+            for word in pw_words:
+                self.assertTrue(word in self.word_list)
+
+    def test_words_batch_entropy(self):
+        for pw in words_batch(10, self.word_list, min_entropy=70):
+            entropy = calculate_entropy(pw, dict_set=self.word_list)
+            if PC_DICT in entropy:
+                self.assertTrue(entropy[PC_DICT] >= 70.0)
+
+    def test_words_batch_starting_letters(self):
+        for pw in words_batch(50, self.word_list, starting_letters="Hello"):
+            pw_words = pw.split(DEFAULT_WORD_SEPARATOR)
+            self.assertEqual(5, len(pw_words))
+            for letter, word in zip("hello", pw_words):
+                self.assertTrue(word.startswith(letter))
+
+        self.assertRaises(
+            ValueError, words_batch, 10, self.word_list, word_count=5, starting_letters="abc"
+        )
+
+    def test_no_words(self):
+        self.assertEqual(["", "", ""], words_batch(3, self.word_list, word_count=0))
+        self.assertEqual("", asyncio.run(agenerate_words(self.word_list, word_count=0)))
+        self.assertEqual([""] * 2, PasswordServer(self.word_list).generate({"length": 0, "count": 2}))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(["generate", "-t", PC_DICT, "-l", "0"])
+        self.assertEqual("\n", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+
+from passwdgen.bench import *
+from passwdgen.bench import _fixture_words
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_fixtures_are_fixed(self):
+        words = _fixture_words(1000)
+        self.assertEqual(1000, len(set(words)))
+        self.assertEqual(words, _fixture_words(1000))
+        self.assertEqual(set("pas"), set("pas") & set(word[0] for word in words))
+
+    def test_run_benchmarks(self):
+        names = []
+        results = run_benchmarks(
+            quick=True,
+            pattern="words=1000]",
+            min_time=0.001,
+            progress=lambda name, result: names.append(name),
+        )
+        # the results must be machine-readable
+        results = json.loads(json.dumps(results))
+        self.assertEqual(sorted(names), sorted(results["results"]))
+        self.assertIn("words[word_count=4,words=1000]", names)
+        self.assertIn("load_word_list[source=text,words=1000]", names)
+        self.assertIn("clean_word_list[words=1000]", names)
+        for name in names:
+            self.assertIn("words=1000]", name)
+            self.assertGreater(results["results"][name]["per_second"], 0)
+
+    def test_compare_results(self):
+        baseline = {
+            "version": 1,
+            "results": {
+                "a": {"per_second": 100.0},
+                "b": {"per_second": 100.0},
+                "c": {"per_second": 100.0},
+            },
+        }
+        results = {
+            "version": 1,
+            "results": {
+                "a": {"per_second": 85.0},
+                "b": {"per_second": 70.0},
+                "d": {"per_second": 1.0},
+            },
+        }
+        comparisons = compare_results(results, baseline, threshold=0.2)
+        self.assertEqual(["a", "b"], [c["name"] for c in comparisons])
+        self.assertEqual([False, True], [c["regression"] for c in comparisons])
+        self.assertAlmostEqual(-0.3, comparisons[1]["change"])
+        self.assertRaises(ValueError, compare_results, results, dict(baseline, version=0))
+        self.assertRaises(ValueError, compare_results, results, baseline, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
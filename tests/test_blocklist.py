@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from passwdgen.blocklist import *
+from passwdgen.bloom import BloomFilter
+from passwdgen.constants import *
+from passwdgen.generator import chars, chars_batch, words_batch
+from passwdgen.utils import _import_numpy
+
+
+class TestBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, "banned.txt")
+        with open(self.input_path, "wb") as f:
+            f.write("".join("pw-%d\n" % i for i in range(10000)).encode("utf-8"))
+            f.write("Password1!\r\n\ncorrect horse battery staple\nmotdepassé".encode("utf-8"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_compile_and_check(self):
+        result = compile_blocklist(self.input_path)
+        self.assertEqual(self.input_path + BLOCKLIST_EXTENSION, result["output_path"])
+        self.assertEqual(10003, result["entries"])
+
+        with Blocklist(result["output_path"]) as blocklist:
+            self.assertEqual(10003, len(blocklist))
+            for password in ["pw-0", "pw-9999", "Password1!", "correct horse battery staple", "motdepassé"]:
+                self.assertIn(password, blocklist)
+            self.assertNotIn("password1!", blocklist)
+            self.assertNotIn("", blocklist)
+
+            others = ["other-%d" % i for i in range(20000)]
+            false_positives = sum(blocklist.contains_many(others))
+            self.assertLess(false_positives, 20)
+            self.assertLess(blocklist.false_positive_rate, 2 * DEFAULT_BLOCKLIST_FALSE_POSITIVE_RATE)
+            self.assertEqual([password in blocklist for password in others], blocklist.contains_many(others))
+
+    def test_python_and_numpy_filters_match(self):
+        numpy_path = compile_blocklist(self.input_path, os.path.join(self.temp_dir, "a"))["output_path"]
+        with mock.patch("passwdgen.blocklist._import_numpy", lambda: None):
+            python_path = compile_blocklist(self.input_path, os.path.join(self.temp_dir, "b"))["output_path"]
+            with Blocklist(python_path) as blocklist:
+                self.assertEqual([True, False], blocklist.contains_many(["pw-1", "pw-x"]))
+        with open(numpy_path, "rb") as a, open(python_path, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_ignore_case(self):
+        path = compile_blocklist(self.input_path, ignore_case=True)["output_path"]
+        with Blocklist(path) as blocklist:
+            self.assertIn("PASSWORD1!", blocklist)
+            self.assertIn("MotDePassé", blocklist)
+            self.assertNotIn("PASSWORD2!", blocklist)
+
+    def test_generation(self):
+        with open(self.input_path, "wt") as f:
+            f.write("\n".join(str(i) for i in range(9)))
+        path = compile_blocklist(self.input_path)["output_path"]
+        with Blocklist(path) as blocklist:
+            self.assertEqual("9", chars(PC_NUMERIC, length=1, blocklist=blocklist))
+            self.assertEqual(["9"] * 2000, chars_batch(2000, PC_NUMERIC, length=1, blocklist=blocklist))
+            self.assertEqual(
+                ["9"] * 100, words_batch(100, ["8", "9"], word_count=1, blocklist=blocklist)
+            )
+
+        with open(self.input_path, "wt") as f:
+            f.write("\n".join(str(i) for i in range(10)))
+        path = compile_blocklist(self.input_path)["output_path"]
+        with Blocklist(path) as blocklist:
+            self.assertRaises(ValueError, chars, PC_NUMERIC, length=1, blocklist=blocklist)
+
+    def test_invalid_blocklist(self):
+        self.assertRaises(ValueError, Blocklist, self.input_path)
+        self.assertRaises(ValueError, compile_blocklist, self.input_path, false_positive_rate=0)
+
+        # blocklists compiled with an older format have to be compiled again
+        path = compile_blocklist(self.input_path)["output_path"]
+        with open(path, "r+b") as f:
+            f.write(b"PWDGBL01")
+        with self.assertRaisesRegex(ValueError, "older version"):
+            Blocklist(path)
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_large_filter(self):
+        # a filter of more than 2 ** 32 bits, over a sparse stand-in for its buffer
+        bits = 5 * 2 ** 32 + 3
+        bloom = BloomFilter(defaultdict(int), bits, 7)
+        digests = [hashlib.blake2b(b"%d" % i, digest_size=16).digest() for i in range(2000)]
+        first = [bloom._positions(digest)[0] for digest in digests]
+        # the first positions are spread over the whole filter, not just its first 2 ** 32 bits
+        self.assertGreater(sum(position >= 2 ** 32 for position in first), 0.7 * len(first))
+        for digest in digests[:1000]:
+            bloom.add(digest)
+        self.assertTrue(all(digest in bloom for digest in digests[:1000]))
+        self.assertFalse(any(digest in bloom for digest in digests[1000:]))
+
+        numpy = _import_numpy()
+        if numpy is not None:
+            positions = list(bloom._positions_many(b"".join(digests), numpy))
+            for i, digest in enumerate(digests):
+                self.assertEqual(bloom._positions(digest), [int(p[i]) for p in positions])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import math
+import unittest
+
+from passwdgen.constants import *
+from passwdgen.generator import chars_batch, words_batch
+from passwdgen.utils import calculate_entropy, load_word_list, permutations, _log2_permutations
+
+
+def reference_charset_entropies(password):
+    password_letters = set(password)
+    return {
+        charset_name: math.log(1.0 * len(charset), 2.0) * len(password)
+        for charset_name, charset in PASSWORD_CHARSETS.items()
+        if password_letters.issubset(charset)
+    }
+
+
+class TestEntropyCalculation(unittest.TestCase):
+    word_list = load_word_list()
+
+    def test_charset_entropies(self):
+        passwords = ["", "abc", "ABC", "abc-def", "Hello World 42", "p@ssw0rd!", "café", "tab\there"]
+        for charset_id in PASSWORD_CHARSETS:
+            passwords.extend(chars_batch(20, charset_id, length=12))
+        for pw in passwords:
+            self.assertEqual(reference_charset_entropies(pw), calculate_entropy(pw))
+
+    def test_dict_entropy(self):
+        for pw in words_batch(20, self.word_list, word_count=4):
+            entropy = calculate_entropy(pw, dict_set=self.word_list)
+            self.assertAlmostEqual(
+                math.log(permutations(len(self.word_list), 4), 2.0), entropy[PC_DICT], places=9
+            )
+
+    def test_dict_entropy_requires_unique_known_words(self):
+        words = set(["apple", "banana", "cherry"])
+        self.assertIn(PC_DICT, calculate_entropy("apple:banana", dict_set=words))
+        self.assertIn(PC_DICT, calculate_entropy("cherry", dict_set=words))
+        self.assertNotIn(PC_DICT, calculate_entropy("apple:apple", dict_set=words))
+        self.assertNotIn(PC_DICT, calculate_entropy("apple:durian", dict_set=words))
+        self.assertNotIn(PC_DICT, calculate_entropy("Apple:banana", dict_set=words))
+
+    def test_log2_permutations(self):
+        for n, k in [(1, 1), (10, 1), (10, 5), (10, 10), (7776, 6), (71188, 300), (10**6, 10**4)]:
+            expected = math.log(permutations(n, k), 2.0)
+            self.assertTrue(
+                math.isclose(expected, _log2_permutations(n, k), rel_tol=1e-12, abs_tol=1e-12)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
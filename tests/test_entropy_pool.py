@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import unittest
+
+from passwdgen.rng import EntropyPool
+
+
+class TestEntropyPool(unittest.TestCase):
+    def test_read_lengths(self):
+        pool = EntropyPool(block_size=64)
+        for n in [0, 1, 7, 8, 63, 64, 65, 1000]:
+            self.assertEqual(n, len(pool.read(n)))
+
+    def test_reads_do_not_repeat(self):
+        pool = EntropyPool(block_size=64)
+        chunks = [pool.read(16) for _ in range(100)]
+        self.assertEqual(len(chunks), len(set(chunks)))
+
+    def test_uint64_range(self):
+        pool = EntropyPool(block_size=20)
+        for _ in range(1000):
+            self.assertTrue(0 <= pool.uint64() < 2**64)
+
+    def test_block_size_validation(self):
+        self.assertRaises(ValueError, EntropyPool, block_size=4)
+
+    def test_concurrent_draws(self):
+        pool = EntropyPool(block_size=128)
+        results = []
+
+        def draw():
+            values = [pool.uint64() for _ in range(2000)]
+            results.extend(values)
+
+        threads = [threading.Thread(target=draw) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 8000 random 64-bit values should never collide unless bytes were served twice
+        self.assertEqual(8000, len(set(results)))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork()")
+    def test_reseed_after_fork(self):
+        pool = EntropyPool(block_size=4096)
+        pool.read(8)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.write(write_fd, pool.read(32))
+            os._exit(0)
+        os.close(write_fd)
+        child_bytes = os.read(read_fd, 32)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        # the child must not have been served the bytes left over in the parent's buffer
+        self.assertNotEqual(pool.read(32), child_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+
+from passwdgen.constants import *
+from passwdgen.generator import chars, chars_batch, words
+from passwdgen.instrument import *
+from passwdgen.instrument import _sinks, span
+from passwdgen.utils import calculate_entropy, clear_loaded_word_lists, load_word_list, secure_random
+from passwdgen.cmdline import build_parser
+
+
+class ListSink(object):
+    def __init__(self):
+        self.records = []
+
+    def record(self, name, duration, self_duration, counters, parent):
+        self.records.append((name, duration, self_duration, dict(counters), parent))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_no_sinks_by_default(self):
+        self.assertEqual([], _sinks)
+        with span("anything") as s:
+            s.count("words_loaded", 10)
+
+    def test_sink_registration(self):
+        sink = ListSink()
+        add_metrics_sink(sink)
+        try:
+            secure_random(10)
+        finally:
+            remove_metrics_sink(sink)
+        secure_random(10)
+        self.assertEqual(["secure_random"], [record[0] for record in sink.records])
+        self.assertIsNone(sink.records[0][4])
+
+    def test_nested_calls(self):
+        sink = ListSink()
+        add_metrics_sink(sink)
+        try:
+            chars(PC_SPECIAL, length=5)
+        finally:
+            remove_metrics_sink(sink)
+        names = [record[0] for record in sink.records]
+        self.assertEqual(["secure_random"] * 5 + ["chars"], names)
+        chars_record = sink.records[-1]
+        self.assertIsNone(chars_record[4])
+        for record in sink.records[:-1]:
+            self.assertEqual("chars", record[4])
+        # the time spent in nested calls is excluded from the self time
+        nested_time = sum(record[1] for record in sink.records[:-1])
+        self.assertAlmostEqual(chars_record[1] - nested_time, chars_record[2])
+        self.assertLessEqual(chars_record[2], chars_record[1])
+
+    def test_recording(self):
+        word_list = load_word_list()
+        clear_loaded_word_lists()
+        with recording() as recorder:
+            load_word_list()
+            # the word list is kept in memory, so it isn't loaded again
+            words()
+            calculate_entropy("correct-horse-battery-staple", dict_set=word_list)
+            chars_batch(100, PC_SPECIAL)
+        self.assertEqual([], _sinks)
+
+        phases = recorder.as_dict()
+        self.assertEqual(2, phases["load_word_list"]["calls"])
+        self.assertEqual(1, phases["load_word_list"]["memory_cache_hits"])
+        self.assertEqual(len(word_list), phases["load_word_list"]["words_loaded"])
+        self.assertEqual(1, phases["words"]["calls"])
+        self.assertEqual(DEFAULT_WORD_PASSWORD_WORDS, phases["secure_random"]["calls"])
+        self.assertGreater(phases["words"]["random_bytes"], 0)
+        self.assertEqual(1, phases["calculate_entropy"]["calls"])
+        self.assertGreaterEqual(phases["chars_batch.draw"]["random_bytes"], 100 * DEFAULT_CHAR_PASSWORD_LENGTH * 7 // 8)
+
+        out = io.StringIO()
+        recorder.report(out)
+        self.assertIn("load_word_list", out.getvalue())
+        self.assertIn("(not instrumented)", out.getvalue())
+
+    def test_profile_options(self):
+        args = build_parser(["--profile-output", "out.pstats", "version"]).parse_args(
+            ["--profile-output", "out.pstats", "version"]
+        )
+        self.assertEqual("version", args.command)
+        self.assertEqual("out.pstats", args.profile_output)
+        args = build_parser(["--profile", "generate", "-n", "2"]).parse_args(
+            ["--profile", "generate", "-n", "2"]
+        )
+        self.assertTrue(args.profile)
+        self.assertEqual(2, args.count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from passwdgen.constants import *
+from passwdgen.generator import chars, chars_batch, words_batch
+from passwdgen.ledger import *
+
+
+def _add_passwords(path, start, count):
+    with Ledger(path) as ledger:
+        return sum(ledger.add("pw-%d" % i) for i in range(start, start + count))
+
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_add_and_reopen(self):
+        with Ledger(self.path) as ledger:
+            self.assertTrue(ledger.add("correct-horse"))
+            self.assertFalse(ledger.add("correct-horse"))
+            self.assertIn("correct-horse", ledger)
+            self.assertNotIn("battery-staple", ledger)
+            self.assertEqual(1, len(ledger))
+
+        with Ledger(self.path) as ledger:
+            self.assertIn("correct-horse", ledger)
+            self.assertEqual(1, len(ledger))
+
+        # only keyed hashes are stored, and the key is private
+        key_path = os.path.join(self.path, "key")
+        self.assertEqual(LEDGER_KEY_SIZE, os.path.getsize(key_path))
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(key_path).st_mode))
+        for filename in os.listdir(self.path):
+            with open(os.path.join(self.path, filename), "rb") as f:
+                self.assertNotIn(b"correct-horse", f.read())
+
+    def test_growth_and_rebuild(self):
+        index_path = os.path.join(self.path, "index")
+        with mock.patch("passwdgen.ledger.LEDGER_INITIAL_CAPACITY", 16):
+            with Ledger(self.path) as ledger:
+                initial_size = os.path.getsize(index_path)
+                for i in range(1000):
+                    self.assertTrue(ledger.add("pw-%d" % i))
+                self.assertEqual(1000, len(ledger))
+        self.assertGreater(os.path.getsize(index_path), 64 * initial_size)
+
+        # the index is rebuilt from the log
+        os.unlink(index_path)
+        with Ledger(self.path) as ledger:
+            self.assertEqual(1000, len(ledger))
+            for i in range(1000):
+                self.assertIn("pw-%d" % i, ledger)
+            self.assertNotIn("pw-1000", ledger)
+
+        # and so is an index in an older format
+        with open(index_path, "r+b") as f:
+            f.write(b"PWDGLX01")
+        with Ledger(self.path) as ledger:
+            self.assertEqual(1000, len(ledger))
+            self.assertIn("pw-999", ledger)
+
+    def test_no_reissue(self):
+        with Ledger(self.path) as ledger:
+            # every 2-digit PIN, once each
+            pins = [chars(PC_NUMERIC, length=2, ledger=ledger) for _ in range(100)]
+            self.assertEqual(100, len(set(pins)))
+            self.assertRaises(ValueError, chars, PC_NUMERIC, length=2, ledger=ledger)
+
+        with Ledger(self.path) as ledger:
+            self.assertRaises(ValueError, chars_batch, 1, PC_NUMERIC, length=2, ledger=ledger)
+
+    def test_batches(self):
+        with Ledger(self.path) as ledger:
+            passwords = chars_batch(500, PC_NUMERIC, length=3, ledger=ledger)
+            self.assertEqual(500, len(set(passwords)))
+            passwords = words_batch(20, ["alpha", "bravo", "charlie", "delta", "echo"], word_count=2, ledger=ledger)
+            self.assertEqual(20, len(set(passwords)))
+            self.assertEqual(520, len(ledger))
+
+    @unittest.skipIf(os.name == "nt", "ledgers are only safe for concurrent writers where flock is available")
+    def test_concurrent_writers(self):
+        Ledger(self.path).close()
+        pool = multiprocessing.get_context("fork").Pool(4)
+        try:
+            added = pool.starmap(_add_passwords, [(self.path, i * 200, 300) for i in range(4)])
+        finally:
+            pool.close()
+            pool.join()
+        # the ranges overlap, and each overlapping password is only added once
+        self.assertEqual(900, sum(added))
+        with Ledger(self.path) as ledger:
+            self.assertEqual(900, len(ledger))
+
+
+if __name__ == "__main__":
+    unittest.main()
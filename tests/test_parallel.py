@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from passwdgen.parallel import *
+from passwdgen.constants import *
+from passwdgen.utils import *
+
+
+class TestParallelGeneration(unittest.TestCase):
+    word_list = load_word_list()
+
+    def test_chars_parallel(self):
+        passwords = list(
+            chars_parallel(1000, PC_ALPHA_NUMERIC, length=12, jobs=2, chunk_size=64)
+        )
+        self.assertEqual(1000, len(passwords))
+        self.assertEqual(1000, len(set(passwords)))
+        for pw in passwords:
+            self.assertEqual(12, len(pw))
+            self.assertTrue(set(pw).issubset(PASSWORD_CHARSETS[PC_ALPHA_NUMERIC]))
+
+    def test_unordered(self):
+        passwords = list(
+            chars_parallel(1000, PC_NUMERIC, length=6, jobs=2, ordered=False, chunk_size=100)
+        )
+        self.assertEqual(1000, len(passwords))
+
+    def test_single_job(self):
+        self.assertEqual(100, len(list(chars_parallel(100, PC_SPECIAL, jobs=1))))
+        self.assertEqual(100, len(list(words_parallel(100, self.word_list, jobs=1))))
+
+    def test_words_parallel(self):
+        passwords = list(
+            words_parallel(
+                500,
+                self.word_list,
+                separator=":",
+                word_count=4,
+                starting_letters="abcd",
+                jobs=2,
+                chunk_size=64,
+            )
+        )
+        self.assertEqual(500, len(passwords))
+        for pw in passwords:
+            pw_words = pw.split(":")
+            self.assertEqual(4, len(pw_words))
+            for letter, word in zip("abcd", pw_words):
+                self.assertTrue(word.startswith(letter))
+                self.assertTrue(word in self.word_list)
+
+    def test_words_parallel_from_set(self):
+        # word lists that don't come from a compiled word list file are shared through a temporary one
+        words = set(["alpha", "bravo", "charlie", "delta"])
+        passwords = list(words_parallel(200, words, word_count=3, jobs=2, chunk_size=50))
+        self.assertEqual(200, len(passwords))
+        for pw in passwords:
+            self.assertTrue(set(pw.split(DEFAULT_WORD_SEPARATOR)).issubset(words))
+
+    def test_separator_containing_newlines(self):
+        passwords = list(
+            words_parallel(100, self.word_list, separator="\n", word_count=2, jobs=2)
+        )
+        self.assertEqual(100, len(passwords))
+        for pw in passwords:
+            self.assertEqual(2, len(pw.split("\n")))
+
+    def test_stopping_early(self):
+        passwords = chars_parallel(10**9, PC_NUMERIC, length=4, jobs=2)
+        self.assertEqual(4, len(next(passwords)))
+        passwords.close()
+
+    def test_validation(self):
+        self.assertRaises(ValueError, chars_parallel, 10, "some-unrecognised-charset")
+        self.assertRaises(ValueError, chars_parallel, 10, PC_NUMERIC, jobs=0)
+        self.assertRaises(ValueError, chars_parallel, 10, PC_NUMERIC, chunk_size=0)
+        self.assertRaises(
+            ValueError, words_parallel, 10, self.word_list, word_count=5, starting_letters="abc"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
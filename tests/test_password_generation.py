@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import math
 import unittest
+from unittest import mock
 
 from passwdgen.generator import *
 from passwdgen.constants import *
 from passwdgen.utils import *
+from passwdgen.wordlist import as_word_list
 
 
 class TestPasswordGeneration(unittest.TestCase):
@@ -75,6 +78,20 @@ class TestPasswordGeneration(unittest.TestCase):
         entropy = calculate_entropy(pw, dict_set=self.word_list)
         self.assertTrue(entropy[PC_DICT] >= 100.0)
 
+    def test_plain_set_dictionary(self):
+        dict_set = set(self.word_list)
+        # other collections would have to be converted on every call, so they have to be converted up front
+        self.assertRaises(TypeError, words, dict_set, word_count=5)
+        self.assertRaises(TypeError, words, list(dict_set), word_count=5, blocklist=mock.Mock())
+        pw = words(as_word_list(dict_set), word_count=5, starting_letters="abcde")
+        pw_words = pw.split(DEFAULT_WORD_SEPARATOR)
+        self.assertEqual(5, len(pw_words))
+        for word in pw_words:
+            self.assertTrue(word in dict_set)
+        # batches still accept any collection, since it's only converted once per batch
+        for pw in words_batch(10, dict_set, word_count=5):
+            self.assertTrue(set(pw.split(DEFAULT_WORD_SEPARATOR)).issubset(dict_set))
+
     def test_starting_letters(self):
         starting_letters = "hello"
         pw = words(self.word_list, starting_letters=starting_letters)
@@ -83,6 +100,43 @@ class TestPasswordGeneration(unittest.TestCase):
         for i in range(len(pw_words)):
             self.assertTrue(pw_words[i].startswith(starting_letters[i]))
 
+    def test_starting_prefixes(self):
+        prefixes = ["pa", "SS", "wor", "d"]
+        pw_words = words(self.word_list, starting_letters=prefixes).split("-")
+        self.assertEqual(len(prefixes), len(pw_words))
+        for prefix, word in zip(prefixes, pw_words):
+            self.assertTrue(word.startswith(prefix.lower()))
+        self.assertRaises(ValueError, words, self.word_list, starting_letters=["pa", ""])
+        self.assertRaises(ValueError, words, self.word_list, starting_letters=["pa", "zzqx"])
+
+    def test_passphrase_entropy(self):
+        size = len(self.word_list)
+        self.assertAlmostEqual(4 * math.log(size, 2), passphrase_entropy(self.word_list, word_count=4))
+        start, end = self.word_list.prefix_range("wor")
+        self.assertAlmostEqual(
+            2 * math.log(end - start, 2),
+            passphrase_entropy(self.word_list, starting_letters=["wor", "wor"]),
+        )
+        # the exact entropy of the constrained password is lower than that computed from the whole dictionary
+        self.assertLess(
+            passphrase_entropy(self.word_list, starting_letters="hello"),
+            passphrase_entropy(self.word_list, word_count=5),
+        )
+
+    def test_starting_letters_min_entropy(self):
+        starting_letters = "abcdefghijklmnopqrstuvwxyz"
+        pw_words = words(self.word_list, min_entropy=50, starting_letters=starting_letters).split("-")
+        self.assertGreaterEqual(
+            passphrase_entropy(self.word_list, word_count=len(pw_words), starting_letters=starting_letters),
+            50.0,
+        )
+        self.assertLess(
+            passphrase_entropy(self.word_list, word_count=len(pw_words) - 1, starting_letters=starting_letters),
+            50.0,
+        )
+        for letter, word in zip(starting_letters, pw_words):
+            self.assertTrue(word.startswith(letter))
+
 
 if __name__ == "__main__":
     unittest.main()
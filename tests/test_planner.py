@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import math
+import unittest
+import weakref
+
+from passwdgen.constants import *
+from passwdgen.planner import *
+from passwdgen.planner import _plan
+from passwdgen.utils import load_word_list
+from passwdgen.wordlist import WordList
+
+
+class TestEntropyPlanner(unittest.TestCase):
+    word_list = load_word_list()
+
+    def test_objectives(self):
+        shortest = plan_password(64, objective=PLAN_OBJECTIVE_LENGTH, word_list=self.word_list)
+        memorable = plan_password(64, objective=PLAN_OBJECTIVE_MEMORABLE, word_list=self.word_list)
+        fewest_words = plan_password(64, objective=PLAN_OBJECTIVE_WORDS, word_list=self.word_list)
+        for plan in [shortest, memorable, fewest_words]:
+            self.assertGreaterEqual(plan.entropy, 64)
+        self.assertLessEqual(shortest.length, memorable.length)
+        self.assertLessEqual(memorable.components, shortest.components)
+        self.assertEqual(0, fewest_words.word_count)
+        self.assertGreater(memorable.word_count, 0)
+
+    def test_minimums(self):
+        plan = plan_password(
+            60,
+            objective=PLAN_OBJECTIVE_MEMORABLE,
+            word_list=self.word_list,
+            minimums={PC_NUMERIC: 2, PLAN_SOURCE_SYMBOLS: 1},
+        )
+        counts = dict(plan.char_counts)
+        self.assertGreaterEqual(counts[PC_NUMERIC], 2)
+        self.assertGreaterEqual(counts[PLAN_SOURCE_SYMBOLS], 1)
+        self.assertAlmostEqual(
+            plan.word_count * math.log2(len(self.word_list))
+            + counts[PC_NUMERIC] * math.log2(10)
+            + counts[PLAN_SOURCE_SYMBOLS] * math.log2(len(CHARACTER_CLASSES[CC_SPECIAL])),
+            plan.entropy,
+        )
+
+        pw = plan.generate()
+        words = pw.split("-", plan.word_count)
+        self.assertEqual(plan.word_count + 1, len(words))
+        for word in words[:-1]:
+            self.assertTrue(word in self.word_list)
+        chars = words[-1]
+        self.assertEqual(sum(dict(plan.char_counts).values()), len(chars))
+        self.assertTrue(chars[: counts[PC_NUMERIC]].isdigit())
+
+    def test_random_separators(self):
+        plan = plan_password(80, sources=[PC_DICT, PLAN_SOURCE_SEPARATORS], word_list=self.word_list)
+        gaps = plan.word_count - 1
+        self.assertAlmostEqual(
+            plan.word_count * math.log2(len(self.word_list)) + gaps * math.log2(len(separators)),
+            plan.entropy,
+        )
+        self.assertGreaterEqual(plan.entropy, 80)
+        self.assertLessEqual(plan.word_count, math.ceil(80 / math.log2(len(self.word_list))))
+        self.assertEqual(plan.word_count * 2 - 1, plan.components)
+
+    def test_batch(self):
+        plan = plan_password(50, sources=[PC_NUMERIC, PLAN_SOURCE_SYMBOLS])
+        passwords = plan.generate_batch(1000)
+        self.assertEqual(1000, len(passwords))
+        for pw in passwords:
+            self.assertEqual(int(plan.length), len(pw))
+        self.assertEqual(5, len(list(plan.generate_batch(5, lazy=True))))
+
+    def test_plans_are_cached(self):
+        plan = plan_password(70, word_list=self.word_list)
+        hits = _plan.cache_info().hits
+        again = plan_password(70, word_list=self.word_list)
+        self.assertEqual(hits + 1, _plan.cache_info().hits)
+        self.assertEqual(repr(plan), repr(again))
+        self.assertIs(self.word_list, again.word_list)
+
+    def test_cached_plans_release_word_lists(self):
+        # a word list that has been planned with can still be freed once nothing else refers to it
+        word_list = WordList.from_words(["word%d" % i for i in range(1000)])
+        plan = plan_password(70, word_list=word_list)
+        ref = weakref.ref(word_list)
+        del word_list, plan
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_invalid_plans(self):
+        self.assertRaises(ValueError, plan_password, 50, sources=["no-such-source"])
+        self.assertRaises(ValueError, plan_password, 50, objective="no-such-objective")
+        self.assertRaises(ValueError, plan_password, 50, sources=[PC_NUMERIC], minimums={PC_DICT: 1})
+        self.assertRaises(ValueError, plan_password, 50, sources=[PLAN_SOURCE_SEPARATORS])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+from itertools import product
+import math
+import string
+import unittest
+
+from passwdgen.constants import *
+from passwdgen.policy import *
+
+
+class TestPasswordPolicy(unittest.TestCase):
+    def test_minimums_and_exclusions(self):
+        policy = PasswordPolicy(
+            length=10,
+            minimums={CC_DIGITS: 2, CC_SPECIAL: 1, CC_UPPER: 1},
+            maximums={CC_SPECIAL: 3},
+            exclude="xyz",
+            exclude_ambiguous=True,
+        )
+        for _ in range(200):
+            pw = policy.generate()
+            self.assertEqual(10, len(pw))
+            self.assertTrue(policy.check(pw))
+            self.assertGreaterEqual(sum(ch.isdigit() for ch in pw), 2)
+            self.assertGreaterEqual(sum(ch.isupper() for ch in pw), 1)
+            self.assertTrue(1 <= sum(ch in CHARACTER_CLASSES[CC_SPECIAL] for ch in pw) <= 3)
+            self.assertFalse(set(pw) & set("xyz" + AMBIGUOUS_CHARS))
+
+    def test_exact_count(self):
+        classes = {"lower": "ab", "digits": "12", "special": "!"}
+        policy = PasswordPolicy(
+            length=4, minimums={"digits": 1}, maximums={"lower": 2}, classes=classes
+        )
+        compliant = [
+            "".join(chars) for chars in product("ab12!", repeat=4) if policy.check("".join(chars))
+        ]
+        self.assertEqual(len(compliant), policy.count)
+        self.assertAlmostEqual(math.log2(len(compliant)), policy.entropy)
+
+    def test_uniform(self):
+        classes = {"lower": "ab", "digits": "1"}
+        policy = PasswordPolicy(length=3, minimums={"digits": 1}, classes=classes)
+        # every password of 3 characters from "ab1", except for the 2**3 without a digit
+        self.assertEqual(3**3 - 2**3, policy.count)
+        counts = Counter(policy.generate() for _ in range(19000))
+        self.assertEqual(19, len(counts))
+        for count in counts.values():
+            self.assertTrue(700 < count < 1300)
+
+    def test_min_entropy(self):
+        policy = PasswordPolicy(minimums={CC_DIGITS: 2}, min_entropy=80)
+        self.assertGreaterEqual(policy.entropy, 80)
+        self.assertLess(PasswordPolicy(length=policy.length - 1, minimums={CC_DIGITS: 2}).entropy, 80)
+        self.assertRaises(
+            ValueError,
+            PasswordPolicy,
+            maximums={CC_LOWER: 1, CC_UPPER: 0, CC_DIGITS: 1, CC_SPECIAL: 0},
+            min_entropy=80,
+        )
+
+    def test_invalid_policies(self):
+        self.assertRaises(ValueError, PasswordPolicy, minimums={"emoji": 1})
+        self.assertRaises(ValueError, PasswordPolicy, length=3, minimums={CC_DIGITS: 4})
+        self.assertRaises(ValueError, PasswordPolicy, minimums={CC_DIGITS: 2}, maximums={CC_DIGITS: 1})
+        self.assertRaises(ValueError, PasswordPolicy, minimums={CC_DIGITS: 1}, exclude=string.digits)
+        self.assertRaises(ValueError, PasswordPolicy, classes={"a": "abc", "b": "cde"})
+
+    def test_from_spec(self):
+        policy = PasswordPolicy.from_spec("digits=2, special=1-3", length=16)
+        self.assertEqual(16, policy.length)
+        self.assertEqual(
+            [(CC_DIGITS, 2, None), (CC_SPECIAL, 1, 3)],
+            [(class_id, lo, hi) for class_id, _, lo, hi in policy.classes if lo or hi],
+        )
+        self.assertRaises(ValueError, PasswordPolicy.from_spec, "digits")
+        self.assertRaises(ValueError, PasswordPolicy.from_spec, "digits=two")
+
+
+if __name__ == "__main__":
+    unittest.main()
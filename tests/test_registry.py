@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from passwdgen.cmdline import load_dictionary, main
+from passwdgen.constants import *
+from passwdgen.registry import *
+from passwdgen.utils import _loaded_word_lists, clear_loaded_word_lists, load_word_list
+from passwdgen.wordlist import WordList
+
+
+class TestWordListRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self._cache_dir = os.environ.get(WORD_LIST_CACHE_DIR_ENV)
+        os.environ[WORD_LIST_CACHE_DIR_ENV] = os.path.join(self.tmp_dir, "cache")
+        self.lists_dir = os.path.join(self.tmp_dir, "lists")
+        os.mkdir(self.lists_dir)
+        # the French list contains the same word decomposed and composed
+        self.write_words("fr-word-list.txt", ["e\u0301te\u0301", "\u00e9t\u00e9"] + ["mot%d" % i for i in range(200)])
+        self.write_words("de.txt", ["straße"] + ["wort%d" % i for i in range(200)])
+        self.write_words("notes.md", ["not%d" % i for i in range(200)])
+        self.registry = WordListRegistry([self.lists_dir])
+
+    def tearDown(self):
+        clear_loaded_word_lists()
+        if self._cache_dir is None:
+            del os.environ[WORD_LIST_CACHE_DIR_ENV]
+        else:
+            os.environ[WORD_LIST_CACHE_DIR_ENV] = self._cache_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def write_words(self, filename, words, directory=None):
+        with open(os.path.join(directory or self.lists_dir, filename), "wt", encoding="utf-8") as f:
+            f.write("\n".join(words) + "\n")
+
+    def test_discovery(self):
+        self.assertEqual(["de", DEFAULT_WORD_LIST_NAME, "fr"], self.registry.names())
+        self.assertEqual(os.path.join(self.lists_dir, "de.txt"), self.registry.path("de"))
+        self.assertIn("de+fr", self.registry)
+        self.assertNotIn("de+es", self.registry)
+        self.assertEqual(["de", "fr"], WordListRegistry([self.lists_dir], include_bundled=False).names())
+        self.assertEqual([DEFAULT_WORD_LIST_NAME], WordListRegistry([os.path.join(self.tmp_dir, "none")]).names())
+        with mock.patch.dict(os.environ, {WORD_LIST_PATH_ENV: os.pathsep.join(["", self.lists_dir])}):
+            self.assertEqual(["de", DEFAULT_WORD_LIST_NAME, "fr"], WordListRegistry().names())
+
+        # new lists are picked up once the registry is refreshed, and compiled lists are preferred
+        other_dir = os.path.join(self.tmp_dir, "other")
+        os.mkdir(other_dir)
+        self.write_words("es.txt", ["palabra%d" % i for i in range(200)])
+        self.write_words("de.txt", ["anders%d" % i for i in range(200)], directory=other_dir)
+        self.assertNotIn("es", self.registry)
+        self.registry.refresh()
+        self.assertIn("es", self.registry)
+        WordList.from_words(["kompiliert%d" % i for i in range(200)]).save(os.path.join(self.lists_dir, "de.pwl"))
+        self.registry.refresh()
+        self.assertTrue(self.registry.load("de").path.endswith("de.pwl"))
+
+        # earlier directories, and explicitly registered lists, take precedence
+        registry = WordListRegistry([other_dir, self.lists_dir])
+        self.assertIn("anders0", registry.load("de"))
+        registry.register("de", os.path.join(self.lists_dir, "es.txt"))
+        self.assertIn("palabra0", registry.load("de"))
+        self.assertRaises(ValueError, registry.register, "de+fr", os.path.join(self.lists_dir, "es.txt"))
+
+    def test_lazy_loading_and_normalization(self):
+        with mock.patch("passwdgen.registry.load_word_list", wraps=load_word_list) as load:
+            self.registry.names()
+            self.assertEqual(0, load.call_count)
+            word_list = self.registry.load("fr")
+            self.assertIs(word_list, self.registry.load("fr"))
+        # both forms of the word were normalized to the same one
+        self.assertEqual(201, len(word_list))
+        self.assertIn("\u00e9t\u00e9", word_list)
+        self.assertNotIn("e\u0301te\u0301", word_list)
+
+        # the normalized list is what gets compiled and cached
+        clear_loaded_word_lists()
+        cached = self.registry.load("fr")
+        self.assertIsNotNone(cached.path)
+        self.assertEqual(list(word_list), list(cached))
+
+        self.assertRaises(ValueError, self.registry.load, "es")
+        self.assertRaises(ValueError, load_word_list, self.registry.path("fr"), normalization="NFX")
+
+    def test_union(self):
+        union = self.registry.load("fr+de")
+        self.assertEqual(402, len(union))
+        self.assertIn("straße", union)
+        self.assertIn("mot0", union)
+        self.assertIs(union, self.registry.load("de+fr"))
+        self.assertIs(self.registry.load("de"), self.registry.load("de+de"))
+
+        # unions are loaded again if any of their word lists change
+        stat_interval = _loaded_word_lists.stat_interval
+        _loaded_word_lists.stat_interval = 0
+        try:
+            self.write_words("de.txt", ["wort%d" % i for i in range(300)])
+            self.assertEqual(501, len(self.registry.load("de+fr")))
+        finally:
+            _loaded_word_lists.stat_interval = stat_interval
+
+    def test_command_line(self):
+        with mock.patch("passwdgen.registry._default_registry", self.registry):
+            self.assertIn("mot0", load_dictionary("de+fr"))
+            self.assertEqual(len(load_word_list()), len(load_dictionary(DEFAULT_WORD_LIST_NAME)))
+            # paths are still accepted
+            self.assertIn("wort0", load_dictionary(os.path.join(self.lists_dir, "de.txt")))
+            self.assertRaises(ValueError, load_dictionary, "es")
+            self.assertEqual(word_list_names(), self.registry.names())
+
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main(["generate", "-t", PC_DICT, "-d", "de", "-l", "1", "-s", "none", "-n", "20"])
+            for password in out.getvalue().split():
+                self.assertIn(password, self.registry.load("de"))
+
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, {WORD_LIST_PATH_ENV: self.lists_dir}), redirect_stdout(out):
+            main(["wordlist", "list"])
+        names = [line.split()[0] for line in out.getvalue().splitlines()]
+        self.assertEqual(["de", DEFAULT_WORD_LIST_NAME, "fr"], names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+import math
+import unittest
+
+from passwdgen.constants import *
+from passwdgen.generator import chars_batch
+from passwdgen.rng import EntropyPool, sampling_unit
+from passwdgen.utils import secure_random
+
+
+def chi_square(counts, n, total):
+    expected = float(total) / n
+    return sum((counts.get(i, 0) - expected) ** 2 / expected for i in range(n))
+
+
+def chi_square_critical(df, z=4.753):
+    """Wilson-Hilferty approximation of the chi-square critical value for the given number of degrees of freedom,
+    at the given one-sided standard normal quantile (4.753 corresponds to p = 1e-6)."""
+    h = 2.0 / (9.0 * df)
+    return df * (1.0 - h + z * math.sqrt(h)) ** 3
+
+
+class TestSamplingUnit(unittest.TestCase):
+    def test_units_are_unbiased(self):
+        for n in list(range(1, 300)) + [1000, 4186, 71188, 2**32 + 1]:
+            bits, limit = sampling_unit(n)
+            self.assertTrue(n <= limit <= 2**bits)
+            # every residue modulo n is hit by exactly the same number of accepted values
+            self.assertEqual(0, limit % n)
+            self.assertGreaterEqual(bits, (n - 1).bit_length())
+
+    def test_unit_sizes(self):
+        self.assertEqual((5, 26), sampling_unit(26, (4, 5, 6, 8)))
+        self.assertEqual((8, 246), sampling_unit(82, (4, 5, 6, 8)))
+        self.assertRaises(ValueError, sampling_unit, 300, (4, 5, 6, 8))
+        self.assertRaises(ValueError, sampling_unit, 0)
+
+
+class TestUnbiasedSampling(unittest.TestCase):
+    def setUp(self):
+        self.pool = EntropyPool()
+
+    def assertUniform(self, values, n):
+        counts = Counter(values)
+        self.assertTrue(set(counts).issubset(range(n)))
+        self.assertLess(chi_square(counts, n, len(values)), chi_square_critical(n - 1))
+
+    def test_randbelow(self):
+        self.assertUniform([self.pool.randbelow(26) for _ in range(52000)], 26)
+        self.assertEqual(0, self.pool.randbelow(1))
+        self.assertRaises(ValueError, self.pool.randbelow, 0)
+
+    def test_randbelow_many(self):
+        self.assertUniform(self.pool.randbelow_many(1000, 200000), 1000)
+        self.assertUniform(self.pool.randbelow_many(3, 30000), 3)
+        self.assertEqual(12345, len(self.pool.randbelow_many(71188, 12345)))
+
+    def test_randbelow_bytes(self):
+        for n in [2, 10, 26, 33, 62, 82, 200, 256]:
+            values = self.pool.randbelow_bytes(n, 100 * n)
+            self.assertEqual(100 * n, len(values))
+            self.assertUniform(list(values), n)
+
+    def test_randbits(self):
+        for k in [0, 1, 7, 64, 100]:
+            for _ in range(100):
+                self.assertTrue(0 <= self.pool.randbits(k) < 2**k)
+
+    def test_bits_consumed(self):
+        before = self.pool.bytes_consumed
+        self.pool.randbelow_bytes(26, 100000)
+        # 26 values take 5 bits each, and 26/32 of the draws are accepted: about 0.77 bytes per value
+        self.assertLess(self.pool.bytes_consumed - before, 100000)
+
+    def test_chars_batch_is_uniform(self):
+        charset = sorted(PASSWORD_CHARSETS[PC_SPECIAL])
+        passwords = chars_batch(10000, PC_SPECIAL)
+        self.assertUniform(
+            [charset.index(c) for c in "".join(passwords)], len(charset)
+        )
+
+    def test_secure_random_bounds(self):
+        self.assertRaises(ValueError, secure_random, 0)
+        self.assertUniform([secure_random(10, 20) - 10 for _ in range(10000)], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
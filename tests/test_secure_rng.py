@@ -1,7 +1,25 @@
 # -*- coding: utf-8 -*-
 
+import os
 import unittest
-from passwdgen.utils import secure_random
+from unittest import mock
+
+from passwdgen.constants import *
+from passwdgen.rng import EntropyPool
+from passwdgen.utils import (
+    secure_random,
+    secure_random_quality,
+    rng_test_battery,
+    _battery_report,
+    _merge_battery_stats,
+    _new_battery_stats,
+    _update_battery_stats,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestSecureRNG(unittest.TestCase):
@@ -16,5 +34,99 @@ class TestSecureRNG(unittest.TestCase):
             self.assertTrue(50 <= random_val < 100)
 
 
+
+class TestSecureRNGQuality(unittest.TestCase):
+    def check_quality(self, result):
+        self.assertEqual(
+            {
+                "mean",
+                "expected_mean",
+                "mean_diff",
+                "stddev",
+                "expected_stddev",
+                "stddev_diff",
+                "time",
+            },
+            set(result),
+        )
+        # the standard error of the mean of 200,000 samples is about 0.065
+        self.assertAlmostEqual(50.0, result["mean"], delta=1.0)
+        self.assertAlmostEqual(result["expected_stddev"], result["stddev"], delta=1.0)
+
+    def test_python_backend(self):
+        self.check_quality(
+            secure_random_quality(200000, backend=RNG_BACKEND_PYTHON, chunk_size=10000)
+        )
+
+    @unittest.skipIf(numpy is None, "requires NumPy")
+    def test_numpy_backend(self):
+        self.check_quality(
+            secure_random_quality(200000, backend=RNG_BACKEND_NUMPY, chunk_size=10000)
+        )
+
+    def test_unrecognised_backend(self):
+        self.assertRaises(ValueError, secure_random_quality, 1000, backend="fortran")
+
+    def test_uses_entropy_pool(self):
+        # the samples come from the same sampling path as character-based passwords
+        pool = EntropyPool()
+        with mock.patch.object(pool, "randbelow_bytes", wraps=pool.randbelow_bytes) as draw:
+            secure_random_quality(25000, backend=RNG_BACKEND_PYTHON, chunk_size=10000, pool=pool)
+        self.assertEqual([(101, 10000), (101, 10000), (101, 5000)], [c.args for c in draw.call_args_list])
+
+
+class TestRNGTestBattery(unittest.TestCase):
+    def check_report(self, report, sample_bytes):
+        self.assertEqual(sample_bytes, report["bytes"])
+        for test in ["chi_square", "monobit", "runs", "serial_correlation"]:
+            self.assertTrue(0.0 <= report[test]["p_value"] <= 1.0)
+            self.assertIn("passed", report[test])
+        self.assertAlmostEqual(8.0, report["entropy"]["bits_per_byte"], delta=0.01)
+
+    def test_python_backend(self):
+        self.check_report(
+            rng_test_battery(100000, chunk_size=4096, backend=RNG_BACKEND_PYTHON), 100000
+        )
+
+    @unittest.skipIf(numpy is None, "requires NumPy")
+    def test_numpy_backend(self):
+        self.check_report(
+            rng_test_battery(100000, chunk_size=4096, backend=RNG_BACKEND_NUMPY), 100000
+        )
+
+    def test_multiple_jobs(self):
+        report = rng_test_battery(100001, jobs=2, backend=RNG_BACKEND_PYTHON)
+        self.assertEqual(2, report["jobs"])
+        self.check_report(report, 100001)
+
+    def get_stats(self, chunks, numpy=None):
+        stats = _new_battery_stats()
+        for chunk in chunks:
+            _update_battery_stats(stats, chunk, numpy)
+        return stats
+
+    def test_chunked_stats_match_whole_stream(self):
+        data = os.urandom(10000)
+        chunks = [data[:1], data[1:4000], data[4000:4001], data[4001:]]
+        expected = self.get_stats([data])
+        self.assertEqual(expected, self.get_stats(chunks))
+        if numpy is not None:
+            self.assertEqual(expected, self.get_stats(chunks, numpy))
+        # splitting the stream across several independent streams and merging them gives the same result
+        self.assertEqual(
+            expected,
+            _merge_battery_stats([self.get_stats([chunk]) for chunk in chunks]),
+        )
+
+    def test_detects_biased_stream(self):
+        stats = self.get_stats([bytes(range(256)) * 100])
+        report = _battery_report(stats)
+        # a repeating counter has a perfectly flat histogram, but is highly serially correlated
+        self.assertFalse(report["serial_correlation"]["passed"])
+
+    def test_sample_size_validation(self):
+        self.assertRaises(ValueError, rng_test_battery, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
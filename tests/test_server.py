@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from passwdgen.constants import *
+from passwdgen.generator import chars_batch
+from passwdgen.server import *
+from passwdgen.utils import load_word_list
+
+
+def start_server(**kwargs):
+    """Runs a password server in a background thread, returning once it's listening."""
+    listening = []
+    ready = threading.Event()
+
+    def on_ready(server):
+        listening.append(server)
+        ready.set()
+
+    thread = threading.Thread(
+        target=PasswordServer().serve, kwargs=dict(kwargs, ready=on_ready), daemon=True
+    )
+    thread.start()
+    ready.wait(10)
+    return listening[0], thread
+
+
+def stop_server(server, thread):
+    server.get_loop().call_soon_threadsafe(server.close)
+    thread.join(10)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class TestPasswordServer(unittest.TestCase):
+    word_list = load_word_list()
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.socket_path = os.path.join(cls.temp_dir, "passwdgen.sock")
+        cls.server, cls.thread = start_server(socket_path=cls.socket_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_server(cls.server, cls.thread)
+        shutil.rmtree(cls.temp_dir)
+
+    def test_socket_permissions(self):
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.socket_path).st_mode))
+
+    def test_generate(self):
+        with PasswordClient(self.socket_path) as client:
+            passwords = client.generate()
+            self.assertEqual(1, len(passwords))
+            for word in passwords[0].split("-"):
+                self.assertTrue(word in self.word_list)
+
+            passwords = client.generate(charset=PC_NUMERIC, length=6, count=10)
+            self.assertEqual(10, len(passwords))
+            for pw in passwords:
+                self.assertEqual(6, len(pw))
+                self.assertTrue(pw.isdigit())
+
+            pw = client.generate(starting_letters="abc", separator=SEP_COLON)[0]
+            for letter, word in zip("abc", pw.split(":")):
+                self.assertTrue(word.startswith(letter))
+
+            pw = client.generate(starting_letters=["pa", "ss"])[0]
+            for prefix, word in zip(["pa", "ss"], pw.split("-")):
+                self.assertTrue(word.startswith(prefix))
+
+    def test_errors(self):
+        with PasswordClient(self.socket_path) as client:
+            self.assertRaises(ValueError, client.generate, charset="some-unrecognised-charset")
+            self.assertRaises(ValueError, client.generate, count=0)
+            self.assertRaises(ValueError, client.generate, count=SERVER_MAX_PASSWORDS_PER_REQUEST + 1)
+            self.assertRaises(ValueError, client.generate, separator="-")
+            self.assertRaises(ValueError, client.generate, length="long")
+            self.assertRaises(ValueError, client.generate, colour="blue")
+            self.assertRaises(ValueError, client.generate, starting_letters=["pa", 1])
+            # the connection remains usable after errors
+            self.assertEqual(1, len(client.generate()))
+
+    def test_malformed_requests(self):
+        server = PasswordServer(self.word_list)
+        for line in [
+            '{"charset": ["x"]}',
+            '{"separator": ["-"]}',
+            '{"min_entropy": 1e400}',
+            '{"min_entropy": Infinity}',
+            '{"min_entropy": NaN}',
+            '{"min_entropy": -1}',
+            '{"id": 1, "starting_letters": "%s"}' % ("a" * 2000),
+            "[" * 100000,
+            b"\xff",
+        ]:
+            response = json.loads(server.respond(line))
+            self.assertIn("error", response)
+            self.assertNotIn("passwords", response)
+
+    def test_oversized_requests(self):
+        server = PasswordServer(self.word_list)
+        for request in [
+            {"charset": PC_NUMERIC, "length": SERVER_MAX_PASSWORD_LENGTH + 1},
+            {"length": SERVER_MAX_PASSWORD_LENGTH + 1},
+            {"min_entropy": SERVER_MAX_MIN_ENTROPY + 1},
+            {"charset": PC_NUMERIC, "length": 1024, "count": SERVER_MAX_PASSWORDS_PER_REQUEST},
+        ]:
+            self.assertRaises(ValueError, server.generate, request)
+        self.assertEqual(1, len(server.generate({"charset": PC_NUMERIC, "min_entropy": SERVER_MAX_MIN_ENTROPY})))
+
+        # large requests are generated off the event loop's thread
+        threads = []
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return chars_batch(*args, **kwargs)
+
+        with mock.patch("passwdgen.server.chars_batch", record_thread):
+            with PasswordClient(self.socket_path) as client:
+                self.assertEqual(5000, len(client.generate(charset=PC_NUMERIC, length=16, count=5000)))
+                self.assertEqual(1, len(client.generate(charset=PC_NUMERIC, length=16)))
+        self.assertNotEqual(self.thread, threads[0])
+        self.assertEqual(self.thread, threads[1])
+
+    def test_pipelining(self):
+        requests = [{"id": i, "charset": PC_NUMERIC, "length": 4, "count": i % 3 + 1} for i in range(500)]
+        requests[7] = {"id": 7, "charset": "some-unrecognised-charset"}
+        with PasswordClient(self.socket_path) as client:
+            responses = client.request_many(requests)
+        self.assertEqual(list(range(500)), [response["id"] for response in responses])
+        self.assertIn("error", responses[7])
+        self.assertEqual(2, len(responses[10]["passwords"]))
+
+    def test_already_running(self):
+        self.assertRaises(ValueError, PasswordServer().serve, socket_path=self.socket_path)
+        # the running server's socket must be left alone
+        with PasswordClient(self.socket_path) as client:
+            self.assertEqual(1, len(client.generate()))
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class TestSocketChecks(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def bind(self, socket_path, mode):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(socket_path)
+        listener.listen(1)
+        os.chmod(socket_path, mode)
+
+    def test_untrusted_sockets_refused(self):
+        socket_path = os.path.join(self.temp_dir, "passwdgen.sock")
+        # a socket that others can access
+        self.bind(socket_path, 0o666)
+        self.assertRaisesRegex(ValueError, "another user", PasswordClient, socket_path)
+        self.assertRaisesRegex(ValueError, "another user", PasswordServer().serve, socket_path=socket_path)
+        # a socket that belongs to someone else
+        os.chmod(socket_path, 0o600)
+        with mock.patch("passwdgen.server.os.getuid", return_value=os.getuid() + 1):
+            self.assertRaisesRegex(ValueError, "another user", PasswordClient, socket_path)
+            self.assertRaisesRegex(ValueError, "another user", PasswordServer().serve, socket_path=socket_path)
+        self.assertTrue(os.path.exists(socket_path))
+
+        other_path = os.path.join(self.temp_dir, "other")
+        open(other_path, "w").close()
+        self.assertRaisesRegex(ValueError, "Not a socket", PasswordClient, other_path)
+
+    def test_private_socket_directory(self):
+        environ = dict((k, v) for k, v in os.environ.items() if k not in (SERVER_SOCKET_ENV, "XDG_RUNTIME_DIR"))
+        with mock.patch.dict(os.environ, environ, clear=True), mock.patch("tempfile.tempdir", self.temp_dir):
+            socket_path = default_server_socket_path()
+            socket_dir = os.path.join(self.temp_dir, "passwdgen-%d" % os.getuid())
+            self.assertEqual(os.path.join(socket_dir, "passwdgen.sock"), socket_path)
+
+            # the server creates the directory, accessible only by its user
+            server, thread = start_server()
+            try:
+                self.assertEqual(0o700, stat.S_IMODE(os.lstat(socket_dir).st_mode))
+                with PasswordClient() as client:
+                    self.assertEqual(1, len(client.generate()))
+            finally:
+                stop_server(server, thread)
+
+            # a directory that others can access (e.g. created by someone else first) isn't trusted
+            os.chmod(socket_dir, 0o777)
+            self.bind(socket_path, 0o600)
+            self.assertRaisesRegex(ValueError, "another user", PasswordClient)
+            self.assertRaisesRegex(ValueError, "another user", PasswordServer().serve)
+
+
+class TestPasswordServerTCP(unittest.TestCase):
+    def test_tcp(self):
+        server, thread = start_server(port=0)
+        try:
+            host, port = server.sockets[0].getsockname()[:2]
+            self.assertEqual("127.0.0.1", host)
+            with PasswordClient(port=port) as client:
+                self.assertEqual(3, len(client.generate(count=3)))
+        finally:
+            stop_server(server, thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+
+import passwdgen
+from passwdgen.cmdline import build_parser
+
+
+def imported_modules(code, *args):
+    """Runs the given code in a fresh interpreter, and returns the names of all of the modules it imported."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(passwdgen.__file__)))]
+        + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            code + "\nimport sys\nsys.stderr.write('\\n'.join(sys.modules))",
+        ]
+        + list(args),
+        env=env,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    return set(output.splitlines())
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_lazy_exports_match_submodules(self):
+        for module_name, names in passwdgen._lazy_exports.items():
+            module = importlib.import_module("passwdgen." + module_name)
+            self.assertEqual(sorted(module.__all__), sorted(names))
+
+    def test_lazy_exports(self):
+        self.assertTrue(callable(passwdgen.chars))
+        self.assertIs(passwdgen.WordList, importlib.import_module("passwdgen.wordlist").WordList)
+        self.assertIn("words_batch", dir(passwdgen))
+        self.assertRaises(AttributeError, getattr, passwdgen, "no_such_name")
+
+    def test_import_is_light(self):
+        modules = imported_modules("import passwdgen")
+        for module in ["passwdgen.utils", "passwdgen.generator", "concurrent.futures", "pyperclip"]:
+            self.assertNotIn(module, modules)
+
+    def test_version_command_is_light(self):
+        modules = imported_modules("from passwdgen.cmdline import main; main()", "version")
+        for module in ["passwdgen.utils", "passwdgen.wordlist", "multiprocessing", "asyncio", "pyperclip"]:
+            self.assertNotIn(module, modules)
+
+    def test_char_passwords_do_not_load_word_list(self):
+        modules = imported_modules(
+            "from passwdgen.cmdline import main; main()", "generate", "-t", "alpha-numeric", "-n", "3"
+        )
+        for module in ["importlib.resources", "multiprocessing", "pyperclip"]:
+            self.assertNotIn(module, modules)
+
+
+class TestCommandLineParser(unittest.TestCase):
+    def test_only_selected_command_arguments(self):
+        parser = build_parser(["version"])
+        args = parser.parse_args(["version"])
+        self.assertEqual("version", args.command)
+        args = build_parser(["generate", "-n", "5"]).parse_args(["generate", "-n", "5"])
+        self.assertEqual(5, args.count)
+
+    def test_full_parser(self):
+        parser = build_parser()
+        args = parser.parse_args(["wordlist", "compile", "words.txt"])
+        self.assertEqual("compile", args.wordlist_subcommand)
+        args = parser.parse_args(["client", "-n", "2"])
+        self.assertEqual(2, args.count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import unittest
+from unittest import mock
+
+from passwdgen.constants import *
+from passwdgen.strength import *
+from passwdgen.strength import _Automaton
+from passwdgen.utils import calculate_entropy
+from passwdgen.wordlist import WordList
+
+
+WORDS = WordList.from_words(
+    ["password", "pass", "word", "monkey", "dragon", "correct", "horse", "battery", "staple", "sword"]
+)
+
+
+class TestStrength(unittest.TestCase):
+    def patterns(self, password):
+        estimate = estimate_strength(password, WORDS)
+        self.assertEqual(password, "".join(match["token"] for match in estimate["sequence"]))
+        self.assertAlmostEqual(
+            estimate["entropy"], sum(match["entropy"] for match in estimate["sequence"])
+        )
+        return [(match["pattern"], match["token"]) for match in estimate["sequence"]]
+
+    def test_automaton(self):
+        automaton = _Automaton(WORDS, STRENGTH_MIN_MATCH_LENGTH)
+        rng = random.Random(1)
+        for _ in range(200):
+            text = "".join(rng.choice(["pass", "word", "s", "x", "monkey", "sw", "ord"]) for _ in range(6))
+            expected = set(
+                (i, j)
+                for i in range(len(text))
+                for j in range(i + STRENGTH_MIN_MATCH_LENGTH, len(text) + 1)
+                if text[i:j] in WORDS
+            )
+            self.assertEqual(expected, set(automaton.find(text)))
+
+    def test_automaton_built_once(self):
+        words = WordList.from_words(["zebra", "giraffe", "elephant"])
+        with mock.patch("passwdgen.strength._Automaton", wraps=_Automaton) as automaton:
+            for _ in range(3):
+                self.assertEqual("zebra", estimate_strength("zebra", words)["sequence"][0]["token"])
+                # other collections of words would need a new automaton on every call
+                self.assertRaisesRegex(TypeError, "as_word_list", estimate_strength, "zebra", set(words))
+        self.assertEqual(1, automaton.call_count)
+
+    def test_dictionary(self):
+        self.assertEqual(
+            [(STRENGTH_PATTERN_DICTIONARY, "Password"), (STRENGTH_PATTERN_BRUTEFORCE, "1!")],
+            self.patterns("Password1!"),
+        )
+        self.assertEqual(
+            [(STRENGTH_PATTERN_DICTIONARY, "monkey"), (STRENGTH_PATTERN_DICTIONARY, "DRAGON")],
+            self.patterns("monkeyDRAGON"),
+        )
+        self.assertEqual([(STRENGTH_PATTERN_DICTIONARY, "drowssap")], self.patterns("drowssap"))
+        # much weaker than its charset suggests
+        self.assertLess(
+            estimate_strength("Password1!", WORDS)["entropy"],
+            calculate_entropy("Password1!")[PC_SPECIAL] / 2,
+        )
+
+    def test_l33t(self):
+        estimate = estimate_strength("p4ssw0rd", WORDS)
+        self.assertEqual([(STRENGTH_PATTERN_L33T, "p4ssw0rd")], self.patterns("p4ssw0rd"))
+        self.assertEqual("password", estimate["sequence"][0]["word"])
+        # one bit for each of the two substituted letters
+        self.assertAlmostEqual(math.log2(len(WORDS)) + 2, estimate["entropy"])
+
+    def test_keyboard_sequence_repeat(self):
+        self.assertEqual([(STRENGTH_PATTERN_KEYBOARD, "qwerty")], self.patterns("qwerty"))
+        self.assertEqual([(STRENGTH_PATTERN_KEYBOARD, "zxcvbnm")], self.patterns("zxcvbnm"))
+        self.assertEqual([(STRENGTH_PATTERN_SEQUENCE, "abcdefg")], self.patterns("abcdefg"))
+        self.assertEqual([(STRENGTH_PATTERN_SEQUENCE, "97531")], self.patterns("97531"))
+        self.assertEqual([(STRENGTH_PATTERN_REPEAT, "aaaaaaa")], self.patterns("aaaaaaa"))
+        self.assertEqual([(STRENGTH_PATTERN_REPEAT, "dragondragon")], self.patterns("dragondragon"))
+
+    def test_dates(self):
+        for date in ["25/12/1999", "1999-12-25", "12.25.99", "19991225", "251299", "1974"]:
+            self.assertEqual([(STRENGTH_PATTERN_DATE, date)], self.patterns(date))
+        self.assertNotIn(STRENGTH_PATTERN_DATE, [pattern for pattern, _ in self.patterns("99/99/9999")])
+
+    def test_random_passwords(self):
+        for password in ["x7#Kq9!vL2", "Zr8&tB1m"]:
+            estimate = estimate_strength(password, WORDS)
+            self.assertEqual([(STRENGTH_PATTERN_BRUTEFORCE, password)], self.patterns(password))
+            self.assertAlmostEqual(calculate_entropy(password)[PC_SPECIAL], estimate["entropy"], places=0)
+        self.assertEqual({"entropy": 0.0, "sequence": []}, estimate_strength("", WORDS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from passwdgen.constants import *
+from passwdgen.instrument import recording
+from passwdgen.utils import (
+    _LoadedWordLists,
+    _loaded_word_lists,
+    clean_word_list,
+    clear_loaded_word_lists,
+    compile_word_list,
+    load_word_list,
+)
+from passwdgen.wordlist import WordList, is_compiled_word_list
+
+
+class TestWordList(unittest.TestCase):
+    def test_from_words(self):
+        word_list = WordList.from_words(["zebra", "apple", "été", "mango", "apple"])
+        self.assertEqual(4, len(word_list))
+        self.assertEqual(["apple", "mango", "zebra", "été"], list(word_list))
+        self.assertEqual("apple", word_list[0])
+        self.assertEqual("été", word_list[-1])
+        self.assertEqual(["mango", "zebra"], word_list[1:3])
+        self.assertRaises(IndexError, lambda: word_list[4])
+
+    def test_membership(self):
+        word_list = WordList.from_words(["zebra", "apple", "été", "mango"])
+        for word in ["zebra", "apple", "été", "mango"]:
+            self.assertTrue(word in word_list)
+        for word in ["", "app", "apples", "zzz", "ét", 5]:
+            self.assertFalse(word in word_list)
+
+    def test_letter_ranges(self):
+        word_list = WordList.from_words(["bee", "apple", "avocado", "", "cherry", "banana"])
+        ranges = word_list.letter_ranges()
+        self.assertEqual({"a": (0, 2), "b": (2, 4), "c": (4, 5)}, ranges)
+        for letter, (start, end) in ranges.items():
+            for word in word_list[start:end]:
+                self.assertTrue(word.startswith(letter))
+
+    def test_prefix_range(self):
+        word_list = WordList.from_words(["bee", "apple", "avocado", "apricot", "cherry", "banana", "été", "étui"])
+        self.assertEqual((0, 3), word_list.prefix_range("a"))
+        self.assertEqual((0, 2), word_list.prefix_range("ap"))
+        self.assertEqual((1, 2), word_list.prefix_range("apr"))
+        self.assertEqual((6, 8), word_list.prefix_range("ét"))
+        for prefix in ["ab", "applesauce", "d", "éz"]:
+            start, end = word_list.prefix_range(prefix)
+            self.assertEqual(start, end)
+        self.assertRaises(ValueError, word_list.prefix_range, "")
+
+    def test_prefix_range_cache_bounded(self):
+        word_list = WordList.from_words(["apple", "apricot", "avocado", "banana"])
+        for i in range(1000):
+            self.assertEqual((0, 2), word_list.prefix_range("ap"))
+            start, end = word_list.prefix_range("apple%d" % i)
+            self.assertEqual(start, end)
+            start, end = word_list.prefix_range("z%d" % i)
+            self.assertEqual(start, end)
+        self.assertEqual({"ap": (0, 2)}, word_list._prefix_ranges)
+
+    def test_newlines_rejected(self):
+        self.assertRaises(ValueError, WordList.from_words, ["some\nword"])
+
+
+class TestCompiledWordLists(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self._cache_dir = os.environ.get(WORD_LIST_CACHE_DIR_ENV)
+        os.environ[WORD_LIST_CACHE_DIR_ENV] = os.path.join(self.tmp_dir, "cache")
+        self.text_path = os.path.join(self.tmp_dir, "words.txt")
+        self.write_words(["word%d" % i for i in range(200)])
+
+    def tearDown(self):
+        if self._cache_dir is None:
+            del os.environ[WORD_LIST_CACHE_DIR_ENV]
+        else:
+            os.environ[WORD_LIST_CACHE_DIR_ENV] = self._cache_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def write_words(self, words):
+        with open(self.text_path, "wt", encoding="utf-8") as f:
+            f.write("\n".join(words) + "\n\n")
+
+    def test_save_and_load(self):
+        word_list = WordList.from_words(["zebra", "apple", "été", "mango"])
+        path = os.path.join(self.tmp_dir, "words.pwl")
+        word_list.save(path)
+        self.assertTrue(is_compiled_word_list(path))
+        loaded = WordList.load(path)
+        self.assertEqual(list(word_list), list(loaded))
+        self.assertTrue("été" in loaded)
+        self.assertFalse("apples" in loaded)
+
+    def test_load_populates_cache(self):
+        word_list = load_word_list(self.text_path, encoding="utf-8")
+        self.assertEqual(200, len(word_list))
+        self.assertIsNone(word_list.path)
+        # the second load must come from the compiled cache rather than memory
+        clear_loaded_word_lists(self.text_path)
+        cached = load_word_list(self.text_path, encoding="utf-8")
+        self.assertIsNotNone(cached.path)
+        self.assertEqual(list(word_list), list(cached))
+
+    def test_cache_invalidated_on_change(self):
+        load_word_list(self.text_path, encoding="utf-8")
+        self.write_words(["other%d" % i for i in range(300)])
+        clear_loaded_word_lists()
+        word_list = load_word_list(self.text_path, encoding="utf-8")
+        self.assertEqual(300, len(word_list))
+        self.assertTrue("other299" in word_list)
+
+    def test_cold_load_skips_reading_text(self):
+        word_list = load_word_list(self.text_path, encoding="utf-8")
+        clear_loaded_word_lists()
+        # the compiled copy is found by the text file's modification time and size, without reading it
+        with recording() as recorder:
+            cached = load_word_list(self.text_path, encoding="utf-8")
+        phases = recorder.as_dict()
+        self.assertEqual(1, phases["load_word_list"]["stat_cache_hits"])
+        self.assertNotIn("load_word_list.read", phases)
+        self.assertIsNotNone(cached.path)
+        self.assertEqual(list(word_list), list(cached))
+
+        self.write_words(["other%d" % i for i in range(300)])
+        clear_loaded_word_lists()
+        with recording() as recorder:
+            self.assertEqual(300, len(load_word_list(self.text_path, encoding="utf-8")))
+        self.assertIn("load_word_list.read", recorder.as_dict())
+
+    def test_edit_with_restored_mtime_picked_up(self):
+        self.write_words(["word%d" % i for i in range(199)] + ["apple"])
+        load_word_list(self.text_path, encoding="utf-8")
+        clear_loaded_word_lists()
+        file_stat = os.stat(self.text_path)
+        # make sure that the change time moves on, even with a coarse file system clock
+        time.sleep(0.05)
+        # the same number of bytes, with the modification time set back afterwards (as "cp -p" would)
+        self.write_words(["word%d" % i for i in range(199)] + ["mango"])
+        os.utime(self.text_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+        self.assertEqual(file_stat.st_size, os.path.getsize(self.text_path))
+        word_list = load_word_list(self.text_path, encoding="utf-8")
+        self.assertTrue("mango" in word_list)
+        self.assertFalse("apple" in word_list)
+
+    def test_loaded_word_lists_kept_in_memory(self):
+        word_list = load_word_list(self.text_path, encoding="utf-8")
+        os.unlink(self.text_path)
+        # the file system isn't touched again until the word list is due to be checked for changes
+        self.assertIs(word_list, load_word_list(self.text_path, encoding="utf-8"))
+        clear_loaded_word_lists(self.text_path)
+        self.assertRaises(OSError, load_word_list, self.text_path, encoding="utf-8")
+
+    def test_loaded_word_list_changes_picked_up(self):
+        stat_interval = _loaded_word_lists.stat_interval
+        _loaded_word_lists.stat_interval = 0
+        try:
+            word_list = load_word_list(self.text_path, encoding="utf-8")
+            self.assertIs(word_list, load_word_list(self.text_path, encoding="utf-8"))
+            self.write_words(["other%d" % i for i in range(300)])
+            word_list = load_word_list(self.text_path, encoding="utf-8")
+            self.assertEqual(300, len(word_list))
+        finally:
+            _loaded_word_lists.stat_interval = stat_interval
+
+    def test_loaded_word_lists_evicted(self):
+        cache = _LoadedWordLists(max_bytes=3000, stat_interval=60)
+        word_lists = [WordList.from_words(["word%d" % i for i in range(100)]) for _ in range(4)]
+        # each of these word lists takes up a little over 1000 bytes
+        for i, word_list in enumerate(word_lists):
+            cache.put(("path%d" % i, None, None), word_list, "path%d" % i, (0, 0))
+        self.assertIsNone(cache.get(("path0", None, None)))
+        self.assertIsNone(cache.get(("path1", None, None)))
+        self.assertIs(word_lists[2], cache.get(("path2", None, None)))
+        self.assertIs(word_lists[3], cache.get(("path3", None, None)))
+        self.assertLessEqual(cache.nbytes, 3000)
+        cache.clear()
+        self.assertEqual(0, cache.nbytes)
+        self.assertIsNone(cache.get(("path3", None, None)))
+
+    def test_compile_word_list(self):
+        output_path = os.path.join(self.tmp_dir, "words.pwl")
+        result = compile_word_list(self.text_path, output_path, encoding="utf-8")
+        self.assertEqual(200, result["words_written"])
+        word_list = load_word_list(output_path)
+        self.assertEqual(output_path, word_list.path)
+        self.assertTrue("word199" in word_list)
+
+    def test_invalid_compiled_file(self):
+        path = os.path.join(self.tmp_dir, "broken.pwl")
+        with open(path, "wb") as f:
+            f.write(b"PWDGWL01" + bytes(100))
+        self.assertRaises(ValueError, load_word_list, path)
+
+
+class TestCleanWordList(unittest.TestCase):
+    lines = [
+        "Apple",
+        "apple's",
+        "  BANANA  ",
+        "cherry.",
+        "dog's ",
+        "x's's",
+        "it",
+        "",
+        "   ",
+        "café",
+        "kiwi-fruit",
+        "42",
+    ]
+    # "x's's" loses its trailing possessive only, leaving "xs", which is too short
+    expected = ["apple", "banana", "caf", "cherry", "dog", "kiwifruit"]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, "words.txt")
+        self.output_path = os.path.join(self.temp_dir, "clean.txt")
+        with open(self.input_path, "wt", encoding="utf-8") as f:
+            f.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_clean(self, **kwargs):
+        result = clean_word_list(self.input_path, self.output_path, encoding="utf-8", **kwargs)
+        with open(self.output_path, "rt", encoding="utf-8") as f:
+            self.assertEqual(self.expected, f.read().splitlines())
+        self.assertEqual(10, result["words_read"])
+        self.assertEqual(len(self.expected), result["words_written"])
+        return result
+
+    def test_clean(self):
+        result = self.check_clean()
+        self.assertEqual(1, result["runs"])
+        self.assertEqual(os.path.getsize(self.input_path), result["bytes_read"])
+
+    def test_clean_with_spilled_runs(self):
+        # tiny chunks and runs force the words to be merged from many sorted runs on disk
+        result = self.check_clean(chunk_size=8, max_run_words=2)
+        self.assertTrue(result["runs"] > 1)
+
+    def test_clean_with_single_spilled_run(self):
+        # the whole file is one chunk, which is spilled as the only run before the end of the input
+        result = self.check_clean(max_run_words=1)
+        self.assertEqual(1, result["runs"])
+
+    def test_clean_with_jobs(self):
+        self.check_clean(jobs=2, chunk_size=16)
+
+    def test_min_word_len(self):
+        clean_word_list(self.input_path, self.output_path, encoding="utf-8", min_word_len=1)
+        with open(self.output_path, "rt", encoding="utf-8") as f:
+            self.assertEqual(["apple", "banana", "caf", "cherry", "dog", "it", "kiwifruit", "xs"], f.read().splitlines())
+
+
+if __name__ == "__main__":
+    unittest.main()